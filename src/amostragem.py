@@ -0,0 +1,170 @@
+# Contagem de derivações e amostragem uniforme por comprimento sobre a FNC
+#
+# Na FNC toda árvore de A com n folhas usa A -> a (n = 1) ou A -> B C com
+# B => k folhas e C => n - k. Então
+#   contagem[A][n] = #{A -> a}                                   se n = 1
+#   contagem[A][n] = soma de contagem[B][k] * contagem[C][n - k] se n >= 2
+# em inteiros exatos do Python. A tabela cresce só até o maior comprimento já
+# pedido e é reaproveitada entre chamadas.
+#
+# Para sortear uma árvore de A com n folhas, as escolhas (regra, divisão k) de
+# (A, n) ficam numa lista de pesos acumulados, montada na primeira vez que o
+# par aparece e guardada: cada nó da árvore custa um inteiro aleatório e uma
+# busca binária; um par com uma árvore só tem as folhas guardadas. Todas as árvores de S com n folhas saem com a mesma
+# probabilidade; numa gramática não ambígua, isso é o mesmo que todas as
+# palavras de comprimento n.
+
+import random
+from bisect import bisect_right
+
+from formato_binario import GramaticaBinaria
+from gramatica_compacta import GramaticaCompacta
+
+
+class AmostradorFNC:
+    def __init__(self, G, semente=None):
+        GC = G if isinstance(G, (GramaticaCompacta, GramaticaBinaria)) else GramaticaCompacta.de_dict(G)
+
+        variaveis = sorted(set(GC.producoes) | set(GC.variaveis()))
+        self.indice = {A: n for n, A in enumerate(variaveis)}
+        self.nomes = [GC.nome(A) for A in variaveis]
+        self.inicial = self.indice.get(GC.inicial, -1)
+        self.aceita_vazia = () in GC.corpos(GC.inicial)
+        self.aleatorio = random.Random(semente)
+
+        self.terminais = [[] for _ in variaveis]  # A -> [a]
+        self.binarias = [[] for _ in variaveis]   # A -> [(B, C)]
+        for A, regras in GC.producoes.items():
+            a = self.indice[A]
+            for r in regras:
+                if len(r) == 1 and not GC.eh_variavel(r[0]):
+                    self.terminais[a].append(GC.nome(r[0]))
+                elif len(r) == 2 and GC.eh_variavel(r[0]) and GC.eh_variavel(r[1]):
+                    self.binarias[a].append((self.indice[r[0]], self.indice[r[1]]))
+                elif r or A != GC.inicial:
+                    corpo = " ".join(GC.nome(s) for s in r) or "ε"
+                    raise ValueError(f"Regra fora da FNC: {GC.nome(A)} -> {corpo}")
+
+        # palavras como string se todos os terminais têm 1 caractere (como formatar_corpo)
+        self.como_texto = all(len(a) == 1 for t in self.terminais for a in t)
+
+        # contagem[A][n]; o índice 0 nunca é usado fora do inicial (ε só em S)
+        self.contagem = [[0, len(t)] for t in self.terminais]
+        self.escolhas = {}  # (A, n) -> (acumulados, [(B, C, k)])
+        self.fixas = {}     # (A, n) com uma árvore só -> folhas
+
+    # Func auxiliares
+
+    def _estender(self, comprimento):
+        contagem = self.contagem
+        binarias = self.binarias
+        for n in range(len(contagem[0]) if contagem else comprimento + 1, comprimento + 1):
+            # todas as variáveis ganham a coluna n juntas: C pode vir antes de A
+            coluna = []
+            for a, regras in enumerate(binarias):
+                total = 0
+                for b, c in regras:
+                    cb, cc = contagem[b], contagem[c]
+                    for k in range(1, n):
+                        x = cb[k]
+                        if x:
+                            y = cc[n - k]
+                            if y:
+                                total += x * y
+                coluna.append(total)
+            for a, total in enumerate(coluna):
+                contagem[a].append(total)
+
+    def _escolhas(self, a, n):
+        chave = (a, n)
+        escolhas = self.escolhas.get(chave)
+        if escolhas is None:
+            contagem = self.contagem
+            acumulados, opcoes = [], []
+            total = 0
+            for b, c in self.binarias[a]:
+                cb, cc = contagem[b], contagem[c]
+                for k in range(1, n):
+                    peso = cb[k] * cc[n - k]
+                    if peso:
+                        total += peso
+                        acumulados.append(total)
+                        opcoes.append((b, c, k))
+            escolhas = self.escolhas[chave] = (acumulados, opcoes)
+        return escolhas
+
+    def _sortear(self, a, comprimento, folhas):
+        # acrescenta a `folhas` as folhas de uma árvore sorteada de A, da esquerda para a direita
+        sorteio = self.aleatorio.randrange
+        escolhas = self.escolhas
+        fixas = self.fixas
+        contagem = self.contagem
+        pilha = [(a, comprimento)]
+        while pilha:
+            a, n = pilha.pop()
+            if n == 1:
+                terminais = self.terminais[a]
+                folhas.append(terminais[sorteio(len(terminais))] if len(terminais) > 1 else terminais[0])
+                continue
+            if contagem[a][n] == 1:
+                # uma árvore só: as folhas são montadas uma vez e copiadas
+                fixa = fixas.get((a, n))
+                if fixa is None:
+                    fixa = fixas[(a, n)] = self._fixa(a, n)
+                folhas.extend(fixa)
+                continue
+            acumulados, opcoes = escolhas.get((a, n)) or self._escolhas(a, n)
+            if len(opcoes) == 1:
+                b, c, k = opcoes[0]
+            else:
+                b, c, k = opcoes[bisect_right(acumulados, sorteio(acumulados[-1]))]
+            # C por baixo: B sai primeiro
+            pilha.append((c, n - k))
+            pilha.append((b, k))
+        return folhas
+
+    def _fixa(self, a, comprimento):
+        # folhas da única árvore de A com `comprimento` folhas (as subárvores também são únicas)
+        folhas = []
+        pilha = [(a, comprimento)]
+        while pilha:
+            a, n = pilha.pop()
+            if n == 1:
+                folhas.append(self.terminais[a][0])
+                continue
+            b, c, k = self._escolhas(a, n)[1][0]
+            pilha.append((c, n - k))
+            pilha.append((b, k))
+        return tuple(folhas)
+
+    # API
+
+    def total(self, comprimento, variavel=None):
+        # número de árvores de derivação com `comprimento` folhas (inteiro exato)
+        a = self.inicial if variavel is None else self.indice.get(variavel, -1)
+        if comprimento == 0:
+            return 1 if a == self.inicial and self.aceita_vazia else 0
+        if a < 0 or comprimento < 0:
+            return 0
+        self._estender(comprimento)
+        return self.contagem[a][comprimento]
+
+    def amostrar(self, comprimento):
+        return self.amostrar_lote(comprimento, 1)[0]
+
+    def amostrar_lote(self, comprimento, quantidade):
+        # `quantidade` palavras de `comprimento`, uniformes sobre as árvores de derivação
+        if not self.total(comprimento):
+            raise ValueError(f"A gramática não gera palavras de comprimento {comprimento}")
+        if comprimento == 0:
+            return [""] * quantidade
+        sortear = self._sortear
+        inicial = self.inicial
+        if self.como_texto:
+            return ["".join(sortear(inicial, comprimento, [])) for _ in range(quantidade)]
+        return [sortear(inicial, comprimento, []) for _ in range(quantidade)]
+
+    def gerar(self, comprimento):
+        # fluxo sem fim de palavras de `comprimento` (tabelas montadas na primeira)
+        while True:
+            yield from self.amostrar_lote(comprimento, 1024)
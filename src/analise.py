@@ -0,0 +1,108 @@
+# Análise de símbolos em tempo linear
+#
+# Anuláveis, geradores e alcançáveis são calculados com lista de trabalho:
+# um índice reverso "símbolo -> produções que o usam" e um contador por
+# produção com quantos símbolos ainda faltam ser confirmados. Cada ocorrência
+# de símbolo é visitada no máximo uma vez, então cada conjunto custa O(|G|)
+# em vez de reescanear todas as produções a cada volta do "while mudou".
+
+from collections import deque
+
+from gramatica_compacta import GramaticaCompacta
+
+
+def indice_reverso(GC):
+    # lista plana de produções (cabeça, corpo) e, para cada símbolo,
+    # os índices das produções onde ele aparece (uma entrada por ocorrência)
+    producoes = []
+    ocorrencias = {}
+    for A, regras in GC.producoes.items():
+        for r in regras:
+            p = len(producoes)
+            producoes.append((A, r))
+            for s in r:
+                lista = ocorrencias.get(s)
+                if lista is None:
+                    ocorrencias[s] = [p]
+                else:
+                    lista.append(p)
+    return producoes, ocorrencias
+
+
+def _propagar(producoes, ocorrencias, faltando):
+    # faltando[p] = quantos símbolos da produção p ainda não foram confirmados
+    # (None = produção que nunca pode disparar)
+    confirmados = set()
+    fila = deque()
+    for p, (A, r) in enumerate(producoes):
+        if faltando[p] == 0 and A not in confirmados:
+            confirmados.add(A)
+            fila.append(A)
+
+    while fila:
+        s = fila.popleft()
+        for p in ocorrencias.get(s, ()):
+            if faltando[p] is None:
+                continue
+            faltando[p] -= 1
+            if faltando[p] == 0:
+                A = producoes[p][0]
+                if A not in confirmados:
+                    confirmados.add(A)
+                    fila.append(A)
+    return confirmados
+
+
+def calcular_anulaveis(GC, indice=None):
+    producoes, ocorrencias = indice or indice_reverso(GC)
+    eh_variavel = GC.eh_variavel
+    # produção com terminal (ou símbolo desconhecido) nunca é anulável
+    faltando = [len(r) if all(eh_variavel(s) for s in r) else None
+                for _, r in producoes]
+    return _propagar(producoes, ocorrencias, faltando)
+
+
+def calcular_geradores(GC, indice=None):
+    producoes, ocorrencias = indice or indice_reverso(GC)
+    flags = GC.flags
+    eh_variavel = GC.eh_variavel
+    faltando = []
+    for _, r in producoes:
+        # símbolo inválido (nem variável nem terminal): a produção não gera
+        if not all(flags[s] for s in r):
+            faltando.append(None)
+        else:
+            # só as variáveis precisam ser confirmadas; terminais já geram
+            faltando.append(sum(1 for s in r if eh_variavel(s)))
+    return _propagar(producoes, ocorrencias, faltando)
+
+
+def calcular_alcancaveis(GC, inicio=None):
+    inicio = GC.inicial if inicio is None else inicio
+    eh_variavel = GC.eh_variavel
+    alcan = {inicio}
+    fila = deque([inicio])
+    while fila:
+        A = fila.popleft()
+        for r in GC.corpos(A):
+            for s in r:
+                if s not in alcan and eh_variavel(s):
+                    alcan.add(s)
+                    fila.append(s)
+    return alcan
+
+
+# Relatório dos três conjuntos (para reaproveitar fora das etapas)
+
+def analisar_gramatica(G):
+    GC = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+    indice = indice_reverso(GC)
+    conjuntos = {
+        "anulaveis": calcular_anulaveis(GC, indice),
+        "geradores": calcular_geradores(GC, indice),
+        "alcancaveis": calcular_alcancaveis(GC),
+    }
+    if GC is G:
+        return conjuntos
+    # entrada em dicionário: devolve nomes
+    return {chave: {GC.nome(v) for v in ids} for chave, ids in conjuntos.items()}
@@ -0,0 +1,312 @@
+# Benchmark das etapas de normalização
+#
+# Gera gramáticas aleatórias (gerador.py) de tamanhos crescentes e mede, para
+# cada etapa, o tempo e o pico de memória (tracemalloc). Exemplo (dentro de src/):
+#   python benchmark.py --tamanhos 5 10 20 40 --repeticoes 3 --saida ../resultados/bench.json
+#   python benchmark.py --tamanhos 5 10 20 40 --comparar ../resultados/bench.json
+#
+# Cada execução roda num processo separado com limite de tempo: um caso
+# exponencial é registrado como "tempo_esgotado" (com as etapas que chegaram a
+# terminar) em vez de travar a suíte. Depois que um tamanho estoura o limite,
+# os tamanhos maiores são pulados.
+# O resultado é um JSON com os parâmetros e uma linha por (tamanho, repetição),
+# para comparar execuções diferentes.
+#
+# Com --reconhecedores, mede em vez disso os dois caminhos para testes de
+# pertinência: Earley direto sobre a gramática gerada contra FNC + CYK
+# (normalização, montagem das tabelas e reconhecimento separados):
+#   python benchmark.py --reconhecedores --tamanhos 5 10 20 --comprimentos 10 40 --palavras 20
+
+import argparse
+import json
+import multiprocessing
+import platform
+import queue
+import random
+import sys
+import time
+
+from cyk import ReconhecedorCYK
+from earley import ReconhecedorEarley
+from gerador import gerar_gramatica
+from greibach import ALGORITMO_CANTO_ESQUERDO, ALGORITMO_CLASSICO
+from gramatica_compacta import GramaticaCompacta
+from instrumentacao import instrumentar
+from pipeline import FORMA_CHOMSKY, FORMA_GREIBACH, normalizar
+from rastreamento import SILENCIOSO, contar, definir_nivel
+
+# etapas medidas, na ordem do pipeline (nomes de @instrumentada)
+ETAPAS = ["remover_epsilon", "remover_unitarias", "remover_inuteis", "forma_normal_chomsky", "forma_normal_greibach"]
+
+PARAMETROS_GERADOR = ["num_terminais", "producoes_por_variavel", "tamanho_corpo", "densidade_anulavel",
+                      "profundidade_unitaria", "densidade_recursao_esquerda"]
+
+
+def medir_etapas(G, algoritmo_fng=ALGORITMO_CLASSICO, memoria=True, fila=None):
+    # pipeline completo até a FNG sob a instrumentação; cada medição é enviada
+    # para `fila` assim que a etapa termina, para sobreviver a um tempo esgotado
+    definir_nivel(SILENCIOSO)
+    with instrumentar(memoria=memoria, ao_registrar=fila.put if fila is not None else None) as registro:
+        normalizar(G, FORMA_GREIBACH, algoritmo_fng=algoritmo_fng)
+    return registro["etapas"]
+
+
+def executar_caso(G, algoritmo_fng, memoria, limite):
+    # executa medir_etapas num processo filho e mata o processo se passar do limite
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_medir_no_filho, args=(G, algoritmo_fng, memoria, fila))
+    processo.start()
+
+    medicoes = []
+    status = "ok"
+    fim = time.monotonic() + limite if limite else None
+    while len(medicoes) < len(ETAPAS):
+        espera = None if fim is None else fim - time.monotonic()
+        if espera is not None and espera <= 0:
+            status = "tempo_esgotado"
+            break
+        try:
+            item = fila.get(timeout=espera)
+        except queue.Empty:
+            status = "tempo_esgotado"
+            break
+        if "erro" in item:
+            status = "erro"
+            medicoes.append(item)
+            break
+        medicoes.append(item)
+
+    if processo.is_alive() and status != "ok":
+        processo.terminate()
+    processo.join()
+    return status, medicoes
+
+
+def executar_benchmark(tamanhos, repeticoes=1, semente=0, algoritmo_fng=ALGORITMO_CLASSICO,
+                       memoria=True, limite=60, parametros=None):
+    parametros = dict(parametros or {})
+    resultados = []
+    esgotado = False
+
+    for tamanho in tamanhos:
+        for repeticao in range(repeticoes):
+            semente_caso = semente * 1000003 + tamanho * 1009 + repeticao
+            G = gerar_gramatica(tamanho, semente=semente_caso, **parametros)
+            num_variaveis, num_producoes = contar(G)
+            resultado = {
+                "tamanho": tamanho,
+                "repeticao": repeticao,
+                "semente": semente_caso,
+                "entrada": {"variaveis": num_variaveis, "producoes": num_producoes},
+            }
+            if esgotado:
+                resultado["status"] = "pulado"
+                resultado["etapas"] = []
+            else:
+                resultado["status"], resultado["etapas"] = executar_caso(G, algoritmo_fng, memoria, limite)
+            resultados.append(resultado)
+
+        # os tamanhos maiores também estourariam
+        if any(r["status"] == "tempo_esgotado" for r in resultados if r["tamanho"] == tamanho):
+            esgotado = True
+
+    return {
+        "parametros": {
+            "tamanhos": list(tamanhos),
+            "repeticoes": repeticoes,
+            "semente": semente,
+            "algoritmo_fng": algoritmo_fng,
+            "memoria": memoria,
+            "limite_segundos": limite,
+            "gerador": parametros,
+        },
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "resultados": resultados,
+    }
+
+
+def comparar_reconhecedores(G, palavras):
+    # tempos do Earley (sem normalização) e do CYK (FNC + tabelas + reconhecimento)
+    definir_nivel(SILENCIOSO)
+    inicio = time.perf_counter()
+    earley = ReconhecedorEarley(G)
+    preparo_earley = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    respostas_earley = earley.pertence_lote(palavras)
+    tempo_earley = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    fnc = normalizar(GramaticaCompacta.de_dict(G), FORMA_CHOMSKY)
+    normalizacao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    cyk = ReconhecedorCYK(fnc)
+    preparo_cyk = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    respostas_cyk = cyk.pertence_lote(palavras)
+    tempo_cyk = time.perf_counter() - inicio
+
+    return {
+        "earley": {"preparo": round(preparo_earley, 6), "reconhecimento": round(tempo_earley, 6)},
+        "cyk": {"normalizacao": round(normalizacao, 6), "preparo": round(preparo_cyk, 6),
+                "reconhecimento": round(tempo_cyk, 6), "producoes_fnc": fnc.num_producoes()},
+        "aceitas": sum(respostas_earley),
+        "divergencias": sum(a != b for a, b in zip(respostas_earley, respostas_cyk)),
+    }
+
+
+def executar_comparacao_reconhecedores(tamanhos, comprimentos, num_palavras=20, repeticoes=1, semente=0,
+                                       parametros=None):
+    # palavras aleatórias sobre o alfabeto da gramática, com a mesma semente do caso
+    parametros = dict(parametros or {})
+    resultados = []
+    for tamanho in tamanhos:
+        for repeticao in range(repeticoes):
+            semente_caso = semente * 1000003 + tamanho * 1009 + repeticao
+            G = gerar_gramatica(tamanho, semente=semente_caso, **parametros)
+            alfabeto = sorted(G["alfabeto"])
+            aleatorio = random.Random(semente_caso)
+            for comprimento in comprimentos:
+                palavras = [[aleatorio.choice(alfabeto) for _ in range(comprimento)] for _ in range(num_palavras)]
+                resultado = {"tamanho": tamanho, "repeticao": repeticao, "semente": semente_caso,
+                             "comprimento": comprimento, "palavras": num_palavras}
+                try:
+                    resultado.update(comparar_reconhecedores(G, palavras))
+                    resultado["status"] = "ok"
+                except Exception as erro:
+                    resultado["status"] = "erro"
+                    resultado["erro"] = f"{type(erro).__name__}: {erro}"
+                resultados.append(resultado)
+
+    return {
+        "parametros": {
+            "tamanhos": list(tamanhos),
+            "comprimentos": list(comprimentos),
+            "palavras": num_palavras,
+            "repeticoes": repeticoes,
+            "semente": semente,
+            "gerador": parametros,
+        },
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "resultados": resultados,
+    }
+
+
+def comparar_resultados(anterior, atual):
+    # razão atual/anterior da mediana de tempo por (tamanho, etapa)
+    def medianas(relatorio):
+        tempos = {}
+        for resultado in relatorio["resultados"]:
+            for medicao in resultado["etapas"]:
+                if "segundos" in medicao:
+                    tempos.setdefault((resultado["tamanho"], medicao["etapa"]), []).append(medicao["segundos"])
+        return {chave: sorted(v)[len(v) // 2] for chave, v in tempos.items()}
+
+    antes = medianas(anterior)
+    depois = medianas(atual)
+    comparacao = []
+    ordem = {nome: i for i, nome in enumerate(ETAPAS)}
+    for chave in sorted(antes.keys() & depois.keys(), key=lambda c: (c[0], ordem.get(c[1], len(ordem)))):
+        razao = depois[chave] / antes[chave] if antes[chave] else None
+        comparacao.append({"tamanho": chave[0], "etapa": chave[1], "anterior": antes[chave],
+                           "atual": depois[chave], "razao": razao})
+    return comparacao
+
+
+def imprimir_tabela(relatorio):
+    print(f"{'tamanho':>8} {'rep':>4} {'etapa':<22} {'segundos':>10} {'pico (KiB)':>11} {'produções':>10}")
+    for resultado in relatorio["resultados"]:
+        if not resultado["etapas"]:
+            print(f"{resultado['tamanho']:>8} {resultado['repeticao']:>4} ({resultado['status']})")
+        for medicao in resultado["etapas"]:
+            if "erro" in medicao:
+                print(f"{resultado['tamanho']:>8} {resultado['repeticao']:>4} erro: {medicao['erro']}")
+                continue
+            pico = f"{medicao['pico_bytes'] / 1024:.1f}" if medicao["pico_bytes"] is not None else "-"
+            print(f"{resultado['tamanho']:>8} {resultado['repeticao']:>4} {medicao['etapa']:<22} "
+                  f"{medicao['segundos']:>10.4f} {pico:>11} {medicao['producoes_depois']:>10}")
+        if resultado["status"] == "tempo_esgotado":
+            print(f"{resultado['tamanho']:>8} {resultado['repeticao']:>4} (tempo esgotado)")
+
+
+def imprimir_tabela_reconhecedores(relatorio):
+    print(f"{'tamanho':>8} {'rep':>4} {'compr.':>6} {'earley (s)':>11} {'fnc (s)':>9} {'cyk (s)':>9} "
+          f"{'prod. fnc':>10} {'aceitas':>8} {'diverg.':>8}")
+    for resultado in relatorio["resultados"]:
+        inicio = f"{resultado['tamanho']:>8} {resultado['repeticao']:>4} {resultado['comprimento']:>6}"
+        if resultado["status"] != "ok":
+            print(f"{inicio} erro: {resultado['erro']}")
+            continue
+        earley, cyk = resultado["earley"], resultado["cyk"]
+        print(f"{inicio} {earley['preparo'] + earley['reconhecimento']:>11.4f} {cyk['normalizacao']:>9.4f} "
+              f"{cyk['preparo'] + cyk['reconhecimento']:>9.4f} {cyk['producoes_fnc']:>10} "
+              f"{resultado['aceitas']:>8} {resultado['divergencias']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas de normalização")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[5, 10, 20, 40],
+                        help="números de variáveis das gramáticas geradas")
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--algoritmo-fng", choices=[ALGORITMO_CLASSICO, ALGORITMO_CANTO_ESQUERDO],
+                        default=ALGORITMO_CLASSICO)
+    parser.add_argument("--limite", type=float, default=60, help="segundos por caso (0 = sem limite)")
+    parser.add_argument("--sem-memoria", action="store_true",
+                        help="não usa tracemalloc (tempos sem a sobrecarga da medição)")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar os tempos")
+    parser.add_argument("--reconhecedores", action="store_true",
+                        help="compara Earley sobre a gramática gerada com FNC + CYK")
+    parser.add_argument("--comprimentos", type=int, nargs="+", default=[10, 40],
+                        help="comprimentos das palavras (com --reconhecedores)")
+    parser.add_argument("--palavras", type=int, default=20, help="palavras por comprimento (com --reconhecedores)")
+    parser.add_argument("--num-terminais", type=int, default=2)
+    parser.add_argument("--producoes-por-variavel", type=int, default=3)
+    parser.add_argument("--tamanho-corpo", type=int, default=3)
+    parser.add_argument("--densidade-anulavel", type=float, default=0.1)
+    parser.add_argument("--profundidade-unitaria", type=int, default=0)
+    parser.add_argument("--densidade-recursao-esquerda", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    parametros = {nome: getattr(args, nome) for nome in PARAMETROS_GERADOR}
+    if args.reconhecedores:
+        relatorio = executar_comparacao_reconhecedores(args.tamanhos, args.comprimentos, args.palavras,
+                                                       args.repeticoes, args.semente, parametros)
+        imprimir_tabela_reconhecedores(relatorio)
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as arquivo:
+                json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+            print(f"\nResultados salvos em {args.saida}")
+        return 0
+
+    relatorio = executar_benchmark(args.tamanhos, args.repeticoes, args.semente, args.algoritmo_fng,
+                                   not args.sem_memoria, args.limite or None, parametros)
+    imprimir_tabela(relatorio)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nResultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            anterior = json.load(arquivo)
+        print(f"\n{'tamanho':>8} {'etapa':<22} {'anterior':>10} {'atual':>10} {'razão':>7}")
+        for linha in comparar_resultados(anterior, relatorio):
+            razao = f"{linha['razao']:.2f}" if linha["razao"] is not None else "-"
+            print(f"{linha['tamanho']:>8} {linha['etapa']:<22} {linha['anterior']:>10.4f} "
+                  f"{linha['atual']:>10.4f} {razao:>7}")
+    return 0
+
+
+# Func auxiliares
+
+def _medir_no_filho(G, algoritmo_fng, memoria, fila):
+    try:
+        medir_etapas(G, algoritmo_fng, memoria, fila)
+    except Exception as erro:
+        fila.put({"erro": f"{type(erro).__name__}: {erro}"})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# Cache em disco das gramáticas normalizadas
+#
+# A chave é o hash canônico da gramática de entrada (independe da ordem das
+# linhas do arquivo e da ordem de internação dos símbolos) mais a etapa e as
+# opções que a afetam:
+#   simplificada: ordem
+#   fnc:          ordem + fatoração
+#   fng:          ordem + fatoração + algoritmo
+# Cada etapa é guardada num arquivo próprio (pickle da gramática compacta),
+# então pedir a FNG depois da FNC reaproveita a FNC já calculada.
+# O diretório tem tamanho limitado: ao passar do limite, os arquivos usados
+# há mais tempo (mtime, atualizado a cada leitura) são apagados primeiro.
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from gramatica_compacta import GramaticaCompacta, TabelaSimbolos
+
+# muda quando o formato gravado ou o resultado das etapas mudar
+VERSAO_CACHE = 1
+
+ETAPA_SIMPLIFICADA = "simplificada"
+ETAPA_CHOMSKY = "fnc"
+ETAPA_GREIBACH = "fng"
+
+
+class CacheGramaticas:
+    def __init__(self, diretorio="../cache", limite_bytes=256 << 20):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        os.makedirs(diretorio, exist_ok=True)
+
+    def chave(self, hash_gramatica, etapa, **opcoes):
+        texto = json.dumps([VERSAO_CACHE, hash_gramatica, etapa, sorted(opcoes.items())], separators=(",", ":"))
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "rb") as arquivo:
+                GC = carregar_gramatica(arquivo)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            # ausente, apagado por outro processo ou corrompido: recalcula
+            return None
+        try:
+            os.utime(caminho)  # marca como usado recentemente
+        except OSError:
+            pass
+        return GC
+
+    def guardar(self, chave, GC):
+        # escreve num temporário e renomeia: leitores (ou outros processos do
+        # lote) nunca veem um arquivo pela metade
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                salvar_gramatica(GC, arquivo)
+            os.replace(temporario, self._caminho(chave))
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        self.remover_excedente()
+
+    def remover_excedente(self):
+        entradas = []
+        total = 0
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".pkl"):
+                continue
+            try:
+                info = os.stat(os.path.join(self.diretorio, nome))
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, nome))
+            total += info.st_size
+
+        # LRU: apaga os menos usados até caber no limite
+        entradas.sort()
+        for _, tamanho, nome in entradas:
+            if total <= self.limite_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+            except OSError:
+                pass
+            total -= tamanho
+
+    def limpar(self):
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".pkl"):
+                os.remove(os.path.join(self.diretorio, nome))
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + ".pkl")
+
+
+def hash_gramatica(G):
+    # hash canônico: nomes ordenados, sem depender dos ids internos
+    GC = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+    nomes = GC.simbolos.nomes
+    canonica = [
+        sorted(nomes[i] for i in GC.variaveis()),
+        sorted(nomes[i] for i in GC.terminais()),
+        nomes[GC.inicial] if GC.inicial >= 0 else "",
+        sorted([nomes[A], sorted([nomes[s] for s in r] for r in regras)] for A, regras in GC.producoes.items()),
+    ]
+    texto = json.dumps(canonica, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def salvar_gramatica(GC, arquivo):
+    # os conjuntos de corpos compartilhados continuam compartilhados (memo do pickle)
+    dados = (VERSAO_CACHE, GC.simbolos.nomes, GC.simbolos.ids, bytes(GC.flags), GC.inicial, GC.producoes)
+    pickle.dump(dados, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def carregar_gramatica(arquivo):
+    versao, nomes, ids, flags, inicial, producoes = pickle.load(arquivo)
+    if versao != VERSAO_CACHE:
+        raise pickle.UnpicklingError(f"versão de cache {versao} incompatível")
+    GC = GramaticaCompacta.__new__(GramaticaCompacta)
+    GC.simbolos = TabelaSimbolos()
+    GC.simbolos.nomes = nomes
+    GC.simbolos.ids = ids
+    GC.flags = bytearray(flags)
+    GC.inicial = inicial
+    GC.producoes = producoes
+    return GC
@@ -1,139 +1,165 @@
-from copy import deepcopy
-from simplificacao import imprimir_gramatica
-
-def forma_normal_chomsky(G):
-    G = deepcopy(G)
-    print("\n### FORMA NORMAL DE CHOMSKY ###")
-    
-    # Padronização (String -> Lista)
-    # converte produções de string "ABC" para lista ["A", "B", "C"]
-    # necessário para nomes de variáveis compostos (ex: X_ab)
-    for var, regras in G["producoes"].items():
-        novas_regras = []
-        for r in regras:
-            # se já for lista, mantém, se for string, converte
-            if isinstance(r, str):
-                # caso especial: epsilon
-                if r == "ε": 
-                    novas_regras.append(["ε"])
-                else:
-                    novas_regras.append(list(r))
-            else:
-                novas_regras.append(r)
-        G["producoes"][var] = novas_regras
+from gramatica_compacta import GramaticaCompacta, VARIAVEL
+from instrumentacao import instrumentada
+from rastreamento import RESUMO, SILENCIOSO, nivel_rastreamento, rastrear, rastrear_gramatica
+
+# fatoração da binarização de corpos longos (ver forma_normal_chomsky_compacta)
+FATORACAO_ESQUERDA = "esquerda"
+FATORACAO_DIREITA = "direita"
+
+def forma_normal_chomsky(G, fatoracao=FATORACAO_ESQUERDA):
+    GC = GramaticaCompacta.de_dict(G)
+    forma_normal_chomsky_compacta(GC, fatoracao)
+
+    # imprime usando função
+    rastrear_gramatica(GC, "Forma Normal de Chomsky Final", listas=True)
+    return GC.para_dict(listas=True)
+
+
+@instrumentada("forma_normal_chomsky")
+def forma_normal_chomsky_compacta(GC, fatoracao=FATORACAO_ESQUERDA):
+    if fatoracao not in (FATORACAO_ESQUERDA, FATORACAO_DIREITA):
+        raise ValueError(f"Fatoração inválida: {fatoracao}")
+
+    rastrear("\n### FORMA NORMAL DE CHOMSKY ###")
+
+    # os corpos já são tuplas de símbolos (ids), então nomes de variáveis
+    # compostos (ex: X_ab) não precisam de nenhuma padronização aqui
 
     # dicionário para reaproveitar variáveis criadas
-    # chave: tupla do corpo da produção (ex: ('A', 'B')), Valor: nome da variável
+    # chave: tupla do corpo da produção (ex: (A, B)), Valor: variável
     cache_producoes = {}
-    
+
     # contador para garantir nomes únicos se necessário
     contador_var = 1
 
     # isolar terminais
     # regra: Se o corpo tem comprimento >= 2, terminais devem virar variáveis.
-    # Ex: A -> aB vira A -> V_a B e V_a -> a
-    
-    print("-> Isolando terminais...")
-    
+    # Ex: A -> aB vira A -> T_a B e T_a -> a
+
+    rastrear("-> Isolando terminais...")
+    isolar_terminais(GC, cache_producoes)
+
+    # binarização (Reduzir tamanho das produções), numa passada só
+    # esquerda: A -> B C D E vira A -> X_BCD E, X_BCD -> X_BC D, X_BC -> B C
+    #           (trie de prefixos: corpos com o mesmo começo compartilham variáveis)
+    # direita:  A -> B C D E vira A -> B X_CDE, X_CDE -> C X_DE, X_DE -> D E
+    #           (trie de sufixos: corpos com o mesmo final compartilham variáveis)
+    # cada par (nó da trie, símbolo) fica em cache_producoes, então o mesmo
+    # prefixo/sufixo vira uma única variável em todas as regras
+
+    rastrear(f"-> Binarizando produções longas (fatoração à {fatoracao})...")
+
+    def variavel_par(par):
+        nonlocal contador_var
+        # verifica se já criamos uma variável para esse par
+        nova_var = cache_producoes.get(par)
+        if nova_var is None:
+            nova_var = GC.nova_variavel(nome_par(GC, par))
+
+            # garante unicidade caso o nome já exista (colisão)
+            while nova_var is None:
+                nova_var = GC.nova_variavel(f"X_{contador_var}")
+                contador_var += 1
+
+            cache_producoes[par] = nova_var
+            criadas.append(nova_var)
+
+            # cria a nova produção: X_AB -> A B
+            GC.producoes[nova_var] = {par: None}
+        return nova_var
+
+    criadas = []
+    esquerda = fatoracao == FATORACAO_ESQUERDA
+    for var in list(GC.producoes.keys()):
+        regras = GC.producoes[var]
+        # se todas têm tamanho <= 2, está ok (conjunto não é trocado)
+        if all(len(r) <= 2 for r in regras):
+            continue
+
+        novas_regras = {}
+        for r in regras:
+            if len(r) <= 2:
+                novas_regras[r] = None
+            elif esquerda:
+                no = r[0]
+                for simbolo in r[1:-1]:
+                    no = variavel_par((no, simbolo))
+                novas_regras[(no, r[-1])] = None
+            else:
+                no = r[-1]
+                for simbolo in reversed(r[1:-1]):
+                    no = variavel_par((simbolo, no))
+                novas_regras[(r[0], no)] = None
+        GC.producoes[var] = novas_regras
+
+    rastrear(lambda: f"-> Binarização ({fatoracao}): {len(criadas)} variáveis criadas", RESUMO)
+
+    return GC
+
+
+# Quantas variáveis cada fatoração cria (roda as duas sobre instantâneos)
+
+def comparar_fatoracoes(G):
+    GC = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+
+    relatorio = {}
+    with nivel_rastreamento(SILENCIOSO):
+        for fatoracao in (FATORACAO_ESQUERDA, FATORACAO_DIREITA):
+            copia = GC.instantaneo()
+            antes = len(copia.variaveis())
+            forma_normal_chomsky_compacta(copia, fatoracao)
+            relatorio[fatoracao] = {
+                "variaveis_criadas": len(copia.variaveis()) - antes,
+                "producoes": copia.num_producoes(),
+            }
+    return relatorio
+
+
+# Func auxiliares
+
+def isolar_terminais(GC, cache_producoes):
+    # cache_producoes recebe (a,) -> T_a, compartilhado com a binarização
     # iteramos sobre uma cópia das chaves para poder modificar o dicionário
-    variaveis_originais = list(G["producoes"].keys())
-    
+    variaveis_originais = list(GC.producoes.keys())
+
     for var in variaveis_originais:
-        regras = G["producoes"][var]
-        novas_regras = []
-        
+        regras = GC.producoes[var]
+        novas_regras = {}
+
         for r in regras:
             # se tamanho < 2, não precisa fazer nada (ex: A -> a ou A -> B)
             if len(r) < 2:
-                novas_regras.append(r)
+                novas_regras[r] = None
                 continue
-            
+
             nova_regra = []
             for simbolo in r:
                 # se é terminal (está no alfabeto), cria variável para ele
-                if simbolo in G["alfabeto"]:
-                    chave_terminal = tuple([simbolo])
-                    
+                if GC.eh_terminal(simbolo):
+                    chave_terminal = (simbolo,)
+
                     if chave_terminal in cache_producoes:
-                        nome_var_terminal = cache_producoes[chave_terminal]
+                        var_terminal = cache_producoes[chave_terminal]
                     else:
                         # cria nome da variável (ex: T_a)
-                        nome_var_terminal = f"T_{simbolo}"
-                        cache_producoes[chave_terminal] = nome_var_terminal
-                        
-                        # adiciona na gramática
-                        G["variaveis"].add(nome_var_terminal)
-                        if nome_var_terminal not in G["producoes"]:
-                            G["producoes"][nome_var_terminal] = []
-                        G["producoes"][nome_var_terminal].append([simbolo])
-                    
-                    nova_regra.append(nome_var_terminal)
+                        var_terminal = GC.simbolo(f"T_{GC.nome(simbolo)}", VARIAVEL)
+                        cache_producoes[chave_terminal] = var_terminal
+
+                        # adiciona na gramática (sem alterar conjuntos existentes)
+                        GC.producoes[var_terminal] = {**GC.corpos(var_terminal), chave_terminal: None}
+
+                    nova_regra.append(var_terminal)
                 else:
                     # É variável, mantém
                     nova_regra.append(simbolo)
-            
-            novas_regras.append(nova_regra)
-        G["producoes"][var] = novas_regras
-
-    # binarização (Reduzir tamanho das produções)
-    # Regra: A -> ABC vira A -> X_AB C e X_AB -> AB
-    
-    print("-> Binarizando produções longas...")
-    
-    mudou = True
-    while mudou:
-        mudou = False
-        # coletamos todas as variáveis atuais
-        variaveis_atuais = list(G["producoes"].keys())
-        
-        for var in variaveis_atuais:
-            regras = G["producoes"][var]
-            novas_regras = []
-            
-            for r in regras:
-                # se tamanho <= 2, está ok
-                if len(r) <= 2:
-                    novas_regras.append(r)
-                    continue
-                
-                mudou = True # encontramos regra longa, o loop vai rodar de novo
-                
-                # pega os 2 primeiros símbolos
-                primeiro = r[0]
-                segundo = r[1]
-                restante = r[2:]
-                
-                par = (primeiro, segundo)
-                
-                # verifica se já criamos uma variável para esse par
-                if par in cache_producoes:
-                    nova_var = cache_producoes[par]
-                else:
-                    # cria nome seguindo seu padrão: X_AB (concatenação simples se curto)
-                    # limpa caracteres estranhos para o nome não quebrar
-                    p1_clean = primeiro.replace("T_", "")
-                    p2_clean = segundo.replace("T_", "")
-                    nova_var = f"X_{p1_clean}{p2_clean}"
-                    
-                    # garante unicidade caso o nome já exista (colisão)
-                    if nova_var in G["variaveis"]:
-                        nova_var = f"X_{contador_var}"
-                        contador_var += 1
-
-                    cache_producoes[par] = nova_var
-                    G["variaveis"].add(nova_var)
-                    
-                    # cria a nova produção: X_AB -> A B
-                    G["producoes"][nova_var] = [[primeiro, segundo]]
-
-                # atualiza a regra original: A -> X_AB C ...
-                nova_regra_original = [nova_var] + restante
-                novas_regras.append(nova_regra_original)
-            
-            G["producoes"][var] = novas_regras
-
-    # imprime usando função 
-    imprimir_gramatica(G, "Forma Normal de Chomsky Final")
-    return G
+
+            novas_regras[tuple(nova_regra)] = None
+        GC.producoes[var] = novas_regras
 
 
+def nome_par(GC, par):
+    # nome seguindo seu padrão: X_AB (concatenação simples se curto)
+    # limpa caracteres estranhos para o nome não quebrar
+    p1_clean = GC.nome(par[0]).replace("T_", "")
+    p2_clean = GC.nome(par[1]).replace("T_", "")
+    return f"X_{p1_clean}{p2_clean}"
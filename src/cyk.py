@@ -0,0 +1,168 @@
+# Reconhecedor CYK bit-paralelo sobre a saída de forma_normal_chomsky
+#
+# A gramática é pré-compilada em tabelas de índices:
+#   terminal -> bitset das variáveis A com A -> a
+#   B        -> [(C, A)] para cada A -> B C
+# O quadro é guardado por variável como bitsets (inteiros do Python):
+#   linha[B][i]  bit j ligado se B =>* w[i:j]
+#   coluna[C][j] bit k ligado se C =>* w[k:j]
+# Assim, A -> B C cobre w[i:j] se linha[B][i] & coluna[C][j] != 0: todos os
+# pontos de divisão k são testados de uma vez com um único AND.
+#
+# Aceita também uma GramaticaBinaria (formato_binario.py): as tabelas são
+# montadas lendo direto do mmap, sem carregar a gramática inteira.
+
+from formato_binario import GramaticaBinaria
+from gramatica_compacta import GramaticaCompacta
+
+
+class ReconhecedorCYK:
+    def __init__(self, G):
+        GC = G if isinstance(G, (GramaticaCompacta, GramaticaBinaria)) else GramaticaCompacta.de_dict(G)
+
+        variaveis = sorted(set(GC.producoes) | set(GC.variaveis()))
+        self.indice = {A: n for n, A in enumerate(variaveis)}
+        self.nomes = [GC.nome(A) for A in variaveis]
+        self.inicial = self.indice.get(GC.inicial, -1)
+        self.aceita_vazia = () in GC.corpos(GC.inicial)
+
+        self.por_terminal = {}   # nome do terminal -> bitset de variáveis
+        self.por_esquerda = {}   # B -> [(C, A)]
+        self.binarias = []       # (A, B, C), para contagem e derivação
+
+        for A, regras in GC.producoes.items():
+            a = self.indice[A]
+            for r in regras:
+                if len(r) == 1 and not GC.eh_variavel(r[0]):
+                    nome = GC.nome(r[0])
+                    self.por_terminal[nome] = self.por_terminal.get(nome, 0) | (1 << a)
+                elif len(r) == 2 and GC.eh_variavel(r[0]) and GC.eh_variavel(r[1]):
+                    b, c = self.indice[r[0]], self.indice[r[1]]
+                    self.por_esquerda.setdefault(b, []).append((c, a))
+                    self.binarias.append((a, b, c))
+                elif r:
+                    corpo = " ".join(GC.nome(s) for s in r)
+                    raise ValueError(f"Regra fora da FNC: {GC.nome(A)} -> {corpo}")
+
+    # Func auxiliares
+
+    def _simbolos(self, palavra):
+        # string: um terminal por caractere; lista/tupla: já tokenizada
+        return list(palavra) if isinstance(palavra, str) else palavra
+
+    def _quadro(self, simbolos):
+        n = len(simbolos)
+        nv = len(self.nomes)
+        linha = [[0] * (n + 1) for _ in range(nv)]
+        coluna = [[0] * (n + 1) for _ in range(nv)]
+
+        # comprimento 1: regras terminais
+        for i, s in enumerate(simbolos):
+            bits = self.por_terminal.get(s, 0)
+            A = 0
+            while bits:
+                if bits & 1:
+                    linha[A][i] |= 1 << (i + 1)
+                    coluna[A][i + 1] |= 1 << i
+                bits >>= 1
+                A += 1
+
+        por_esquerda = list(self.por_esquerda.items())
+        for tamanho in range(2, n + 1):
+            for i in range(n - tamanho + 1):
+                j = i + tamanho
+                bit_j = 1 << j
+                bit_i = 1 << i
+                for B, regras in por_esquerda:
+                    inicio = linha[B][i]
+                    if not inicio:
+                        continue
+                    for C, A in regras:
+                        if inicio & coluna[C][j] and not linha[A][i] & bit_j:
+                            linha[A][i] |= bit_j
+                            coluna[A][j] |= bit_i
+        return linha, coluna
+
+    def _deriva(self, linha, A, i, j):
+        return (linha[A][i] >> j) & 1
+
+    # API
+
+    def pertence(self, palavra):
+        simbolos = self._simbolos(palavra)
+        if not simbolos:
+            return self.aceita_vazia
+        if self.inicial < 0:
+            return False
+        linha, _ = self._quadro(simbolos)
+        return bool(self._deriva(linha, self.inicial, 0, len(simbolos)))
+
+    def pertence_lote(self, palavras):
+        return [self.pertence(p) for p in palavras]
+
+    def contar_derivacoes(self, palavra):
+        # número de árvores de derivação (inteiro exato, pode ser enorme)
+        simbolos = self._simbolos(palavra)
+        n = len(simbolos)
+        if n == 0:
+            return 1 if self.aceita_vazia else 0
+        if self.inicial < 0:
+            return 0
+        linha, coluna = self._quadro(simbolos)
+        if not self._deriva(linha, self.inicial, 0, n):
+            return 0
+
+        # contagem[(i, j)] = {A: número de árvores de A para w[i:j]}
+        contagem = {}
+        for i, s in enumerate(simbolos):
+            bits = self.por_terminal.get(s, 0)
+            contagem[(i, i + 1)] = {A: 1 for A in range(len(self.nomes)) if (bits >> A) & 1}
+
+        for tamanho in range(2, n + 1):
+            for i in range(n - tamanho + 1):
+                j = i + tamanho
+                celula = {}
+                for A, B, C in self.binarias:
+                    divisoes = linha[B][i] & coluna[C][j]
+                    if not divisoes or not self._deriva(linha, A, i, j):
+                        continue
+                    total = 0
+                    for k in range(i + 1, j):
+                        if (divisoes >> k) & 1:
+                            total += contagem[(i, k)][B] * contagem[(k, j)][C]
+                    celula[A] = celula.get(A, 0) + total
+                contagem[(i, j)] = celula
+        return contagem[(0, n)].get(self.inicial, 0)
+
+    def derivacao(self, palavra):
+        # uma árvore de derivação como listas aninhadas:
+        # [variável, terminal] ou [variável, filho_esquerdo, filho_direito]
+        simbolos = self._simbolos(palavra)
+        n = len(simbolos)
+        if n == 0:
+            return [self.nomes[self.inicial], "ε"] if self.aceita_vazia else None
+        if self.inicial < 0:
+            return None
+        linha, coluna = self._quadro(simbolos)
+        if not self._deriva(linha, self.inicial, 0, n):
+            return None
+
+        raiz = [self.nomes[self.inicial]]
+        pilha = [(raiz, self.inicial, 0, n)]
+        while pilha:
+            no, A, i, j = pilha.pop()
+            if j - i == 1:
+                no.append(simbolos[i])
+                continue
+            for A2, B, C in self.binarias:
+                if A2 != A:
+                    continue
+                divisoes = linha[B][i] & coluna[C][j]
+                if divisoes:
+                    k = (divisoes & -divisoes).bit_length() - 1
+                    esquerdo, direito = [self.nomes[B]], [self.nomes[C]]
+                    no.extend((esquerdo, direito))
+                    pilha.append((esquerdo, B, i, k))
+                    pilha.append((direito, C, k, j))
+                    break
+        return raiz
@@ -0,0 +1,172 @@
+# Reconhecedor de Earley sobre a gramática de entrada (sem normalização)
+#
+# Para quem só precisa de testes de pertinência: roda direto sobre a gramática
+# de utils.ler_gramatica, com ε-produções, unitárias e recursão à esquerda,
+# sem passar pela simplificação nem pela FNC/FNG.
+#
+# A gramática é compilada em estados (regra com ponto):
+#   proximo[e]  símbolo depois do ponto (índice de variável, nome do terminal
+#               ou None se a regra terminou)
+#   cabeca[e]   variável da regra; e + 1 é o estado com o ponto avançado
+# O estado 0 é a regra aumentada S' -> .S, e o estado 1 é S' -> S. ; a palavra
+# pertence se (1, 0) está no último conjunto.
+#
+# Em cada conjunto k os itens (estado, origem) ficam indexados pelo símbolo
+# depois do ponto, então a varredura e a conclusão só visitam quem espera
+# aquele símbolo.
+# Anuláveis (analise.calcular_anulaveis) são tratados na predição, como em
+# Aycock e Horspool: ao prever B anulável o ponto também avança sobre B, e não
+# é preciso concluir itens de origem k dentro do próprio conjunto k.
+# Otimização de Leo: se em j o único item que espera B é A -> α .B (B no fim),
+# concluir B com origem j conclui A com a origem dele, e assim por diante. O
+# topo dessa cadeia fica memorizado por (j, B) e é adicionado direto, sem os
+# itens intermediários: recursão à direita fica linear em vez de quadrática.
+#
+# Os conjuntos só dependem dos anteriores, então _conjunto / _varredura também
+# servem para percorrer várias palavras com prefixo comum, empilhando e
+# desempilhando conjuntos (ver verificacao.py).
+
+from analise import calcular_anulaveis
+from formato_binario import GramaticaBinaria
+from gramatica_compacta import GramaticaCompacta
+
+
+class ReconhecedorEarley:
+    def __init__(self, G):
+        GC = G if isinstance(G, (GramaticaCompacta, GramaticaBinaria)) else GramaticaCompacta.de_dict(G)
+        if isinstance(GC, GramaticaBinaria):
+            GC = GC.para_compacta()
+
+        variaveis = sorted(set(GC.producoes) | set(GC.variaveis()))
+        self.indice = {A: n for n, A in enumerate(variaveis)}
+        self.nomes = [GC.nome(A) for A in variaveis]
+        self.inicial = self.indice.get(GC.inicial, -1)
+
+        anulaveis = calcular_anulaveis(GC)
+        self.anulavel = [A in anulaveis for A in variaveis]
+
+        # estados 0 e 1: S' -> .S e S' -> S.
+        self.proximo = [self.inicial, None]
+        self.cabeca = [-1, -1]
+        self.inicios = [[] for _ in variaveis]  # variável -> estados com o ponto no início
+        for A, regras in GC.producoes.items():
+            a = self.indice[A]
+            for r in regras:
+                self.inicios[a].append(len(self.proximo))
+                for s in r:
+                    self.proximo.append(self.indice[s] if GC.eh_variavel(s) else GC.nome(s))
+                    self.cabeca.append(a)
+                self.proximo.append(None)
+                self.cabeca.append(a)
+
+    # Func auxiliares
+
+    def _simbolos(self, palavra):
+        # string: um terminal por caractere; lista/tupla: já tokenizada
+        return list(palavra) if isinstance(palavra, str) else palavra
+
+    def _topo_leo(self, esperando, leo, j, B):
+        # topo da cadeia de Leo ao concluir B com origem j, ou None
+        proximo = self.proximo
+        cabeca = self.cabeca
+        caminho = []
+        topo = None
+        while True:
+            memo = leo[j]
+            if B in memo:
+                topo = memo[B]
+                break
+            candidatos = esperando[j].get(B, ())
+            if len(candidatos) != 1 or proximo[candidatos[0][0] + 1] is not None:
+                memo[B] = None
+                break
+            e, origem = candidatos[0]
+            memo[B] = None  # em andamento: corta ciclos de unitárias
+            caminho.append((j, B, (e + 1, origem)))
+            j, B = origem, cabeca[e]
+
+        # cada (j, B) do caminho aponta para o topo mais alto acima dele
+        for j, B, completo in reversed(caminho):
+            if topo is None:
+                topo = completo
+            leo[j][B] = topo
+        return topo
+
+    def _conjunto(self, esperando, leo, itens):
+        # fecha o conjunto k = len(esperando) a partir dos itens da varredura;
+        # empilha o índice por símbolo e a memória de Leo, e diz se S' -> S. está nele
+        k = len(esperando)
+        proximo = self.proximo
+        cabeca = self.cabeca
+        inicios = self.inicios
+        anulavel = self.anulavel
+        vistos = set(itens)
+        espera_k = {}
+        esperando.append(espera_k)
+        leo.append({})
+        previstas = set()
+
+        def adicionar(item):
+            if item not in vistos:
+                vistos.add(item)
+                itens.append(item)
+
+        i = 0
+        while i < len(itens):
+            item = itens[i]
+            i += 1
+            e, origem = item
+            X = proximo[e]
+            if X is None:
+                # conclusão (origem k já foi coberta na predição dos anuláveis)
+                if origem == k:
+                    continue
+                A = cabeca[e]
+                topo = self._topo_leo(esperando, leo, origem, A)
+                if topo is not None:
+                    adicionar(topo)
+                else:
+                    for f, o in esperando[origem].get(A, ()):
+                        adicionar((f + 1, o))
+                continue
+
+            lista = espera_k.get(X)
+            if lista is None:
+                espera_k[X] = [item]
+            else:
+                lista.append(item)
+            if isinstance(X, str):
+                continue
+            # predição
+            if X not in previstas:
+                previstas.add(X)
+                for f in inicios[X]:
+                    adicionar((f, k))
+            if anulavel[X]:
+                adicionar((e + 1, origem))
+
+        return (1, 0) in vistos
+
+    def _varredura(self, esperando, simbolo):
+        # itens do próximo conjunto: os do último que esperam `simbolo`
+        return [(e + 1, origem) for e, origem in esperando[-1].get(simbolo, ())]
+
+    # API
+
+    def pertence(self, palavra):
+        simbolos = self._simbolos(palavra)
+        if self.inicial < 0:
+            return False
+
+        esperando = []  # por conjunto: símbolo -> [(estado, origem)]
+        leo = []        # por conjunto: variável -> topo da cadeia de Leo (ou None)
+        aceita = self._conjunto(esperando, leo, [(0, 0)])
+        for s in simbolos:
+            itens = self._varredura(esperando, s)
+            if not itens:
+                return False
+            aceita = self._conjunto(esperando, leo, itens)
+        return aceita
+
+    def pertence_lote(self, palavras):
+        return [self.pertence(p) for p in palavras]
@@ -0,0 +1,284 @@
+# Formato binário da gramática (abre com mmap, sem parsing)
+#
+# Layout (little-endian), cada seção alinhada em 8 bytes:
+#   cabeçalho       "GLCB", versão, nº de símbolos, nº de cabeças, nº de corpos,
+#                   nº de inteiros dos corpos, símbolo inicial, bytes dos nomes
+#   flags           u8  [símbolos]        VARIAVEL / TERMINAL (gramatica_compacta)
+#   nomes_inicio    u32 [símbolos + 1]    início de cada nome em `nomes`
+#   nomes           utf-8
+#   cabecas         u32 [cabeças]         variáveis com produções, ordenadas
+#   primeiro_corpo  u32 [cabeças + 1]     corpos da cabeça k: [primeiro[k], primeiro[k+1])
+#   corpos_inicio   u32 [corpos + 1]      símbolos do corpo c: [inicio[c], inicio[c+1])
+#   simbolos        u32 [inteiros]        todos os corpos, concatenados (ε = corpo vazio)
+#
+# GramaticaBinaria lê as seções como memoryviews sobre o mmap: abrir o
+# arquivo não copia nada, e só as variáveis consultadas são decodificadas.
+
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+
+from gramatica_compacta import TERMINAL, VARIAVEL, GramaticaCompacta, TabelaSimbolos
+
+MAGICO = b"GLCB"
+VERSAO = 1
+
+_CABECALHO = struct.Struct("<4sIIIIIiI")
+
+
+def salvar_binario(G, caminho):
+    # aceita o dicionário normalizado ou a GramaticaCompacta
+    GC = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+
+    cabecas = array("I", sorted(GC.producoes))
+    primeiro_corpo = array("I", [0])
+    corpos_inicio = array("I", [0])
+    simbolos = array("I")
+    for A in cabecas:
+        for r in GC.producoes[A]:
+            simbolos.extend(r)
+            corpos_inicio.append(len(simbolos))
+        primeiro_corpo.append(len(corpos_inicio) - 1)
+
+    with open(caminho, "wb") as arquivo:
+        _escrever(arquivo, GC, GC.flags, cabecas, primeiro_corpo, corpos_inicio, [simbolos], len(simbolos))
+
+
+def salvar_binario_fluxo(GC, caminho, variaveis, corpos):
+    # mesmo formato, com os corpos de cada variável vindos de corpos(A) (ver
+    # greibach_em_fluxo): só os deslocamentos ficam na memória; os símbolos vão
+    # para um temporário em blocos e são copiados para o lugar no final.
+    # variáveis fora de `variaveis` saem sem a flag VARIAVEL, como em
+    # remover_variavel. Devolve o nº de produções.
+    cabecas = array("I", sorted(variaveis))
+    primeiro_corpo = array("I", [0])
+    corpos_inicio = array("I", [0])
+    flags = bytearray(GC.flags)
+    finais = set(variaveis)
+    for A in GC.variaveis():
+        if A not in finais:
+            flags[A] &= ~VARIAVEL
+
+    with tempfile.TemporaryFile() as temporario:
+        bloco = array("I")
+        total = 0
+        for A in cabecas:
+            for r in corpos(A):
+                bloco.extend(r)
+                corpos_inicio.append(total + len(bloco))
+                if len(bloco) >= 1 << 16:
+                    total += _despejar(temporario, bloco)
+                    bloco = array("I")
+            primeiro_corpo.append(len(corpos_inicio) - 1)
+        total += _despejar(temporario, bloco)
+
+        temporario.seek(0)
+        with open(caminho, "wb") as arquivo:
+            _escrever(arquivo, GC, flags, cabecas, primeiro_corpo, corpos_inicio, [temporario], total)
+    return len(corpos_inicio) - 1
+
+
+class GramaticaBinaria:
+    # leitura somente: mesma interface de consulta da GramaticaCompacta
+    # (nome, eh_variavel, variaveis, terminais, corpos, producoes, inicial)
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, "rb")
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # arquivo vazio não pode ser mapeado
+            self._arquivo.close()
+            raise ValueError(f"{caminho}: arquivo de gramática binária vazio")
+        self._buffer = memoryview(self._mapa)
+
+        if len(self._buffer) < _CABECALHO.size:
+            self.close()
+            raise ValueError(f"{caminho}: arquivo de gramática binária truncado")
+        magico, versao, n_simbolos, n_cabecas, n_corpos, n_inteiros, inicial, tamanho_nomes = \
+            _CABECALHO.unpack_from(self._buffer)
+        if magico != MAGICO or versao != VERSAO:
+            self.close()
+            raise ValueError(f"{caminho}: não é uma gramática binária (versão {VERSAO})")
+
+        self.inicial = inicial
+        posicao = _CABECALHO.size
+        self.flags, posicao = self._secao(posicao, n_simbolos, None)
+        self._nomes_inicio, posicao = self._secao(posicao, n_simbolos + 1, "I")
+        self._nomes, posicao = self._secao(posicao, tamanho_nomes, None)
+        self._cabecas, posicao = self._secao(posicao, n_cabecas, "I")
+        self._primeiro_corpo, posicao = self._secao(posicao, n_cabecas + 1, "I")
+        self._corpos_inicio, posicao = self._secao(posicao, n_corpos + 1, "I")
+        self._simbolos, posicao = self._secao(posicao, n_inteiros, "I")
+        if posicao > len(self._buffer):
+            self.close()
+            raise ValueError(f"{caminho}: arquivo de gramática binária truncado")
+
+        self.producoes = _ProducoesBinarias(self)
+        self._cache_nomes = {}
+        self._ids = None
+
+    # símbolos
+
+    def nome(self, i):
+        nome = self._cache_nomes.get(i)
+        if nome is None:
+            nome = str(self._nomes[self._nomes_inicio[i]:self._nomes_inicio[i + 1]], "utf-8")
+            self._cache_nomes[i] = nome
+        return nome
+
+    def id(self, nome):
+        # o índice nome -> id só é montado na primeira busca por nome
+        if self._ids is None:
+            self._ids = {self.nome(i): i for i in range(len(self.flags))}
+        return self._ids.get(nome)
+
+    def eh_variavel(self, s):
+        return self.flags[s] & VARIAVEL
+
+    def eh_terminal(self, s):
+        return self.flags[s] & TERMINAL
+
+    def variaveis(self):
+        flags = self.flags
+        return [i for i in range(len(flags)) if flags[i] & VARIAVEL]
+
+    def terminais(self):
+        flags = self.flags
+        return [i for i in range(len(flags)) if flags[i] & TERMINAL]
+
+    # produções
+
+    def corpos(self, A):
+        k = self._posicao(A)
+        return self._corpos_de(k) if k >= 0 else []
+
+    def num_producoes(self):
+        return len(self._corpos_inicio) - 1
+
+    def para_compacta(self):
+        # materializa tudo numa GramaticaCompacta (cópia completa)
+        simbolos = TabelaSimbolos()
+        simbolos.nomes = [self.nome(i) for i in range(len(self.flags))]
+        simbolos.ids = {nome: i for i, nome in enumerate(simbolos.nomes)}
+        GC = GramaticaCompacta(simbolos)
+        GC.flags[:] = self.flags
+        GC.inicial = self.inicial
+        for A, regras in self.producoes.items():
+            GC.producoes[A] = dict.fromkeys(regras)
+        return GC
+
+    def close(self):
+        # as memoryviews precisam ser liberadas antes de fechar o mmap
+        for nome in ("flags", "_nomes_inicio", "_nomes", "_cabecas", "_primeiro_corpo",
+                     "_corpos_inicio", "_simbolos", "_buffer"):
+            visao = self.__dict__.pop(nome, None)
+            if visao is not None:
+                visao.release()
+        self._mapa.close()
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Func auxiliares
+
+    def _secao(self, posicao, tamanho, formato):
+        posicao += -posicao % 8
+        largura = 4 if formato else 1
+        fim = posicao + tamanho * largura
+        visao = self._buffer[posicao:fim]
+        if formato:
+            if sys.byteorder == "big":
+                # máquina big-endian: converte (copia) em vez de mapear
+                inteiros = array(formato, visao.tobytes())
+                inteiros.byteswap()
+                visao = memoryview(inteiros)
+            else:
+                visao = visao.cast(formato)
+        return visao, fim
+
+    def _posicao(self, A):
+        # posição da cabeça A (busca binária), ou -1
+        k = bisect_left(self._cabecas, A)
+        return k if k < len(self._cabecas) and self._cabecas[k] == A else -1
+
+    def _corpos_de(self, k):
+        inicio, simbolos = self._corpos_inicio, self._simbolos
+        return [tuple(simbolos[inicio[c]:inicio[c + 1]])
+                for c in range(self._primeiro_corpo[k], self._primeiro_corpo[k + 1])]
+
+
+class _ProducoesBinarias:
+    # visão preguiçosa no formato de GramaticaCompacta.producoes (cabeça -> corpos)
+    def __init__(self, G):
+        self._G = G
+
+    def __len__(self):
+        return len(self._G._cabecas)
+
+    def __iter__(self):
+        return iter(self._G._cabecas)
+
+    def __contains__(self, A):
+        return self._G._posicao(A) >= 0
+
+    def __getitem__(self, A):
+        k = self._G._posicao(A)
+        if k < 0:
+            raise KeyError(A)
+        return self._G._corpos_de(k)
+
+    def get(self, A, padrao=None):
+        k = self._G._posicao(A)
+        return self._G._corpos_de(k) if k >= 0 else padrao
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self._G._corpos_de(k) for k in range(len(self._G._cabecas)))
+
+    def items(self):
+        return ((A, self._G._corpos_de(k)) for k, A in enumerate(self._G._cabecas))
+
+
+# Func auxiliares
+
+def _escrever(arquivo, GC, flags, cabecas, primeiro_corpo, corpos_inicio, simbolos, n_inteiros):
+    # simbolos: arrays, ou um arquivo com os inteiros já na ordem certa
+    nomes = [nome.encode("utf-8") for nome in GC.simbolos.nomes]
+    nomes_inicio = array("I", [0])
+    for nome in nomes:
+        nomes_inicio.append(nomes_inicio[-1] + len(nome))
+
+    secoes = [bytes(flags[:len(nomes)]).ljust(len(nomes), b"\0"), nomes_inicio, b"".join(nomes),
+              cabecas, primeiro_corpo, corpos_inicio] + simbolos
+
+    arquivo.write(_CABECALHO.pack(MAGICO, VERSAO, len(nomes), len(cabecas), len(corpos_inicio) - 1,
+                                  n_inteiros, GC.inicial, nomes_inicio[-1]))
+    posicao = _CABECALHO.size
+    for secao in secoes:
+        posicao += arquivo.write(b"\0" * (-posicao % 8))
+        if hasattr(secao, "read"):
+            shutil.copyfileobj(secao, arquivo, 1 << 20)
+            posicao += secao.tell()
+            continue
+        if isinstance(secao, array):
+            if sys.byteorder == "big":
+                secao.byteswap()
+            secao = secao.tobytes()
+        posicao += arquivo.write(secao)
+
+
+def _despejar(arquivo, bloco):
+    if sys.byteorder == "big":
+        bloco.byteswap()
+    bloco.tofile(arquivo)
+    return len(bloco)
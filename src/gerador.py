@@ -0,0 +1,70 @@
+# Gerador de gramáticas aleatórias (com semente) para benchmarks
+#
+# Os parâmetros controlam exatamente os casos que pesam nas etapas:
+#   densidade_anulavel:          fração das variáveis com A -> ε
+#                                (remoção de ε: 2^k variantes por corpo)
+#   profundidade_unitaria:       tamanho da cadeia S -> V1 -> V2 -> ... -> Vk
+#                                (fecho das produções unitárias)
+#   densidade_recursao_esquerda: fração das variáveis com A -> A α
+#                                (eliminação de recursão na FNG)
+# A mesma semente gera sempre a mesma gramática.
+
+import random
+
+from gramatica_compacta import EPSILON
+
+
+def gerar_gramatica(num_variaveis, num_terminais=2, producoes_por_variavel=3, tamanho_corpo=3,
+                    densidade_anulavel=0.1, profundidade_unitaria=0,
+                    densidade_recursao_esquerda=0.1, semente=None):
+    if num_variaveis < 1:
+        raise ValueError("A gramática precisa de pelo menos uma variável")
+    if tamanho_corpo < 1:
+        raise ValueError("O tamanho máximo do corpo deve ser pelo menos 1")
+
+    aleatorio = random.Random(semente)
+
+    variaveis = ["S"] + [f"V{i}" for i in range(1, num_variaveis)]
+    terminais = [nome_terminal(i) for i in range(max(num_terminais, 1))]
+    simbolos = variaveis + terminais
+    producoes = {A: [] for A in variaveis}
+
+    def corpo(tamanho, primeiro=None):
+        r = [primeiro] if primeiro is not None else []
+        while len(r) < tamanho:
+            r.append(aleatorio.choice(simbolos))
+        return r
+
+    for A in variaveis:
+        # um corpo só de terminais garante que toda variável é geradora
+        producoes[A].append([aleatorio.choice(terminais) for _ in range(aleatorio.randint(1, tamanho_corpo))])
+        for _ in range(producoes_por_variavel - 1):
+            producoes[A].append(corpo(aleatorio.randint(1, tamanho_corpo)))
+
+        if aleatorio.random() < densidade_recursao_esquerda:
+            producoes[A].append(corpo(aleatorio.randint(2, max(tamanho_corpo, 2)), A))
+        if aleatorio.random() < densidade_anulavel:
+            producoes[A].append([EPSILON])
+
+    # cadeia unitária a partir do símbolo inicial
+    cadeia = variaveis[:profundidade_unitaria + 1]
+    for A, B in zip(cadeia, cadeia[1:]):
+        producoes[A].append([B])
+
+    # remove corpos repetidos mantendo a ordem
+    for A, regras in producoes.items():
+        producoes[A] = [list(r) for r in dict.fromkeys(tuple(r) for r in regras)]
+
+    return {
+        "variaveis": set(variaveis),
+        "alfabeto": set(terminais),
+        "inicial": "S",
+        "producoes": producoes,
+    }
+
+
+# Func auxiliares
+
+def nome_terminal(i):
+    # a, b, ..., z, t26, t27, ...
+    return chr(ord("a") + i) if i < 26 else f"t{i}"
@@ -0,0 +1,60 @@
+# Algoritmos de grafo usados pelas etapas (sobre ids de variáveis)
+
+
+# Componentes fortemente conexas (Tarjan, iterativo para não estourar a pilha)
+# Devolve as componentes em ordem topológica reversa: uma componente sempre
+# aparece depois de todas as componentes que ela alcança.
+
+def componentes_fortemente_conexas(vertices, sucessores):
+    indice = {}
+    menor = {}
+    na_pilha = set()
+    pilha = []
+    componentes = []
+    contador = 0
+
+    for raiz in vertices:
+        if raiz in indice:
+            continue
+
+        indice[raiz] = menor[raiz] = contador
+        contador += 1
+        pilha.append(raiz)
+        na_pilha.add(raiz)
+        trabalho = [(raiz, iter(sucessores.get(raiz, ())))]
+
+        while trabalho:
+            v, filhos = trabalho[-1]
+            avancou = False
+            for w in filhos:
+                if w not in indice:
+                    indice[w] = menor[w] = contador
+                    contador += 1
+                    pilha.append(w)
+                    na_pilha.add(w)
+                    trabalho.append((w, iter(sucessores.get(w, ()))))
+                    avancou = True
+                    break
+                if w in na_pilha and indice[w] < menor[v]:
+                    menor[v] = indice[w]
+            if avancou:
+                continue
+
+            trabalho.pop()
+            if trabalho:
+                pai = trabalho[-1][0]
+                if menor[v] < menor[pai]:
+                    menor[pai] = menor[v]
+
+            # v é raiz de uma componente
+            if menor[v] == indice[v]:
+                componente = []
+                while True:
+                    w = pilha.pop()
+                    na_pilha.discard(w)
+                    componente.append(w)
+                    if w == v:
+                        break
+                componentes.append(componente)
+
+    return componentes
@@ -0,0 +1,188 @@
+# Núcleo compacto da gramática
+#
+# Todos os símbolos são internados em inteiros pequenos (TabelaSimbolos) e os
+# corpos das produções viram tuplas de inteiros: são hasheáveis, baratas de
+# comparar e ocupam bem menos memória que listas de strings.
+# A classificação de cada símbolo (variável / terminal) fica num mapa de flags
+# (bytearray indexado pelo id), então as etapas não fazem mais testes de
+# pertinência em G["variaveis"] / G["alfabeto"].
+#
+# O formato em dicionário (G["variaveis"], G["producoes"], ...) continua sendo
+# a interface pública; de_dict / para_dict fazem a conversão nas bordas.
+
+EPSILON = "ε"
+
+# flags dos símbolos
+VARIAVEL = 1
+TERMINAL = 2
+
+
+class TabelaSimbolos:
+    def __init__(self):
+        self.nomes = []  # id -> nome
+        self.ids = {}    # nome -> id
+
+    def internar(self, nome):
+        i = self.ids.get(nome)
+        if i is None:
+            i = len(self.nomes)
+            self.ids[nome] = i
+            self.nomes.append(nome)
+        return i
+
+    def nome(self, i):
+        return self.nomes[i]
+
+    def renomear(self, mapa):
+        # mapa: id -> novo nome (renomeação simultânea, os corpos não mudam)
+        for i in mapa:
+            if self.ids.get(self.nomes[i]) == i:
+                del self.ids[self.nomes[i]]
+        for i, nome in mapa.items():
+            self.nomes[i] = nome
+            self.ids[nome] = i
+
+    def __len__(self):
+        return len(self.nomes)
+
+
+class GramaticaCompacta:
+    def __init__(self, simbolos=None):
+        self.simbolos = simbolos if simbolos is not None else TabelaSimbolos()
+        self.flags = bytearray(len(self.simbolos))
+        self.inicial = -1
+        # variável -> conjunto ordenado de corpos (dict corpo -> None)
+        # o mesmo conjunto pode ser compartilhado por várias variáveis (ex:
+        # componentes unitárias), então as etapas trocam o conjunto inteiro
+        # em vez de alterá-lo no lugar
+        self.producoes = {}
+
+    # símbolos
+
+    def simbolo(self, nome, flag=0):
+        i = self.simbolos.internar(nome)
+        if i >= len(self.flags):
+            self.flags.extend(bytes(i + 1 - len(self.flags)))
+        self.flags[i] |= flag
+        return i
+
+    def nome(self, i):
+        return self.simbolos.nomes[i]
+
+    def eh_variavel(self, s):
+        return self.flags[s] & VARIAVEL
+
+    def eh_terminal(self, s):
+        return self.flags[s] & TERMINAL
+
+    def variaveis(self):
+        flags = self.flags
+        return [i for i in range(len(flags)) if flags[i] & VARIAVEL]
+
+    def terminais(self):
+        flags = self.flags
+        return [i for i in range(len(flags)) if flags[i] & TERMINAL]
+
+    def remover_variavel(self, A):
+        self.flags[A] &= ~VARIAVEL
+        self.producoes.pop(A, None)
+
+    def nova_variavel(self, nome):
+        # devolve None se o nome já pertence a uma variável ou terminal
+        i = self.simbolos.ids.get(nome)
+        if i is not None and self.flags[i]:
+            return None
+        return self.simbolo(nome, VARIAVEL)
+
+    # produções
+
+    def corpos(self, A):
+        return self.producoes.get(A, {})
+
+    # altera o conjunto no lugar: só para montar gramáticas novas, nunca
+    # dentro das etapas (o conjunto pode estar compartilhado)
+    def adicionar(self, A, corpo):
+        regras = self.producoes.get(A)
+        if regras is None:
+            regras = self.producoes[A] = {}
+        regras[corpo] = None
+
+    def num_producoes(self):
+        return sum(len(regras) for regras in self.producoes.values())
+
+    def copiar(self):
+        G = GramaticaCompacta.__new__(GramaticaCompacta)
+        G.simbolos = TabelaSimbolos()
+        G.simbolos.nomes = list(self.simbolos.nomes)
+        G.simbolos.ids = dict(self.simbolos.ids)
+        G.flags = bytearray(self.flags)
+        G.inicial = self.inicial
+        G.producoes = {A: dict(regras) for A, regras in self.producoes.items()}
+        return G
+
+    def instantaneo(self):
+        # cópia rasa (copy-on-write): compartilha os conjuntos de corpos, que
+        # as etapas nunca alteram no lugar; só a tabela de símbolos e as flags
+        # são copiadas, porque a FNG renomeia variáveis
+        G = GramaticaCompacta.__new__(GramaticaCompacta)
+        G.simbolos = TabelaSimbolos()
+        G.simbolos.nomes = list(self.simbolos.nomes)
+        G.simbolos.ids = dict(self.simbolos.ids)
+        G.flags = bytearray(self.flags)
+        G.inicial = self.inicial
+        G.producoes = dict(self.producoes)
+        return G
+
+    # conversão de / para o formato em dicionário
+
+    @classmethod
+    def de_dict(cls, G):
+        GC = cls()
+        for v in sorted(G["variaveis"]):
+            GC.simbolo(v, VARIAVEL)
+        for a in sorted(G["alfabeto"]):
+            GC.simbolo(a, TERMINAL)
+        GC.inicial = GC.simbolo(G["inicial"])
+
+        simbolo = GC.simbolo
+        for var, regras in G["producoes"].items():
+            A = simbolo(var)
+            destino = GC.producoes.setdefault(A, {})
+            for r in regras:
+                destino[tuple(simbolo(s) for s in corpo_simbolos(r))] = None
+        return GC
+
+    def para_dict(self, listas=False):
+        nomes = self.simbolos.nomes
+        producoes = {}
+        for A, regras in self.producoes.items():
+            producoes[nomes[A]] = [formatar_corpo(r, nomes, listas) for r in regras]
+        return {
+            "variaveis": {nomes[i] for i in self.variaveis()},
+            "alfabeto": {nomes[i] for i in self.terminais()},
+            "inicial": nomes[self.inicial] if self.inicial >= 0 else "",
+            "producoes": producoes,
+        }
+
+
+# Func auxiliares
+
+def corpo_simbolos(r):
+    # aceita corpo como string "aAd" (um símbolo por caractere) ou lista ["T_a", "X_AB"]
+    if isinstance(r, str):
+        return () if r == EPSILON else r
+    if len(r) == 1 and r[0] == EPSILON:
+        return ()
+    return r
+
+
+def formatar_corpo(corpo, nomes, listas=False):
+    if listas:
+        return [nomes[s] for s in corpo] if corpo else [EPSILON]
+    if not corpo:
+        return EPSILON
+    simbolos = [nomes[s] for s in corpo]
+    # mantém o formato string "aAd" enquanto todos os símbolos tiverem 1 caractere
+    if all(len(s) == 1 for s in simbolos):
+        return "".join(simbolos)
+    return simbolos
@@ -1,174 +1,426 @@
-from copy import deepcopy
-from chomsky import *
-from simplificacao import remover_inuteis
+from gramatica_compacta import GramaticaCompacta, VARIAVEL
+from chomsky import forma_normal_chomsky_compacta
+from formato_binario import salvar_binario_fluxo
+from instrumentacao import instrumentada
+from rastreamento import (
+    RESUMO,
+    SILENCIOSO,
+    escrever_gramatica_fluxo,
+    nivel_rastreamento,
+    rastrear,
+    rastrear_gramatica,
+)
+from simplificacao import remover_inuteis_compacta
 
-def forma_normal_greibach(G):
+# algoritmos de conversão FNC -> FNG
+# "classico": ordenação A_i + substituição reversa (pode crescer exponencialmente)
+# "canto_esquerdo": transformação de canto esquerdo (Rosenkrantz), tamanho polinomial
+ALGORITMO_CLASSICO = "classico"
+ALGORITMO_CANTO_ESQUERDO = "canto_esquerdo"
+
+def forma_normal_greibach(G, algoritmo=ALGORITMO_CLASSICO):
+    GC = GramaticaCompacta.de_dict(G)
+    forma_normal_greibach_compacta(GC, algoritmo)
+
+    rastrear_gramatica(GC, "Forma Normal de Greibach Final", listas=True)
+    return GC.para_dict(listas=True)
+
+
+def forma_normal_greibach_compacta(GC, algoritmo=ALGORITMO_CLASSICO):
     # garantir que está na Forma Normal de Chomsky
     # é necessario já estar em FNC para funcionar ok
-    G = forma_normal_chomsky(G)
-    
-    print("\n### FORMA NORMAL DE GREIBACH ###")
-    
+    forma_normal_chomsky_compacta(GC)
+    rastrear_gramatica(GC, "Forma Normal de Chomsky Final", listas=True)
+    return converter_fnc_para_greibach(GC, algoritmo)
+
+
+@instrumentada("forma_normal_greibach")
+def converter_fnc_para_greibach(GC, algoritmo=ALGORITMO_CLASSICO):
+    if algoritmo == ALGORITMO_CLASSICO:
+        greibach_classico(GC)
+    elif algoritmo == ALGORITMO_CANTO_ESQUERDO:
+        greibach_canto_esquerdo(GC)
+    else:
+        raise ValueError(f"Algoritmo de FNG inválido: {algoritmo}")
+
+    rastrear(lambda: f"-> FNG ({algoritmo}): {GC.num_producoes()} regras", RESUMO)
+    return GC
+
+
+# Quantas regras cada algoritmo produz (roda os dois sobre instantâneos da FNC)
+
+def comparar_algoritmos_greibach(G):
+    GC = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+
+    with nivel_rastreamento(SILENCIOSO):
+        forma_normal_chomsky_compacta(GC)
+        return {
+            algoritmo: converter_fnc_para_greibach(GC.instantaneo(), algoritmo).num_producoes()
+            for algoritmo in (ALGORITMO_CLASSICO, ALGORITMO_CANTO_ESQUERDO)
+        }
+
+
+def podar_inuteis(GC):
+    # remove símbolos inúteis entre as fases, sem poluir o rastreamento
+    with nivel_rastreamento(SILENCIOSO):
+        remover_inuteis_compacta(GC)
+
+
+# Primeira fase da FNG clássica, compartilhada com greibach_em_fluxo:
+# renomeia para A_1 ... A_n, ordena (Ai -> Aj... só com j > i), elimina a
+# recursão imediata e poda. Devolve (tem_epsilon, lista_A, vars_z); depois
+# dela só falta a substituição reversa, que é o que explode.
+
+def ordenar_greibach(GC):
+    # S -> ε fica de fora da conversão: a remoção de ε já gerou as variantes
+    # sem S em todos os corpos, então a regra só é necessária no topo
+    tem_epsilon = () in GC.corpos(GC.inicial)
+    if tem_epsilon:
+        GC.producoes[GC.inicial] = {r: None for r in GC.corpos(GC.inicial) if r}
 
     # renomeia variáveis (A1, A2, ..., An)
     # pega o inicial separado
-    inicial = G["inicial"]
-    
+    inicial = GC.inicial
+
     # ordena o restante
-    outras_variaveis = sorted([v for v in G["variaveis"] if v != inicial])
-    
+    outras_variaveis = sorted((v for v in GC.variaveis() if v != inicial), key=GC.nome)
+
     # lista com inicial primeiro
-    variaveis_ordenadas = [inicial] + outras_variaveis
-    
-    mapa_original_para_Ai = {}
-    mapa_Ai_para_original = {}
-    
-    novas_producoes = {}
-    
-    for i, var in enumerate(variaveis_ordenadas):
-        nome_Ai = f"A_{i+1}"
-        mapa_original_para_Ai[var] = nome_Ai
-        mapa_Ai_para_original[nome_Ai] = var
-    
-    # converte as produções para usar os novos nomes A_i
-    for var in variaveis_ordenadas:
-        novo_nome = mapa_original_para_Ai[var]
-        regras = []
-        for r in G["producoes"][var]:
-            nova_regra = []
-            for simbolo in r:
-                if simbolo in G["variaveis"]:
-                    nova_regra.append(mapa_original_para_Ai[simbolo])
-                else:
-                    nova_regra.append(simbolo)
-            regras.append(nova_regra)
-        novas_producoes[novo_nome] = regras
+    lista_A = [inicial] + outras_variaveis
 
-    # atualiza a gramática para usar apenas A_i temporariamente
-    G["variaveis"] = set(novas_producoes.keys())
-    G["producoes"] = novas_producoes
-    G["inicial"] = mapa_original_para_Ai[G["inicial"]]
-    
-    # lista ordenada para iterar A_1, A_2, ..., A_n
-    lista_A = [f"A_{i+1}" for i in range(len(variaveis_ordenadas))]
+    # como os corpos guardam ids, renomear é só trocar o nome na tabela de símbolos
+    GC.simbolos.renomear({var: f"A_{i+1}" for i, var in enumerate(lista_A)})
 
-    print("-> Variáveis renomeadas para ordenação (A_1 ... A_n)")
+    # mantém apenas as variáveis A_i (na ordem)
+    GC.producoes = {A: GC.corpos(A) for A in lista_A}
+
+    rastrear("-> Variáveis renomeadas para ordenação (A_1 ... A_n)")
 
     # elim rec à esquerda e ordenação
     # objetivo: Transformar regras para que se Ai -> Aj..., então j > i
-    
+
+    vars_z = []
+
     # Iteramos sobre as variáveis Ai
     for i in range(len(lista_A)):
         Ai = lista_A[i]
-        
+
         # para cada j < i
         for j in range(i):
             Aj = lista_A[j]
-            
+
             # verifica se existe produção Ai -> Aj gamma
-            novas_regras_Ai = []
-            for regra in G["producoes"][Ai]:
-                if regra[0] == Aj:
+            novas_regras_Ai = {}
+            for regra in GC.producoes[Ai]:
+                if regra and regra[0] == Aj:
                     # substituião: Ai -> Aj gamma vira Ai -> (corpo de Aj) gamma
                     gamma = regra[1:]
-                    for regra_Aj in G["producoes"][Aj]:
-                        novas_regras_Ai.append(regra_Aj + gamma)
+                    for regra_Aj in GC.producoes[Aj]:
+                        novas_regras_Ai[regra_Aj + gamma] = None
                 else:
-                    novas_regras_Ai.append(regra)
-            
-            G["producoes"][Ai] = novas_regras_Ai
-        
+                    novas_regras_Ai[regra] = None
+
+            GC.producoes[Ai] = novas_regras_Ai
+
         # elimina recursão imediata (Ai -> Ai gamma)
-        eliminar_recursao_imediata(G, Ai)
+        Zi = eliminar_recursao_imediata(GC, Ai)
+        if Zi is not None:
+            vars_z.append(Zi)
+
+
+    # poda antes da substituição reversa: menos variáveis para expandir
+    podar_inuteis(GC)
+    lista_A = [A for A in lista_A if A in GC.producoes]
+    vars_z = [z for z in vars_z if z in GC.producoes]
 
+    return tem_epsilon, lista_A, vars_z
+
+
+def greibach_classico(GC):
+    rastrear("\n### FORMA NORMAL DE GREIBACH ###")
+    tem_epsilon, lista_A, vars_z = ordenar_greibach(GC)
 
     # substituição reversa ( back-substituiton)
     # agora que An começa com terminais, substituímos em An-1, etc.
     # iteramos de n-1 até 0 (de trás para frente)
-    
-    print("-> Realizando substituição reversa...")
-    
+
+    rastrear("-> Realizando substituição reversa...")
+
     for i in range(len(lista_A) - 2, -1, -1):
         Ai = lista_A[i]
-        
-        novas_regras = []
-        for regra in G["producoes"][Ai]:
-            primeiro_simbolo = regra[0]
-            
+
+        novas_regras = {}
+        for regra in GC.producoes[Ai]:
             # se o primeiro símbolo é uma variável (Aj), sabemos que j > i
             # devemos substituir para garantir que comece com terminal
-            if primeiro_simbolo in G["variaveis"]:
-                Aj = primeiro_simbolo
+            if regra and GC.eh_variavel(regra[0]):
+                Aj = regra[0]
                 gamma = regra[1:]
-                
+
                 # pega as produções de Aj (que já estão na forma correta ou quase)
-                for regra_Aj in G["producoes"][Aj]:
-                    novas_regras.append(regra_Aj + gamma)
+                for regra_Aj in GC.producoes[Aj]:
+                    novas_regras[regra_Aj + gamma] = None
             else:
                 # já começa com terminal
-                novas_regras.append(regra)
-        
-        G["producoes"][Ai] = novas_regras
+                novas_regras[regra] = None
+
+        GC.producoes[Ai] = novas_regras
+
+    # as variáveis que só apareciam no início das regras deixam de ser alcançáveis
+    podar_inuteis(GC)
+    vars_z = [z for z in vars_z if z in GC.producoes]
 
 
     # limpeza dos Z (variáveis auxiliares da recursão)
     # as variáveis Z criadas na recursão também precisam ter seus corpos
     # iniciados por terminais. Elas dependem das variáveis originais
     # como as originais já foram corrigidas, basta fazer uma passada nelas
-    
-    vars_z = [v for v in G["variaveis"] if v.startswith("Z_")]
+
+    conjunto_z = set(vars_z)
     for z in vars_z:
-        novas_regras_z = []
-        for regra in G["producoes"][z]:
-            primeiro = regra[0]
-            if primeiro in G["variaveis"] and not primeiro.startswith("Z_"):
+        novas_regras_z = {}
+        for regra in GC.producoes[z]:
+            if regra and GC.eh_variavel(regra[0]) and regra[0] not in conjunto_z:
+                 primeiro = regra[0]
                  # Substitui pela regra da variável (que agora começa com terminal)
                  gamma = regra[1:]
-                 for regra_sub in G["producoes"][primeiro]:
-                     novas_regras_z.append(regra_sub + gamma)
+                 for regra_sub in GC.producoes[primeiro]:
+                     novas_regras_z[regra_sub + gamma] = None
             else:
-                novas_regras_z.append(regra)
-        G["producoes"][z] = novas_regras_z
-    G = remover_inuteis(G)
-    imprimir_gramatica(G, "Forma Normal de Greibach Final")
-    return G
+                novas_regras_z[regra] = None
+        GC.producoes[z] = novas_regras_z
+    remover_inuteis_compacta(GC)
+
+    if tem_epsilon:
+        GC.producoes[GC.inicial] = {**GC.corpos(GC.inicial), (): None}
+    return GC
+
+
+# FNG em fluxo
+# Na substituição reversa, cada A_i recebe os corpos (já expandidos) de todo
+# A_j que aparece no início das suas regras, e a gramática resultante pode não
+# caber na memória. Aqui a gramática fica parada logo antes dessa fase
+# (ordenar_greibach) e os corpos finais de cada variável são gerados sob
+# demanda, expandindo o primeiro símbolo recursivamente. Só os corpos de uma
+# variável por vez ficam na memória (para remover repetidos), e a ordem é a
+# mesma de greibach_classico, então a saída escrita é idêntica.
+
+def greibach_em_fluxo(GC):
+    # GC em FNC; é alterada no lugar até a primeira fase
+    # devolve (variáveis da FNG final, corpos), onde corpos(A) gera os corpos
+    # finais de A e pode ser chamada de novo (ex: texto e binário)
+    rastrear("\n### FORMA NORMAL DE GREIBACH (EM FLUXO) ###")
+    tem_epsilon, lista_A, vars_z = ordenar_greibach(GC)
+    conjunto_z = set(vars_z)
+    eh_variavel = GC.eh_variavel
+
+    def expandir(A):
+        # corpos finais de A, com repetidos (A_i -> A_j ... só com j > i: termina)
+        for regra in GC.producoes[A]:
+            if regra and eh_variavel(regra[0]) and regra[0] not in conjunto_z:
+                gamma = regra[1:]
+                for regra_sub in expandir(regra[0]):
+                    yield regra_sub + gamma
+            else:
+                yield regra
+
+    def corpos(A):
+        vistos = set()
+        for regra in expandir(A):
+            if regra not in vistos:
+                vistos.add(regra)
+                yield regra
+        if A == GC.inicial and tem_epsilon and () not in vistos:
+            yield ()
+
+    # variáveis da gramática final: as que aparecem depois do primeiro símbolo
+    # de algum corpo final. Os corpos finais de A trazem o resto dos corpos de
+    # toda variável da cadeia de primeiros símbolos de A.
+    alcancaveis = {GC.inicial}
+    pendentes = [GC.inicial]
+    percorridas = set()
+    while pendentes:
+        cadeia = [pendentes.pop()]
+        while cadeia:
+            B = cadeia.pop()
+            if B in percorridas:
+                continue
+            percorridas.add(B)
+            for regra in GC.producoes.get(B, ()):
+                if regra and eh_variavel(regra[0]) and regra[0] not in conjunto_z:
+                    cadeia.append(regra[0])
+                for s in regra[1:]:
+                    if eh_variavel(s) and s not in alcancaveis:
+                        alcancaveis.add(s)
+                        pendentes.append(s)
+
+    variaveis = [A for A in GC.producoes if A in alcancaveis]
+    rastrear(lambda: f"-> FNG em fluxo: {len(variaveis)} variáveis, corpos gerados sob demanda", RESUMO)
+    return variaveis, corpos
+
+
+def escrever_greibach_fluxo(GC, destino, binario=False, titulo="Forma Normal de Greibach Final"):
+    # GC em FNC; grava a FNG (texto no formato de imprimir_gramatica, ou o
+    # formato binário de formato_binario.py) sem montá-la na memória
+    # destino: caminho, ou arquivo aberto (só texto). Devolve o nº de produções.
+    variaveis, corpos = greibach_em_fluxo(GC)
+    if binario:
+        return salvar_binario_fluxo(GC, destino, variaveis, corpos)
+    if hasattr(destino, "write"):
+        return escrever_gramatica_fluxo(destino, GC, variaveis, corpos, titulo)
+    with open(destino, "w", encoding="utf-8", buffering=1 << 20) as arquivo:
+        return escrever_gramatica_fluxo(arquivo, GC, variaveis, corpos, titulo)
+
+
+# Transformação de canto esquerdo (Rosenkrantz)
+#
+# Para variáveis A e X, a nova variável [A,X] gera as cadeias w tais que
+# A =>* X w descendo sempre pelo primeiro símbolo (X é um "canto esquerdo" de A).
+#   A     -> a β [A,B]     para cada B -> a β     ([A,A] também gera ε)
+#   [A,X] -> β [A,B]       para cada B -> X β, com o primeiro símbolo de β
+#                          (se for variável D) expandido pelas regras de D
+# mais as variantes sem [A,A], a única anulável.
+# Na FNC (B -> a | C D) isso dá A -> a [A,B] e [A,C] -> a' [D,B'] [A,B]:
+# toda regra começa com terminal e o tamanho é polinomial (O(n^2) variáveis),
+# contra a explosão exponencial do método clássico. Só são criadas as
+# variáveis alcançáveis a partir do inicial.
+
+def greibach_canto_esquerdo(GC):
+    rastrear("\n### FORMA NORMAL DE GREIBACH (CANTO ESQUERDO) ###")
+
+    inicial = GC.inicial
+    tem_epsilon = () in GC.corpos(inicial)
+
+    # índices: regras que começam com terminal e regras B -> X β por X
+    por_terminal = []      # (B, corpo)
+    por_esquerda = {}      # X -> [(B, β)]
+    for B, regras in GC.producoes.items():
+        for r in regras:
+            if not r:
+                continue
+            if not GC.eh_variavel(r[0]):
+                por_terminal.append((B, r))
+            elif len(r) > 1:
+                por_esquerda.setdefault(r[0], []).append((B, r[1:]))
+            else:
+                raise ValueError(
+                    f"Produção unitária na entrada da FNG: {GC.nome(B)} -> {GC.nome(r[0])}"
+                )
+
+    novas = {}
+    pares = {}             # (A, X) -> variável [A,X]
+    variaveis_par = set()
+    pendentes = []         # pares ainda sem regras
+    originais = []         # variáveis originais usadas no meio dos corpos
+    inicios = {}
+    contador_var = 1
+
+    def par(A, X):
+        nonlocal contador_var
+        Y = pares.get((A, X))
+        if Y is None:
+            Y = GC.nova_variavel(f"[{GC.nome(A)},{GC.nome(X)}]")
+            while Y is None:
+                Y = GC.nova_variavel(f"L_{contador_var}")
+                contador_var += 1
+            pares[(A, X)] = Y
+            variaveis_par.add(Y)
+            pendentes.append((A, X))
+        return Y
+
+    def usar(corpo):
+        # variáveis originais no meio do corpo precisam das próprias regras
+        for s in corpo[1:]:
+            if GC.eh_variavel(s) and s not in variaveis_par and s not in novas:
+                novas[s] = None
+                originais.append(s)
+        return corpo
+
+    def inicio(A):
+        # corpos (começando com terminal) de tudo que A gera
+        corpos = inicios.get(A)
+        if corpos is None:
+            corpos = []
+            for B, r in por_terminal:
+                corpos.append(usar(r + (par(A, B),)))
+                if B == A:
+                    corpos.append(usar(r))
+            inicios[A] = corpos
+        return corpos
+
+    rastrear("-> Construindo variáveis de canto esquerdo...")
+
+    novas[inicial] = dict.fromkeys(inicio(inicial))
+
+    while pendentes or originais:
+        if originais:
+            D = originais.pop()
+            novas[D] = dict.fromkeys(inicio(D))
+            continue
+
+        A, X = pendentes.pop()
+        regras = {}
+        for B, beta in por_esquerda.get(X, ()):
+            resto = beta[1:] + (par(A, B),)
+            if GC.eh_variavel(beta[0]):
+                prefixos = inicio(beta[0])
+            else:
+                prefixos = [beta[:1]]
+            for prefixo in prefixos:
+                regras[usar(prefixo + resto)] = None
+                if B == A:
+                    regras[usar(prefixo + beta[1:])] = None
+        novas[pares[(A, X)]] = regras
+
+    # as demais variáveis originais não aparecem mais em nenhum corpo
+    for A in GC.variaveis():
+        if A not in novas:
+            GC.remover_variavel(A)
+    GC.producoes = novas
+
+    # [A,X] sem nenhuma cadeia terminal (ex: X não é canto esquerdo de A)
+    podar_inuteis(GC)
+
+    if tem_epsilon:
+        GC.producoes[inicial] = {**GC.corpos(inicial), (): None}
+    return GC
 
 
 # Func auxiliar
 
-def eliminar_recursao_imediata(G, Ai):
-    regras = G["producoes"][Ai]
+def eliminar_recursao_imediata(GC, Ai):
+    regras = GC.producoes[Ai]
     recursivas = [] # Ai -> Ai alpha
     nao_recursivas = [] # Ai -> beta
-    
+
     for r in regras:
-        if r[0] == Ai:
+        if r and r[0] == Ai:
             recursivas.append(r[1:]) # guarda o alpha
         else:
             nao_recursivas.append(r) # guarda o beta
-            
+
     # se não tem recursão, retorna
     if not recursivas:
-        return
+        return None
 
     # cria nova variável Z_i
-    Zi = f"Z_{Ai}"
-    G["variaveis"].add(Zi)
-    
+    Zi = GC.simbolo(f"Z_{GC.nome(Ai)}", VARIAVEL)
+
     # vovas regras para Ai:
     # Ai -> beta | beta Z_i
-    novas_Ai = []
+    novas_Ai = {}
     for beta in nao_recursivas:
-        novas_Ai.append(beta)
-        novas_Ai.append(beta + [Zi])
-    
-    G["producoes"][Ai] = novas_Ai
-    
+        novas_Ai[beta] = None
+        novas_Ai[beta + (Zi,)] = None
+
+    GC.producoes[Ai] = novas_Ai
+
     # regras para Z_i:
     # Z_i -> alpha | alpha Z_i
-    regras_Zi = []
+    regras_Zi = {}
     for alpha in recursivas:
-        regras_Zi.append(alpha)
-        regras_Zi.append(alpha + [Zi])
-        
-    G["producoes"][Zi] = regras_Zi
+        regras_Zi[alpha] = None
+        regras_Zi[alpha + (Zi,)] = None
+
+    GC.producoes[Zi] = regras_Zi
+    return Zi
@@ -0,0 +1,477 @@
+# Renormalização incremental (simplificação + FNC)
+#
+# NormalizadorIncremental guarda o estado da última normalização e, a cada
+# edição (adicionar_producao / remover_producao), refaz só as variáveis
+# afetadas. As edições são acumuladas e aplicadas de uma vez na próxima
+# consulta (fnc() / simplificada()), então uma sequência de edições custa uma
+# atualização só.
+#
+# Estado mantido, por variável, e o que invalida cada parte:
+#   anulaveis       conjunto mantido por _PontoFixo (só quem depende da edição)
+#   expandido[A]    corpos de A sem ε (2^k variantes); refeito se as regras
+#                   de A mudam ou se muda a anulabilidade de um símbolo delas
+#   fecho[A]        fecho unitário de A (variáveis alcançáveis por A -> B)
+#   simplificado[A] corpos não unitários de fecho[A]; refeito se expandido de
+#                   alguma variável do fecho muda
+#   fnc[A]          corpos de simplificado[A] com símbolos úteis, convertidos
+#                   com o mesmo cache_producoes (T_a, X_AB) entre as edições
+#   geradores,      também por _PontoFixo, sobre os corpos simplificados; só
+#   alcancaveis     as variáveis cujo status mudou são reconvertidas
+# As variáveis auxiliares (T_, X_) têm contagem de referências: saem da FNC
+# quando nenhum corpo as usa e voltam com o mesmo nome se forem usadas de novo.
+
+import heapq
+from collections import deque
+
+from gramatica_compacta import TERMINAL, VARIAVEL, GramaticaCompacta, corpo_simbolos
+
+
+class NormalizadorIncremental:
+    def __init__(self, G):
+        origem = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+        self.G = origem.copiar()
+        self.simbolos = self.G.simbolos
+
+        # FNC resultante (compartilha a tabela de símbolos com a origem)
+        self.R = GramaticaCompacta(self.simbolos)
+        self.R.inicial = self.G.inicial
+
+        self.usos = {}            # símbolo -> variáveis cujas regras o usam
+        self.anulaveis = _PontoFixo(self._apoios_anulavel, lambda A: self.usos.get(A, ()))
+        self.expandido = {}
+        self.unitarios = {}
+        self.fecho = {}
+        self.fecho_reverso = {}   # B -> variáveis A com B em fecho[A]
+        self.simplificado = {}
+        self.usos_simplificado = {}
+        self.geradores = _PontoFixo(self._apoios_gerador, lambda A: self.usos_simplificado.get(A, ()))
+        self.filhos = {}          # A -> variáveis nos corpos úteis de A
+        self.pais = {}            # inverso de filhos
+        self.alcancaveis = _PontoFixo(self._apoios_alcancavel, lambda A: self.filhos.get(A, ()))
+
+        # dicionário para reaproveitar variáveis criadas na FNC
+        # chave: tupla do corpo da produção (ex: (A, B)), Valor: variável
+        self.cache_producoes = {}
+        self.auxiliares = {}      # variável auxiliar -> seu corpo
+        self.referencias = {}     # variável auxiliar -> nº de usos na FNC
+        self.convertidos = {}     # corpo simplificado -> corpo na FNC
+        self.contador_var = 1
+
+        for A, regras in self.G.producoes.items():
+            for r in regras:
+                for s in r:
+                    self.usos.setdefault(s, set()).add(A)
+
+        self._sujas = set(self.G.variaveis())
+        self._atualizar()
+
+    # edição
+
+    def adicionar_variavel(self, nome):
+        i = self.simbolos.ids.get(nome)
+        if i is not None and (i in self.auxiliares or self._flag(i) & TERMINAL):
+            raise ValueError(f"'{nome}' já é um terminal ou variável auxiliar da FNC")
+        A = self.G.simbolo(nome, VARIAVEL)
+        self._sujas.add(A)
+        return A
+
+    def adicionar_producao(self, cabeca, corpo):
+        # corpo: string "aAd", lista ["T_a", "X_AB"] ou "ε"
+        # símbolos ainda desconhecidos no corpo entram como terminais
+        # (use adicionar_variavel antes para declarar variáveis novas)
+        A = self._cabeca(cabeca, criar=True)
+        r = self._corpo(corpo)
+        if r in self.G.corpos(A):
+            return False
+        self.G.producoes[A] = {**self.G.corpos(A), r: None}
+        for s in r:
+            self.usos.setdefault(s, set()).add(A)
+        self._sujas.add(A)
+        return True
+
+    def remover_producao(self, cabeca, corpo):
+        A = self._cabeca(cabeca, criar=False)
+        r = self._corpo(corpo, criar=False)
+        if A is None or r is None or r not in self.G.corpos(A):
+            return False
+        regras = dict(self.G.corpos(A))
+        del regras[r]
+        self.G.producoes[A] = regras
+        for s in set(r):
+            if not any(s in outra for outra in regras):
+                self.usos[s].discard(A)
+        self._sujas.add(A)
+        return True
+
+    # consulta
+
+    def fnc(self):
+        # a FNC viva: é alterada pelas próximas edições (use .instantaneo()
+        # para guardar uma versão)
+        self._atualizar()
+        return self.R
+
+    def simplificada(self):
+        self._atualizar()
+        G = GramaticaCompacta(self.simbolos)
+        G.flags = bytearray(self.G.flags)
+        G.inicial = self.G.inicial
+        uteis = [A for A in self.alcancaveis if A in self.geradores]
+        for A in self.G.variaveis():
+            if A not in uteis:
+                G.flags[A] &= ~VARIAVEL
+        G.producoes = {A: self._corpos_uteis(A) for A in uteis}
+        return G
+
+    # Func auxiliares
+
+    def _cabeca(self, nome, criar):
+        i = self.simbolos.ids.get(nome)
+        if i is not None and self._flag(i) & VARIAVEL:
+            return i
+        if not criar:
+            return None
+        return self.adicionar_variavel(nome)
+
+    def _corpo(self, corpo, criar=True):
+        ids = []
+        for nome in corpo_simbolos(corpo):
+            i = self.simbolos.ids.get(nome)
+            if i is None or not self._flag(i):
+                if not criar:
+                    return None
+                if i is not None and i in self.auxiliares:
+                    raise ValueError(f"'{nome}' é uma variável auxiliar da FNC")
+                i = self.G.simbolo(nome, TERMINAL)
+            ids.append(i)
+        return tuple(ids)
+
+    def _flag(self, i):
+        # a tabela é compartilhada com a FNC, então pode ter ids (auxiliares)
+        # além do fim das flags da origem
+        return self.G.flags[i] if i < len(self.G.flags) else 0
+
+    def _atualizar(self):
+        if not self._sujas:
+            return
+        G = self.G
+        inicial = G.inicial
+        sujas = self._sujas
+        self._sujas = set()
+
+        # anuláveis (só as cabeças editadas e quem depende delas)
+        anulaveis_mudaram = self.anulaveis.atualizar(sujas)
+        for X in anulaveis_mudaram:
+            sujas |= self.usos.get(X, set())
+
+        # remoção de ε, só nas variáveis sujas
+        expandido_mudou = set()
+        grafo_mudou = set()
+        for A in sujas:
+            novo = self._expandir(A)
+            if novo != self.expandido.get(A):
+                self.expandido[A] = novo
+                expandido_mudou.add(A)
+            unitarios = {r[0] for r in novo if len(r) == 1 and G.eh_variavel(r[0])}
+            if unitarios != self.unitarios.get(A):
+                self.unitarios[A] = unitarios
+                grafo_mudou.add(A)
+
+        # fecho unitário: só quem alcança uma variável cujo grafo mudou
+        refazer_fecho = set()
+        for B in grafo_mudou:
+            refazer_fecho |= self.fecho_reverso.get(B, {B})
+        for A in refazer_fecho:
+            for B in self.fecho.get(A, ()):
+                self.fecho_reverso[B].discard(A)
+            self.fecho[A] = self._fecho(A)
+            for B in self.fecho[A]:
+                self.fecho_reverso.setdefault(B, set()).add(A)
+
+        # corpos simplificados (sem unitárias)
+        refazer = set(refazer_fecho)
+        for B in expandido_mudou:
+            refazer |= self.fecho_reverso.get(B, {B})
+        if inicial in anulaveis_mudaram:
+            refazer.add(inicial)
+
+        simplificado_mudou = set()
+        for A in refazer:
+            novo = {}
+            for B in self.fecho[A]:
+                for r in self.expandido.get(B, ()):
+                    if len(r) != 1 or not G.eh_variavel(r[0]):
+                        novo[r] = None
+            if A == inicial and inicial in self.anulaveis:
+                novo[()] = None
+            antigo = self.simplificado.get(A, {})
+            if novo != antigo:
+                for r in antigo:
+                    for s in r:
+                        self.usos_simplificado[s].discard(A)
+                for r in novo:
+                    for s in r:
+                        self.usos_simplificado.setdefault(s, set()).add(A)
+                self.simplificado[A] = novo
+                simplificado_mudou.add(A)
+
+        # símbolos inúteis
+        geradores_mudaram = self.geradores.atualizar(simplificado_mudou | sujas)
+        reconverter = simplificado_mudou | geradores_mudaram
+        for X in geradores_mudaram:
+            reconverter |= self.usos_simplificado.get(X, set())
+
+        # grafo de alcance pelos corpos úteis, só das cabeças que mudaram
+        corpos_uteis = {}
+        filhos_afetados = {inicial}
+        for A in reconverter:
+            corpos_uteis[A] = self._corpos_uteis(A) if A in self.geradores else {}
+            filhos = {s for r in corpos_uteis[A] for s in r if G.eh_variavel(s)}
+            antigos = self.filhos.get(A, set())
+            if filhos != antigos:
+                for C in antigos - filhos:
+                    self.pais[C].discard(A)
+                for C in filhos - antigos:
+                    self.pais.setdefault(C, set()).add(A)
+                filhos_afetados |= filhos ^ antigos
+                self.filhos[A] = filhos
+        alcancaveis_mudaram = self.alcancaveis.atualizar(filhos_afetados)
+        reconverter |= alcancaveis_mudaram
+
+        # conversão para a FNC só do que mudou
+        self._sincronizar_terminais()
+        for A in reconverter:
+            if A in self.geradores and A in self.alcancaveis:
+                self.R.simbolo(G.nome(A), VARIAVEL)
+                corpos = corpos_uteis[A] if A in corpos_uteis else self._corpos_uteis(A)
+                self._definir_fnc(A, {self._converter(r): None for r in corpos})
+            elif A in self.R.producoes:
+                self._definir_fnc(A, None)
+                self.R.flags[A] &= ~VARIAVEL
+
+    # apoios dos três conjuntos (ver _PontoFixo)
+
+    def _apoios_anulavel(self, A):
+        eh_variavel = self.G.eh_variavel
+        for r in self.G.corpos(A):
+            if all(eh_variavel(s) for s in r):
+                yield r
+
+    def _apoios_gerador(self, A):
+        flags = self.G.flags
+        eh_variavel = self.G.eh_variavel
+        for r in self.simplificado.get(A, ()):
+            # símbolo inválido (nem variável nem terminal): o corpo não gera
+            if all(flags[s] for s in r):
+                yield tuple(s for s in r if eh_variavel(s))
+
+    def _apoios_alcancavel(self, A):
+        if A == self.G.inicial:
+            if A in self.geradores:
+                yield ()
+            return
+        for B in self.pais.get(A, ()):
+            yield (B,)
+
+    def _expandir(self, A):
+        # mesmas variantes de remover_epsilon_compacta, só para A
+        anulaveis = self.anulaveis
+        novas = {}
+        for r in self.G.corpos(A):
+            if not r:
+                continue
+            posicoes = [i for i, s in enumerate(r) if s in anulaveis]
+            total = len(posicoes)
+            for i in range(1 << total):
+                nova = list(r)
+                for j in range(total):
+                    if (i >> j) & 1:
+                        nova[posicoes[j]] = None
+                resultado = tuple(s for s in nova if s is not None)
+                if resultado:
+                    novas[resultado] = None
+        return novas
+
+    def _fecho(self, A):
+        fecho = {A}
+        pilha = [A]
+        while pilha:
+            B = pilha.pop()
+            for C in self.unitarios.get(B, ()):
+                if C not in fecho:
+                    fecho.add(C)
+                    pilha.append(C)
+        return fecho
+
+    def _corpos_uteis(self, A):
+        geradores = self.geradores
+        eh_variavel = self.G.eh_variavel
+        return {r: None for r in self.simplificado.get(A, {})
+                if all(s in geradores or not eh_variavel(s) for s in r)}
+
+    def _sincronizar_terminais(self):
+        for a in self.G.terminais():
+            if a >= len(self.R.flags) or not self.R.eh_terminal(a):
+                self.R.simbolo(self.G.nome(a), TERMINAL)
+
+    def _converter(self, r):
+        # isola terminais e binariza da esquerda para a direita, como em
+        # forma_normal_chomsky_compacta, reaproveitando as auxiliares
+        convertido = self.convertidos.get(r)
+        if convertido is not None:
+            return convertido
+        if len(r) < 2:
+            convertido = r
+        else:
+            simbolos = [self._auxiliar((s,)) if self.G.eh_terminal(s) else s for s in r]
+            while len(simbolos) > 2:
+                simbolos[:2] = [self._auxiliar(tuple(simbolos[:2]))]
+            convertido = tuple(simbolos)
+        self.convertidos[r] = convertido
+        return convertido
+
+    def _auxiliar(self, corpo):
+        X = self.cache_producoes.get(corpo)
+        if X is not None:
+            return X
+        if len(corpo) == 1:
+            X = self._nova_auxiliar(f"T_{self.simbolos.nome(corpo[0])}")
+        else:
+            p1 = self.simbolos.nome(corpo[0]).replace("T_", "")
+            p2 = self.simbolos.nome(corpo[1]).replace("T_", "")
+            X = self._nova_auxiliar(f"X_{p1}{p2}")
+        # garante unicidade caso o nome já exista (colisão)
+        while X is None:
+            X = self._nova_auxiliar(f"X_{self.contador_var}")
+            self.contador_var += 1
+        self.cache_producoes[corpo] = X
+        self.auxiliares[X] = corpo
+        self.referencias[X] = 0
+        return X
+
+    def _nova_auxiliar(self, nome):
+        i = self.simbolos.ids.get(nome)
+        if i is not None and (i in self.auxiliares or self._flag(i)):
+            return None
+        return self.simbolos.internar(nome)
+
+    def _definir_fnc(self, A, corpos):
+        # troca os corpos de A na FNC (sem alterar o conjunto antigo) e
+        # atualiza a contagem de referências das auxiliares
+        antigos = self.R.producoes.get(A, {})
+        if corpos is None:
+            self.R.producoes.pop(A, None)
+        else:
+            self.R.producoes[A] = corpos
+            for r in corpos:
+                for s in r:
+                    if s in self.auxiliares:
+                        self._referenciar(s, 1)
+        for r in antigos:
+            for s in r:
+                if s in self.auxiliares:
+                    self._referenciar(s, -1)
+
+    def _referenciar(self, X, delta):
+        antes = self.referencias[X]
+        self.referencias[X] = antes + delta
+        if antes == 0 and delta > 0:
+            self.R.simbolo(self.simbolos.nome(X), VARIAVEL)
+            self._definir_fnc(X, {self.auxiliares[X]: None})
+        elif antes + delta == 0:
+            self._definir_fnc(X, None)
+            self.R.flags[X] &= ~VARIAVEL
+
+
+class _PontoFixo:
+    # menor conjunto tal que A entra se algum apoio de A (tupla de variáveis)
+    # está todo dentro do conjunto; mantido sob edições sem recalcular tudo.
+    # nivel[A] é a altura de uma justificativa bem fundada: A tem um apoio só
+    # com níveis menores. Numa edição, as variáveis que perdem a justificativa
+    # saem (em ordem de nível) e depois são rederivadas.
+    def __init__(self, apoios, dependentes):
+        self.apoios = apoios            # A -> apoios possíveis de A
+        self.dependentes = dependentes  # A -> variáveis com A em algum apoio
+        self.nivel = {}
+
+    def __contains__(self, A):
+        return A in self.nivel
+
+    def __iter__(self):
+        return iter(self.nivel)
+
+    def __len__(self):
+        return len(self.nivel)
+
+    def atualizar(self, cabecas):
+        # cabecas: variáveis cujos apoios podem ter mudado
+        # devolve as variáveis que entraram ou saíram
+        nivel = self.nivel
+
+        # 1) quem perdeu a justificativa, do menor nível para o maior
+        duvida = set()
+        fila = [(nivel[A], A) for A in cabecas if A in nivel]
+        heapq.heapify(fila)
+        while fila:
+            n, A = heapq.heappop(fila)
+            if A in duvida or self._justificada(A, duvida, n):
+                continue
+            duvida.add(A)
+            for B in self.dependentes(A):
+                if B in nivel and B not in duvida and nivel[B] > n:
+                    heapq.heappush(fila, (nivel[B], B))
+        for A in duvida:
+            del nivel[A]
+
+        # 2) rederiva (e deriva quem é novo) com contadores, como em
+        # analise._propagar: cada apoio espera pelas variáveis que faltam e,
+        # ao completar, dá nível 1 + o maior nível do apoio
+        entraram = set()
+        tocadas = set()
+        espera = {}   # X -> [(B, contador, apoio)] apoios de B que esperam X
+        fila = deque()
+
+        def entrar(B, apoio):
+            nivel[B] = 1 + max((nivel[s] for s in apoio), default=0)
+            entraram.add(B)
+            fila.append(B)
+
+        def tocar(B):
+            if B in tocadas or B in nivel:
+                return
+            tocadas.add(B)
+            for apoio in self.apoios(B):
+                faltam = [s for s in apoio if s not in nivel]
+                if not faltam:
+                    entrar(B, apoio)
+                    return
+                contador = [len(faltam)]
+                for s in faltam:
+                    espera.setdefault(s, []).append((B, contador, apoio))
+
+        for A in duvida:
+            tocar(A)
+        for A in cabecas:
+            tocar(A)
+        while fila:
+            X = fila.popleft()
+            for B, contador, apoio in espera.pop(X, ()):
+                contador[0] -= 1
+                if contador[0] == 0 and B not in nivel:
+                    entrar(B, apoio)
+            for B in self.dependentes(X):
+                tocar(B)
+
+        return (duvida - entraram) | (entraram - duvida)
+
+    def _justificada(self, A, duvida, n):
+        # A tem um apoio só com níveis menores que n (e fora de dúvida)?
+        nivel = self.nivel
+        for apoio in self.apoios(A):
+            for s in apoio:
+                m = nivel.get(s)
+                if m is None or m >= n or s in duvida:
+                    break
+            else:
+                return True
+        return False
@@ -0,0 +1,139 @@
+# Instrumentação das etapas de normalização
+#
+# As etapas (remover_epsilon_compacta, forma_normal_chomsky_compacta, ...) são
+# marcadas com @instrumentada. Fora de um bloco `instrumentar` a marcação não
+# faz nada além de uma checagem; dentro dele, cada etapa gera uma medição:
+#   tempo, variáveis/produções antes e depois, maior corpo, variáveis novas
+#   por prefixo (T_, X_, Z_, ...) e, opcionalmente, o pico do tracemalloc.
+# Etapas chamadas dentro de outra etapa (ex: a poda da FNG) contam como parte
+# da etapa externa.
+#
+# Uso:
+#   with instrumentar(destino="execucoes.jsonl", arquivo="g.txt") as registro:
+#       normalizar(G, "fng")
+# Ao sair do bloco, o registro da execução vira uma linha JSON em `destino`.
+
+import json
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+from rastreamento import RESUMO, rastrear
+
+# uma etapa "explode" se terminar com mais que FATOR_EXPLOSAO vezes as produções de entrada
+FATOR_EXPLOSAO = 10
+
+_PREFIXO = re.compile(r"^([A-Za-z]+)_")
+
+_execucao = None  # estado do bloco `instrumentar` ativo
+_profundidade = 0
+
+
+@contextmanager
+def instrumentar(memoria=False, destino=None, fator_explosao=FATOR_EXPLOSAO, ao_registrar=None, **contexto):
+    # memoria: mede o pico de alocação de cada etapa (tracemalloc, mais lento)
+    # destino: caminho ou arquivo aberto que recebe o registro como uma linha JSON
+    # ao_registrar: chamada com cada medição assim que a etapa termina
+    # contexto: campos livres copiados para o registro (ex: arquivo=...)
+    global _execucao
+    registro = {"contexto": contexto, "inicio": time.time(), "etapas": [], "alertas": []}
+    anterior = _execucao
+    _execucao = {
+        "registro": registro,
+        "memoria": memoria,
+        "fator_explosao": fator_explosao,
+        "ao_registrar": ao_registrar,
+    }
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        _execucao = anterior
+        registro["segundos"] = round(time.perf_counter() - inicio, 6)
+        if destino is not None:
+            emitir_registro(registro, destino)
+
+
+def instrumentada(nome):
+    # decorador das etapas: o primeiro argumento é a GramaticaCompacta
+    def decorador(funcao):
+        @wraps(funcao)
+        def etapa(GC, *args, **kwargs):
+            global _profundidade
+            if _execucao is None or _profundidade:
+                return funcao(GC, *args, **kwargs)
+
+            execucao = _execucao
+            antes = _estado(GC)
+            rastreando = execucao["memoria"] and not tracemalloc.is_tracing()
+            if rastreando:
+                tracemalloc.start()
+            elif execucao["memoria"]:
+                tracemalloc.reset_peak()
+
+            _profundidade += 1
+            inicio = time.perf_counter()
+            try:
+                return funcao(GC, *args, **kwargs)
+            finally:
+                segundos = time.perf_counter() - inicio
+                _profundidade -= 1
+                pico = tracemalloc.get_traced_memory()[1] if execucao["memoria"] else None
+                if rastreando:
+                    tracemalloc.stop()
+                _registrar(execucao, nome, GC, antes, segundos, pico)
+        return etapa
+    return decorador
+
+
+def emitir_registro(registro, destino):
+    linha = json.dumps(registro, ensure_ascii=False) + "\n"
+    if hasattr(destino, "write"):
+        destino.write(linha)
+    else:
+        with open(destino, "a", encoding="utf-8") as arquivo:
+            arquivo.write(linha)
+
+
+# Func auxiliares
+
+def _estado(GC):
+    variaveis = GC.variaveis()
+    return set(variaveis), GC.num_producoes()
+
+
+def _registrar(execucao, nome, GC, antes, segundos, pico):
+    variaveis_antes, producoes_antes = antes
+    variaveis_depois = GC.variaveis()
+    producoes_depois = GC.num_producoes()
+
+    # variáveis criadas pela etapa, agrupadas pelo prefixo do nome
+    novas = {}
+    for A in variaveis_depois:
+        if A not in variaveis_antes:
+            prefixo = _PREFIXO.match(GC.nome(A))
+            chave = prefixo.group(1) + "_" if prefixo else "outras"
+            novas[chave] = novas.get(chave, 0) + 1
+
+    medicao = {
+        "etapa": nome,
+        "segundos": round(segundos, 6),
+        "variaveis_antes": len(variaveis_antes),
+        "variaveis_depois": len(variaveis_depois),
+        "producoes_antes": producoes_antes,
+        "producoes_depois": producoes_depois,
+        "maior_corpo": max((len(r) for regras in GC.producoes.values() for r in regras), default=0),
+        "novas_variaveis": novas,
+        "pico_bytes": pico,
+        "explosao": producoes_depois > execucao["fator_explosao"] * max(producoes_antes, 1),
+    }
+
+    registro = execucao["registro"]
+    registro["etapas"].append(medicao)
+    if medicao["explosao"]:
+        registro["alertas"].append(nome)
+        rastrear(f"⚠ Explosão em {nome}: {producoes_antes} -> {producoes_depois} produções", RESUMO)
+    if execucao["ao_registrar"] is not None:
+        execucao["ao_registrar"](medicao)
@@ -0,0 +1,217 @@
+# Modo em lote (não interativo)
+#
+# Normaliza vários arquivos de gramática em paralelo, num pool de processos.
+# Exemplo (dentro de src/):
+#   python lote.py ../files --forma ambas --saida ../resultados --processos 4
+#
+# Para cada entrada é gerado <nome>_fnc.txt e/ou <nome>_fng.txt no diretório
+# de saída, além de resumo_lote.csv com status e tempo de cada arquivo.
+# Uma gramática com erro não interrompe o lote.
+# Com --instrumentacao, cada arquivo gera uma linha JSON com as medições de
+# cada etapa (ver instrumentacao.py). Com --cache, resultados já calculados
+# em execuções anteriores são carregados do disco (ver cache.py). Com --binario,
+# a gramática final também é gravada em <nome>_<forma>.glcb (ver formato_binario.py).
+# Com --componentes N, cada gramática ainda é normalizada por componentes
+# fortemente conexas com N processos próprios (ver paralelo.py).
+# Com --fluxo, a FNG (algoritmo clássico) é escrita variável por variável a
+# partir da FNC, sem montar a gramática inteira na memória (ver greibach_em_fluxo).
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import CacheGramaticas
+from chomsky import FATORACAO_DIREITA, FATORACAO_ESQUERDA
+from formato_binario import salvar_binario, salvar_binario_fluxo
+from greibach import ALGORITMO_CANTO_ESQUERDO, ALGORITMO_CLASSICO, greibach_em_fluxo
+from instrumentacao import emitir_registro, instrumentar
+from pipeline import FORMA_CHOMSKY, FORMA_GREIBACH, normalizar
+from rastreamento import NIVEIS, definir_nivel, escrever_gramatica_fluxo
+from simplificacao import ORDEM_BINARIZADA, ORDEM_CLASSICA, imprimir_gramatica
+from utils import ler_gramatica_compacta
+
+FORMA_AMBAS = "ambas"
+
+TITULOS = {
+    FORMA_CHOMSKY: "Forma Normal de Chomsky Final",
+    FORMA_GREIBACH: "Forma Normal de Greibach Final",
+}
+
+
+def expandir_entradas(entradas):
+    # aceita arquivos, diretórios (todos os .txt) e padrões glob
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(sorted(glob.glob(os.path.join(entrada, "*.txt"))))
+        else:
+            encontrados = sorted(glob.glob(entrada))
+            arquivos.extend(encontrados if encontrados else [entrada])
+
+    # remove repetidos mantendo a ordem
+    return list(dict.fromkeys(arquivos))
+
+
+def processar_arquivo(caminho, forma, saida, ordem, algoritmo_fng, nivel, medir=False, cache=None,
+                      binario=False, fatoracao=FATORACAO_ESQUERDA, componentes=None, fluxo=False,
+                      minimizar=False):
+    # roda dentro do processo do pool; nunca deixa a exceção escapar
+    inicio = time.perf_counter()
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    formas = [FORMA_CHOMSKY, FORMA_GREIBACH] if forma == FORMA_AMBAS else [forma]
+    alvo = formas[-1]
+    # em fluxo, o pipeline para na FNC e a FNG só existe no arquivo
+    fluxo = fluxo and alvo == FORMA_GREIBACH and algoritmo_fng == ALGORITMO_CLASSICO
+    calculo = FORMA_CHOMSKY if fluxo else alvo
+
+    resultado = {"arquivo": caminho, "forma": forma, "status": "ok", "erro": ""}
+    stdout = sys.stdout
+    try:
+        definir_nivel(nivel)
+        gramatica = ler_gramatica_compacta(caminho)
+
+        caminho_rastro = os.path.join(saida, f"{nome}_{alvo}.txt")
+        with open(caminho_rastro, "w", encoding="utf-8", buffering=1 << 20) as arquivo:
+            sys.stdout = arquivo
+            instantaneos = []
+            if medir:
+                with instrumentar(arquivo=caminho, forma=alvo, ordem=ordem, algoritmo_fng=algoritmo_fng) as registro:
+                    GC = normalizar(gramatica, calculo, ordem, instantaneos, algoritmo_fng, cache, fatoracao,
+                                    componentes, minimizar)
+                resultado["instrumentacao"] = registro
+            else:
+                GC = normalizar(gramatica, calculo, ordem, instantaneos, algoritmo_fng, cache, fatoracao,
+                                componentes, minimizar)
+            if fluxo:
+                # a FNC fica guardada para "ambas"; a FNG só existe no arquivo
+                fnc, GC = GC, GC.instantaneo()
+                variaveis, corpos = greibach_em_fluxo(GC)
+                producoes = escrever_gramatica_fluxo(arquivo, GC, variaveis, corpos, TITULOS[alvo])
+            else:
+                imprimir_gramatica(GC, TITULOS[alvo], listas=True)
+        if binario:
+            if fluxo:
+                # os corpos são gerados de novo a partir da gramática parada
+                salvar_binario_fluxo(GC, os.path.join(saida, f"{nome}_{alvo}.glcb"), variaveis, corpos)
+            else:
+                salvar_binario(GC, os.path.join(saida, f"{nome}_{alvo}.glcb"))
+
+        # FNC intermediária reaproveitada do mesmo pipeline
+        if forma == FORMA_AMBAS:
+            if not fluxo:
+                fnc = next((G for titulo, G in instantaneos if titulo == TITULOS[FORMA_CHOMSKY]), None)
+            if fnc is None:
+                # FNG veio direto do cache (a entrada não foi alterada)
+                definir_nivel("silencioso")
+                fnc = normalizar(gramatica, FORMA_CHOMSKY, ordem, cache=cache, fatoracao=fatoracao,
+                                 processos_componentes=componentes, minimizar=minimizar)
+            with open(os.path.join(saida, f"{nome}_{FORMA_CHOMSKY}.txt"), "w",
+                      encoding="utf-8", buffering=1 << 20) as arquivo:
+                sys.stdout = arquivo
+                imprimir_gramatica(fnc, TITULOS[FORMA_CHOMSKY], listas=True)
+            if binario:
+                salvar_binario(fnc, os.path.join(saida, f"{nome}_{FORMA_CHOMSKY}.glcb"))
+
+        if fluxo:
+            resultado["variaveis"] = sum(1 for A in variaveis if GC.eh_variavel(A))
+            resultado["producoes"] = producoes
+        else:
+            resultado["variaveis"] = len(GC.variaveis())
+            resultado["producoes"] = GC.num_producoes()
+    except Exception as erro:
+        resultado["status"] = "erro"
+        resultado["erro"] = f"{type(erro).__name__}: {erro}"
+    finally:
+        sys.stdout = stdout
+
+    resultado["segundos"] = round(time.perf_counter() - inicio, 4)
+    return resultado
+
+
+def executar_lote(arquivos, forma, saida, processos=None, ordem=ORDEM_CLASSICA,
+                  algoritmo_fng=ALGORITMO_CLASSICO, nivel="silencioso", instrumentacao=None, cache=None,
+                  binario=False, fatoracao=FATORACAO_ESQUERDA, componentes=None, fluxo=False,
+                  minimizar=False):
+    os.makedirs(saida, exist_ok=True)
+    resultados = []
+
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        tarefas = {
+            pool.submit(processar_arquivo, caminho, forma, saida, ordem, algoritmo_fng, nivel,
+                        instrumentacao is not None, cache, binario, fatoracao, componentes, fluxo,
+                        minimizar): caminho
+            for caminho in arquivos
+        }
+        for tarefa in as_completed(tarefas):
+            try:
+                resultado = tarefa.result()
+            except Exception as erro:
+                # o processo do pool morreu (ex: falta de memória)
+                resultado = {"arquivo": tarefas[tarefa], "forma": forma, "status": "erro",
+                             "erro": f"{type(erro).__name__}: {erro}", "segundos": ""}
+            resultados.append(resultado)
+            print(f"[{resultado['status']}] {resultado['arquivo']} ({resultado['segundos']}s) {resultado['erro']}")
+
+    resultados.sort(key=lambda r: r["arquivo"])
+    if instrumentacao is not None:
+        # escrito só pelo processo principal, uma linha por arquivo
+        with open(instrumentacao, "w", encoding="utf-8") as arquivo:
+            for resultado in resultados:
+                if "instrumentacao" in resultado:
+                    emitir_registro(resultado["instrumentacao"], arquivo)
+
+    with open(os.path.join(saida, "resumo_lote.csv"), "w", encoding="utf-8", newline="") as arquivo:
+        campos = ["arquivo", "forma", "status", "segundos", "variaveis", "producoes", "erro"]
+        escritor = csv.DictWriter(arquivo, fieldnames=campos, restval="", extrasaction="ignore")
+        escritor.writeheader()
+        escritor.writerows(resultados)
+
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalização de gramáticas em lote")
+    parser.add_argument("entradas", nargs="+", help="arquivos, diretórios ou padrões glob")
+    parser.add_argument("--forma", choices=[FORMA_CHOMSKY, FORMA_GREIBACH, FORMA_AMBAS], default=FORMA_CHOMSKY)
+    parser.add_argument("--saida", default="../resultados", help="diretório de saída")
+    parser.add_argument("--processos", type=int, default=None, help="número de processos (padrão: CPUs)")
+    parser.add_argument("--componentes", type=int, default=None,
+                        help="normaliza cada gramática por componentes fortemente conexas com N processos")
+    parser.add_argument("--ordem", choices=[ORDEM_CLASSICA, ORDEM_BINARIZADA], default=ORDEM_CLASSICA)
+    parser.add_argument("--fatoracao", choices=[FATORACAO_ESQUERDA, FATORACAO_DIREITA], default=FATORACAO_ESQUERDA,
+                        help="binarização da FNC por prefixos (esquerda) ou sufixos (direita)")
+    parser.add_argument("--minimizar", action="store_true",
+                        help="funde variáveis equivalentes na FNC e na FNG")
+    parser.add_argument("--algoritmo-fng", choices=[ALGORITMO_CLASSICO, ALGORITMO_CANTO_ESQUERDO],
+                        default=ALGORITMO_CLASSICO)
+    parser.add_argument("--nivel", choices=list(NIVEIS), default="silencioso",
+                        help="rastreamento gravado junto com cada resultado")
+    parser.add_argument("--instrumentacao", help="arquivo JSON Lines com as medições de cada etapa")
+    parser.add_argument("--binario", action="store_true", help="grava também a gramática final em .glcb")
+    parser.add_argument("--fluxo", action="store_true",
+                        help="escreve a FNG (algoritmo clássico) em fluxo, sem montá-la na memória")
+    parser.add_argument("--cache", help="diretório do cache de gramáticas normalizadas")
+    parser.add_argument("--cache-limite", type=int, default=256, help="tamanho máximo do cache em MiB")
+    args = parser.parse_args(argv)
+
+    arquivos = expandir_entradas(args.entradas)
+    if not arquivos:
+        print("Nenhum arquivo de gramática encontrado.")
+        return 1
+
+    cache = CacheGramaticas(args.cache, args.cache_limite << 20) if args.cache else None
+    resultados = executar_lote(arquivos, args.forma, args.saida, args.processos,
+                               args.ordem, args.algoritmo_fng, args.nivel, args.instrumentacao, cache,
+                               args.binario, args.fatoracao, args.componentes, args.fluxo,
+                               args.minimizar)
+    erros = sum(1 for r in resultados if r["status"] != "ok")
+    print(f"\n{len(resultados) - erros} ok, {erros} com erro. Resumo em {os.path.join(args.saida, 'resumo_lote.csv')}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
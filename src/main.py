@@ -1,24 +1,37 @@
 import sys
 from chomsky import *
 from greibach import * 
+from pipeline import *
 from simplificacao import *
 from utils import *
 import os
 
 class Logger(object):
-    def __init__(self, nome_arquivo="../test_files/gramatica6.txt"):
-        self.terminal = sys.stdout
-        self.log = open(nome_arquivo, "w", encoding="utf-8")
+    # espelha a saída na tela e num arquivo com buffer grande
+    # (o arquivo só é escrito em blocos, não a cada print)
+    def __init__(self, nome_arquivo="../test_files/gramatica6.txt", terminal=True, buffer=1 << 20):
+        self.terminal = sys.stdout if terminal else None
+        self.log = open(nome_arquivo, "w", encoding="utf-8", buffering=buffer)
 
     def write(self, message):
-        self.terminal.write(message) # imprime na tela
+        if self.terminal is not None:
+            self.terminal.write(message) # imprime na tela
         self.log.write(message)      # salva no arquivo
 
+    def writelines(self, linhas):
+        for linha in linhas:
+            self.write(linha)
+
     def flush(self):
         # necessário para compatibilidade com o sistema
-        self.terminal.flush()
+        if self.terminal is not None:
+            self.terminal.flush()
         self.log.flush()
 
+    def close(self):
+        self.log.close()
+        return self.terminal
+
 
 
 def menu():
@@ -41,6 +54,11 @@ def main():
         print("\nEncerrando...")
         return
 
+    formas = {"1": FORMA_CHOMSKY, "2": FORMA_GREIBACH}
+    if opcao not in formas:
+        print("\nOpção inválida.")
+        return
+
     arquivo_entrada = input("\nDigite o caminho do arquivo da gramática (.txt): ").strip()
     arquivo_saida = input("\nDigite o nome do arquivo de saída (ex: resultado.txt): ").strip()
 
@@ -49,27 +67,23 @@ def main():
 
     print("\nLendo gramática...\n")
 
-    gramatica = ler_gramatica(caminho_entrada)
+    # leitura em fluxo direto para a gramática compacta
+    gramatica = ler_gramatica_compacta(caminho_entrada)
 
-    sys.stdout = Logger(caminho_saida)
+    sys.stdout = logger = Logger(caminho_saida)
 
     print("\n=== ETAPA 1: SIMPLIFICAÇÃO ===")
-    gramatica = simplificar_gramatica(gramatica)
-
-    if opcao == "1":
-        print("\n=== CONVERSÃO PARA FORMA NORMAL DE CHOMSKY ===")
-        gramatica = forma_normal_chomsky(gramatica)
-
-    elif opcao == "2":
-        print("\n=== CONVERSÃO PARA FORMA NORMAL DE GREIBACH ===")
-        gramatica = forma_normal_greibach(gramatica)
-
-    else:
-        print("\nOpção inválida.")
-        return
+    # uma única gramática compacta atravessa todas as etapas (sem cópias)
+    normalizar(gramatica, formas[opcao])
 
     print("\nProcesso concluído com sucesso!")
 
+    sys.stdout = logger.close()
+
 
 if __name__ == "__main__":
+    # com argumentos, roda o modo em lote (ver lote.py); sem, o menu interativo
+    if len(sys.argv) > 1:
+        from lote import main as main_lote
+        sys.exit(main_lote(sys.argv[1:]))
     main()
\ No newline at end of file
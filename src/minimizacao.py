@@ -0,0 +1,124 @@
+# Fusão de variáveis equivalentes (após a FNC ou a FNG)
+#
+# A FNC cria T_x e X_.. e a FNG cria Z_A_i; muitas acabam com o mesmo
+# conjunto de regras a menos do nome das variáveis nos corpos. Duas variáveis
+# são fundidas se ficam no mesmo bloco do refinamento de partição:
+#   assinatura(A) = {corpo de A com cada variável trocada pelo seu bloco}
+# Começa com todas as variáveis num bloco só; um bloco é quebrado quando os
+# seus membros têm assinaturas diferentes, e só os usuários das variáveis que
+# mudaram de bloco são reavaliados. Na partição estável, cada regra de uma
+# variável tem uma regra correspondente em qualquer outra do mesmo bloco, então
+# trocar todas pelo representante não muda a linguagem.
+#
+# A forma normal é mantida: os corpos só trocam variável por variável, e o
+# inicial com S -> ε nunca se funde com quem não tem ε.
+
+from gramatica_compacta import GramaticaCompacta
+from instrumentacao import instrumentada
+from rastreamento import RESUMO, rastrear
+
+
+def minimizar_variaveis(G):
+    GC = GramaticaCompacta.de_dict(G)
+    minimizar_variaveis_compacta(GC)
+    return GC.para_dict(listas=True)
+
+
+@instrumentada("minimizar_variaveis")
+def minimizar_variaveis_compacta(GC):
+    # devolve o relatório: contagens antes/depois e {representante: [fundidas]}
+    rastrear("\n### FUSÃO DE VARIÁVEIS EQUIVALENTES ###")
+
+    variaveis = list(GC.producoes)
+    for A in GC.variaveis():
+        if A not in GC.producoes:
+            variaveis.append(A)
+    relatorio = {
+        "variaveis_antes": len(variaveis),
+        "producoes_antes": GC.num_producoes(),
+    }
+
+    bloco = refinar_particao(GC, variaveis)
+
+    # representante: o inicial, senão a primeira variável do bloco (as
+    # originais vêm antes das criadas pelas etapas)
+    representante = {}
+    if GC.inicial in bloco:
+        representante[bloco[GC.inicial]] = GC.inicial
+    for A in variaveis:
+        representante.setdefault(bloco[A], A)
+    mapa = {A: representante[bloco[A]] for A in variaveis if representante[bloco[A]] != A}
+
+    fundidas = {}
+    if mapa:
+        for A, R in mapa.items():
+            fundidas.setdefault(GC.nome(R), []).append(GC.nome(A))
+            GC.remover_variavel(A)
+        # conjuntos novos: os antigos podem estar compartilhados com instantâneos
+        producoes = {}
+        for A, regras in GC.producoes.items():
+            novas = {}
+            for r in regras:
+                if any(s in mapa for s in r):
+                    r = tuple(mapa.get(s, s) for s in r)
+                    if r == (A,):
+                        continue  # A -> A não gera nada novo
+                novas[r] = None
+            producoes[A] = novas
+        GC.producoes = producoes
+
+    relatorio["variaveis_depois"] = len(variaveis) - len(mapa)
+    relatorio["producoes_depois"] = GC.num_producoes()
+    relatorio["fundidas"] = fundidas
+
+    rastrear(lambda: "\n".join(f"-> {R} absorve {', '.join(nomes)}" for R, nomes in fundidas.items()))
+    rastrear(
+        f"-> Fusão de variáveis: {relatorio['variaveis_antes']} -> {relatorio['variaveis_depois']} variáveis, "
+        f"{relatorio['producoes_antes']} -> {relatorio['producoes_depois']} produções",
+        RESUMO,
+    )
+    return relatorio
+
+
+# Func auxiliares
+
+def refinar_particao(GC, variaveis):
+    # devolve variável -> bloco na partição estável mais grossa
+    producoes = GC.producoes
+    bloco = {A: 0 for A in variaveis}
+    membros = [list(variaveis)]
+
+    usuarios = {A: set() for A in variaveis}  # B -> variáveis com B nos corpos
+    for A in variaveis:
+        for r in producoes.get(A, ()):
+            for s in r:
+                if s in usuarios:
+                    usuarios[s].add(A)
+
+    def assinatura(A):
+        # terminais ficam com o id (>= 0), variáveis viram -1 - bloco
+        return frozenset(
+            tuple(-1 - bloco[s] if s in bloco else s for s in r)
+            for r in producoes.get(A, ())
+        )
+
+    pendentes = {0}
+    while pendentes:
+        mudaram = []
+        for b in sorted(pendentes):
+            grupos = {}
+            for A in membros[b]:
+                grupos.setdefault(assinatura(A), []).append(A)
+            if len(grupos) <= 1:
+                continue
+            # o primeiro grupo fica com o número do bloco; os outros ganham números novos
+            partes = list(grupos.values())
+            membros[b] = partes[0]
+            for parte in partes[1:]:
+                novo = len(membros)
+                membros.append(parte)
+                for A in parte:
+                    bloco[A] = novo
+                mudaram.extend(parte)
+        pendentes = {bloco[U] for A in mudaram for U in usuarios[A]}
+    return bloco
@@ -0,0 +1,404 @@
+# Normalização por componentes fortemente conexas, em paralelo
+#
+# Gramáticas grandes costumam ser várias partes pouco acopladas. Cada etapa
+# decomposta monta o grafo de dependência das variáveis que interessa a ela,
+# quebra em componentes fortemente conexas (grafos.py) e agrupa as
+# componentes em ondas pela altura no grafo de componentes: uma componente só
+# depende das que alcança, todas em ondas anteriores. As componentes de uma
+# onda são independentes e vão para um pool de processos; os resultados são
+# juntados na ordem topológica.
+#
+# Etapas decompostas:
+#   remover_unitarias    grafo das produções unitárias (A -> B)
+#   binarização da FNC   cada variável é independente (uma onda só); os pares
+#                        repetidos entre variáveis são unificados na junção
+#   FNG clássica         grafo do primeiro símbolo dos corpos: a ordenação A_i
+#                        e a substituição reversa ficam restritas a cada
+#                        componente, e as variáveis de ondas anteriores (já em
+#                        FNG) são substituídas direto
+# A remoção de ε e a de símbolos inúteis continuam globais (são lineares).
+#
+# Os processos não criam símbolos: variáveis novas voltam com ids locais
+# negativos, e só a junção dá nomes, derivados do dono (Z_<variável>) ou do
+# par (X_<par>), com _2, _3, ... em caso de colisão. Como a junção segue
+# sempre a mesma ordem, o resultado não depende do número de processos.
+#
+# Uso: normalizar(G, "fng", processos_componentes=4) (ver pipeline.py)
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from chomsky import FATORACAO_DIREITA, FATORACAO_ESQUERDA, isolar_terminais, nome_par
+from grafos import componentes_fortemente_conexas
+from greibach import podar_inuteis
+from instrumentacao import instrumentada
+from rastreamento import RESUMO, rastrear
+
+# ondas com menos produções que isso rodam no próprio processo: o custo de
+# serializar as componentes seria maior que o ganho
+LIMITE_PARALELO = 20000
+
+# lotes por processo em cada onda (balanceia componentes de tamanhos diferentes)
+LOTES_POR_PROCESSO = 4
+
+
+class PoolComponentes:
+    # pool de processos criado só quando alguma onda passa do LIMITE_PARALELO
+    def __init__(self, processos=None):
+        self.processos = processos or os.cpu_count() or 1
+        self._pool = None
+
+    def mapear(self, funcao, itens, pesos):
+        # aplica `funcao` a cada item, devolvendo os resultados na ordem dos itens
+        if self.processos < 2 or len(itens) < 2 or sum(pesos) < LIMITE_PARALELO:
+            return [funcao(item) for item in itens]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.processos)
+
+        lotes = _dividir(itens, pesos, self.processos * LOTES_POR_PROCESSO)
+        resultados = []
+        for parte in self._pool.map(_aplicar, [funcao] * len(lotes), lotes):
+            resultados.extend(parte)
+        return resultados
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def ondas_componentes(variaveis, sucessores):
+    # componentes agrupadas por altura: a onda k só depende das ondas < k
+    componentes = componentes_fortemente_conexas(variaveis, sucessores)
+
+    # Tarjan devolve em ordem topológica reversa: as sucessoras vêm antes
+    da_componente = {}
+    alturas = []
+    ondas = []
+    for k, componente in enumerate(componentes):
+        for A in componente:
+            da_componente[A] = k
+        altura = 0
+        for A in componente:
+            for B in sucessores.get(A, ()):
+                j = da_componente.get(B, k)
+                if j != k and alturas[j] >= altura:
+                    altura = alturas[j] + 1
+        alturas.append(altura)
+        if altura == len(ondas):
+            ondas.append([])
+        ondas[altura].append(componente)
+    return ondas
+
+
+# Remove produções unitárias
+# Mesmo colapso de ciclos de remover_unitarias_compacta: cada componente do
+# grafo unitário fica com um conjunto só, que puxa os conjuntos (já prontos)
+# das componentes alcançáveis, pulando as que já estão no alcance (bits).
+
+@instrumentada("remover_unitarias")
+def remover_unitarias_por_componentes(GC, pool=None):
+    rastrear("\n### REMOÇÃO DE PRODUÇÕES UNITÁRIAS (POR COMPONENTES) ###")
+    pool = pool or PoolComponentes(1)
+
+    eh_variavel = GC.eh_variavel
+    variaveis = GC.variaveis()
+    unitarios = {A: [r[0] for r in GC.corpos(A) if len(r) == 1 and eh_variavel(r[0])] for A in variaveis}
+    ondas = ondas_componentes(variaveis, unitarios)
+
+    novas = {}
+    compartilhado = {}  # variável -> conjunto da sua componente (sem ε)
+    alcance = {}        # variável -> bits das componentes alcançáveis
+    k = 0
+    for onda in ondas:
+        itens, pesos = [], []
+        for componente in onda:
+            membros = set(componente)
+            proprios = [GC.corpos(A) for A in componente]
+            alvos = set()
+            externos = []
+            bits = 1 << k
+            k += 1
+            for A in componente:
+                for B in unitarios[A]:
+                    alvos.add(B)
+                    if B not in membros and alcance[B] & ~bits:
+                        bits |= alcance[B]
+                        externos.append(compartilhado[B])
+            for A in componente:
+                alcance[A] = bits
+            itens.append((proprios, alvos, externos))
+            pesos.append(sum(map(len, proprios)) + sum(map(len, externos)))
+
+        for componente, corpos in zip(onda, pool.mapear(_unitarias_componente, itens, pesos)):
+            for A in componente:
+                compartilhado[A] = corpos
+                novas[A] = {**corpos, (): None} if () in GC.corpos(A) else corpos
+
+    GC.producoes = novas
+    rastrear(lambda: f"-> Unitárias: {sum(map(len, ondas))} componentes em {len(ondas)} ondas", RESUMO)
+    return GC
+
+
+# FNC: terminais isolados como em chomsky.py; a binarização de cada variável
+# roda com uma trie local e os pares criados são unificados na junção, na
+# ordem das variáveis (mesmo resultado da passada única de chomsky.py)
+
+@instrumentada("forma_normal_chomsky")
+def forma_normal_chomsky_por_componentes(GC, fatoracao=FATORACAO_ESQUERDA, pool=None):
+    if fatoracao not in (FATORACAO_ESQUERDA, FATORACAO_DIREITA):
+        raise ValueError(f"Fatoração inválida: {fatoracao}")
+
+    rastrear("\n### FORMA NORMAL DE CHOMSKY (POR COMPONENTES) ###")
+    pool = pool or PoolComponentes(1)
+
+    cache_producoes = {}
+    rastrear("-> Isolando terminais...")
+    isolar_terminais(GC, cache_producoes)
+
+    rastrear(f"-> Binarizando produções longas (fatoração à {fatoracao})...")
+
+    criadas = []
+
+    def variavel_par(par):
+        nova_var = cache_producoes.get(par)
+        if nova_var is None:
+            nova_var = _nova_variavel(GC, nome_par(GC, par))
+            cache_producoes[par] = nova_var
+            criadas.append(nova_var)
+            GC.producoes[nova_var] = {par: None}
+        return nova_var
+
+    esquerda = fatoracao == FATORACAO_ESQUERDA
+    longas = [A for A, regras in GC.producoes.items() if any(len(r) > 2 for r in regras)]
+    itens = [(GC.producoes[A], esquerda) for A in longas]
+    pesos = [len(GC.producoes[A]) for A in longas]
+
+    for A, (regras, pares) in zip(longas, pool.mapear(_binarizar_variavel, itens, pesos)):
+        # os pares vêm em ordem de criação: um par só usa ids locais anteriores
+        local = {}
+        for k, par in enumerate(pares):
+            local[-1 - k] = variavel_par(tuple(local.get(s, s) for s in par))
+        GC.producoes[A] = _renumerar(regras, local)
+
+    rastrear(lambda: f"-> Binarização ({fatoracao}): {len(criadas)} variáveis criadas", RESUMO)
+    return GC
+
+
+# FNG clássica por componentes do grafo do primeiro símbolo (A -> B se algum
+# corpo de A começa com B). Para cada componente, em ordem topológica reversa:
+#   1. corpos que começam com variável de outra componente (já em FNG)
+#      recebem os corpos dela
+#   2. ordenação A_i (inicial primeiro, o resto por nome) e eliminação da
+#      recursão imediata, só entre as variáveis da componente
+#   3. substituição reversa dentro da componente
+# Os Z ficam para o fim: o primeiro símbolo dos seus corpos pode ser uma
+# variável de qualquer componente, que só está pronta depois da última onda.
+
+@instrumentada("forma_normal_greibach")
+def greibach_por_componentes(GC, pool=None):
+    rastrear("\n### FORMA NORMAL DE GREIBACH (POR COMPONENTES) ###")
+    pool = pool or PoolComponentes(1)
+
+    # S -> ε fica de fora da conversão (ver greibach_classico)
+    inicial = GC.inicial
+    tem_epsilon = () in GC.corpos(inicial)
+    if tem_epsilon:
+        GC.producoes[inicial] = {r: None for r in GC.corpos(inicial) if r}
+
+    eh_variavel = GC.eh_variavel
+    primeiros = {
+        A: list(dict.fromkeys(r[0] for r in regras if r and eh_variavel(r[0])))
+        for A, regras in GC.producoes.items()
+    }
+    ondas = ondas_componentes(list(GC.producoes), primeiros)
+
+    fng = {}         # variável -> corpos já em FNG
+    auxiliares = []  # Z criados, com os corpos ainda começando por variável
+    for onda in ondas:
+        ordens, itens, pesos = [], [], []
+        for componente in onda:
+            ordem = sorted(componente, key=lambda A: (A != inicial, GC.nome(A)))
+            membros = set(componente)
+            corpos = [GC.corpos(A) for A in ordem]
+            externos = {B: fng.get(B, {}) for A in ordem for B in primeiros.get(A, ()) if B not in membros}
+            ordens.append(ordem)
+            itens.append((ordem, corpos, externos))
+            pesos.append(sum(map(len, corpos)) + sum(map(len, externos.values())))
+
+        for ordem, (corpos, zs) in zip(ordens, pool.mapear(_greibach_componente, itens, pesos)):
+            local = {}
+            for k, (dono, _) in enumerate(zs):
+                local[-1 - k] = _nova_variavel(GC, f"Z_{GC.nome(ordem[dono])}")
+            for A, regras in zip(ordem, corpos):
+                fng[A] = _renumerar(regras, local)
+            for k, (_, regras) in enumerate(zs):
+                Z = local[-1 - k]
+                auxiliares.append(Z)
+                fng[Z] = _renumerar(regras, local)
+
+    rastrear(lambda: f"-> {sum(map(len, ondas))} componentes em {len(ondas)} ondas, {len(auxiliares)} variáveis Z")
+
+    # corpos dos Z: o primeiro símbolo (variável original) já está em FNG
+    conjunto_z = set(auxiliares)
+    itens, pesos = [], []
+    for Z in auxiliares:
+        tabela = {}
+        for r in fng[Z]:
+            if r and eh_variavel(r[0]) and r[0] not in conjunto_z:
+                tabela[r[0]] = fng.get(r[0], {})
+        itens.append((fng[Z], tabela))
+        pesos.append(len(fng[Z]) + sum(map(len, tabela.values())))
+    for Z, regras in zip(auxiliares, pool.mapear(_substituir_primeiros, itens, pesos)):
+        fng[Z] = regras
+
+    GC.producoes = fng
+    # as variáveis que só apareciam no início das regras deixam de ser alcançáveis
+    podar_inuteis(GC)
+
+    if tem_epsilon:
+        GC.producoes[inicial] = {**GC.corpos(inicial), (): None}
+
+    rastrear(lambda: f"-> FNG (componentes): {GC.num_producoes()} regras", RESUMO)
+    return GC
+
+
+# Func auxiliares
+
+def _nova_variavel(GC, base):
+    # nome derivado do dono; _2, _3, ... só em caso de colisão
+    A = GC.nova_variavel(base)
+    sufixo = 2
+    while A is None:
+        A = GC.nova_variavel(f"{base}_{sufixo}")
+        sufixo += 1
+    return A
+
+
+def _renumerar(regras, local):
+    # troca os ids locais (negativos) pelos ids da gramática
+    if not local:
+        return regras
+    return {tuple(local.get(s, s) for s in r): None for r in regras}
+
+
+def _dividir(itens, pesos, quantidade):
+    # lotes contíguos de peso parecido (a ordem dos itens é mantida)
+    alvo = sum(pesos) / quantidade
+    lotes = [[]]
+    acumulado = 0
+    for item, peso in zip(itens, pesos):
+        if acumulado >= alvo and lotes[-1]:
+            lotes.append([])
+            acumulado = 0
+        lotes[-1].append(item)
+        acumulado += peso
+    return lotes
+
+
+def _aplicar(funcao, lote):
+    return [funcao(item) for item in lote]
+
+
+# o que roda nos processos: só tuplas de ids, sem a tabela de símbolos
+
+def _unitarias_componente(item):
+    proprios, alvos, externos = item
+    corpos = {}
+    # copia produções não unitárias (ε-produções não são propagadas)
+    for regras in proprios:
+        for r in regras:
+            if r and not (len(r) == 1 and r[0] in alvos):
+                corpos[r] = None
+    # puxa produções das componentes alcançáveis
+    for conjunto in externos:
+        corpos.update(conjunto)
+    return corpos
+
+
+def _binarizar_variavel(item):
+    regras, esquerda = item
+    pares = {}  # par -> id local (-1, -2, ...), em ordem de criação
+
+    def variavel_par(par):
+        local = pares.get(par)
+        if local is None:
+            local = pares[par] = -1 - len(pares)
+        return local
+
+    novas_regras = {}
+    for r in regras:
+        if len(r) <= 2:
+            novas_regras[r] = None
+        elif esquerda:
+            no = r[0]
+            for simbolo in r[1:-1]:
+                no = variavel_par((no, simbolo))
+            novas_regras[(no, r[-1])] = None
+        else:
+            no = r[-1]
+            for simbolo in reversed(r[1:-1]):
+                no = variavel_par((simbolo, no))
+            novas_regras[(r[0], no)] = None
+    return novas_regras, list(pares)
+
+
+def _substituir_primeiros(item):
+    # A -> B gamma vira A -> (corpo de B) gamma para cada B da tabela
+    regras, tabela = item
+    novas = {}
+    for r in regras:
+        if r and r[0] in tabela:
+            gamma = r[1:]
+            for corpo in tabela[r[0]]:
+                novas[corpo + gamma] = None
+        else:
+            novas[r] = None
+    return novas
+
+
+def _greibach_componente(item):
+    ordem, corpos, externos = item
+    n = len(ordem)
+
+    # variáveis de ondas anteriores já estão em FNG
+    producoes = [_substituir_primeiros((regras, externos)) for regras in corpos]
+
+    zs = []  # (posição do dono, corpos) de cada Z, id local -1, -2, ...
+    for i, Ai in enumerate(ordem):
+        # Ai -> Aj gamma, j < i: substitui pelos corpos (já ordenados) de Aj
+        for j in range(i):
+            Aj = ordem[j]
+            if any(r and r[0] == Aj for r in producoes[i]):
+                producoes[i] = _substituir_primeiros((producoes[i], {Aj: producoes[j]}))
+
+        # elimina recursão imediata (Ai -> Ai alpha)
+        recursivas = [r[1:] for r in producoes[i] if r and r[0] == Ai]
+        if not recursivas:
+            continue
+        Z = -1 - len(zs)
+        novas_Ai = {}
+        for beta in producoes[i]:
+            if not (beta and beta[0] == Ai):
+                novas_Ai[beta] = None
+                novas_Ai[beta + (Z,)] = None
+        producoes[i] = novas_Ai
+        regras_Z = {}
+        for alpha in recursivas:
+            regras_Z[alpha] = None
+            regras_Z[alpha + (Z,)] = None
+        zs.append((i, regras_Z))
+
+    # substituição reversa: An já começa com terminal, depois An-1, ...
+    prontas = {ordem[-1]: producoes[-1]}
+    for i in range(n - 2, -1, -1):
+        producoes[i] = _substituir_primeiros((producoes[i], prontas))
+        prontas[ordem[i]] = producoes[i]
+
+    return producoes, zs
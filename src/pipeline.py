@@ -0,0 +1,144 @@
+# Pipeline de normalização sem cópias
+#
+# Converte a gramática para o formato compacto uma única vez e roda todas as
+# etapas no mesmo objeto, alterando-o no lugar. Gramáticas intermediárias só
+# são guardadas se o chamador passar uma lista em `instantaneos`; cada
+# instantâneo é copy-on-write (compartilha os conjuntos de corpos com a
+# gramática viva), então o pico de memória fica perto de uma gramática só.
+#
+# Com `cache` (CacheGramaticas), cada etapa final (simplificada, FNC, FNG) é
+# procurada antes de ser calculada: o pipeline retoma da etapa mais adiantada
+# que estiver em disco e guarda as que calcular.
+#
+# Com `processos_componentes`, as etapas que pesam (unitárias, binarização da
+# FNC e FNG clássica) rodam por componentes fortemente conexas num pool de
+# processos (ver paralelo.py).
+#
+# Com `minimizar`, variáveis equivalentes são fundidas depois da FNC e da FNG
+# (ver minimizacao.py); a FNG já parte da FNC reduzida.
+
+from cache import ETAPA_CHOMSKY, ETAPA_GREIBACH, ETAPA_SIMPLIFICADA, hash_gramatica
+from chomsky import FATORACAO_DIREITA, FATORACAO_ESQUERDA, forma_normal_chomsky_compacta
+from gramatica_compacta import GramaticaCompacta
+from greibach import ALGORITMO_CLASSICO, converter_fnc_para_greibach
+from minimizacao import minimizar_variaveis_compacta
+from paralelo import (
+    PoolComponentes,
+    forma_normal_chomsky_por_componentes,
+    greibach_por_componentes,
+    remover_unitarias_por_componentes,
+)
+from rastreamento import RESUMO, rastrear, rastrear_gramatica
+from simplificacao import (
+    ORDEM_BINARIZADA,
+    ORDEM_CLASSICA,
+    binarizar_corpos_compacta,
+    remover_epsilon_compacta,
+    remover_inuteis_compacta,
+    remover_unitarias_compacta,
+)
+
+FORMA_CHOMSKY = "fnc"
+FORMA_GREIBACH = "fng"
+
+
+def normalizar(G, forma=None, ordem=ORDEM_CLASSICA, instantaneos=None, algoritmo_fng=ALGORITMO_CLASSICO,
+               cache=None, fatoracao=FATORACAO_ESQUERDA, processos_componentes=None, minimizar=False):
+    # forma: None (só simplifica), "fnc" ou "fng"
+    # algoritmo_fng: "classico" ou "canto_esquerdo" (ver greibach.py)
+    # fatoracao: binarização da FNC, "esquerda" ou "direita" (ver chomsky.py)
+    # instantaneos: lista opcional que recebe (titulo, GramaticaCompacta)
+    # processos_componentes: None (sequencial) ou nº de processos do modo por
+    # componentes; com 1, o mesmo modo roda sem pool
+    # minimizar: funde variáveis equivalentes na FNC e na FNG
+    # cache: CacheGramaticas opcional; com cache a gramática devolvida pode ser
+    # a carregada do disco, e não a de entrada alterada no lugar
+    if forma not in (None, FORMA_CHOMSKY, FORMA_GREIBACH):
+        raise ValueError(f"Forma normal inválida: {forma}")
+    if ordem not in (ORDEM_CLASSICA, ORDEM_BINARIZADA):
+        raise ValueError(f"Ordem de simplificação inválida: {ordem}")
+    if fatoracao not in (FATORACAO_ESQUERDA, FATORACAO_DIREITA):
+        raise ValueError(f"Fatoração inválida: {fatoracao}")
+
+    rastrear_gramatica(G, "Gramática Original")
+    GC = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+
+    def etapa(titulo, listas=False):
+        rastrear_gramatica(GC, titulo, listas)
+        if instantaneos is not None:
+            instantaneos.append((titulo, GC.instantaneo()))
+
+    # a FNG clássica por componentes ordena cada componente separadamente
+    # (o canto esquerdo não tem versão por componentes)
+    por_componentes = bool(processos_componentes) and algoritmo_fng == ALGORITMO_CLASSICO
+
+    # etapas guardáveis em cache, da mais adiantada para a primeira
+    chaves = {}
+    alcancada = None
+    if cache is not None:
+        h = hash_gramatica(GC)
+        chaves[ETAPA_SIMPLIFICADA] = cache.chave(h, ETAPA_SIMPLIFICADA, ordem=ordem)
+        reducao = {"minimizar": True} if minimizar else {}
+        if forma is not None:
+            chaves[ETAPA_CHOMSKY] = cache.chave(h, ETAPA_CHOMSKY, ordem=ordem, fatoracao=fatoracao, **reducao)
+        if forma == FORMA_GREIBACH:
+            opcoes = {"componentes": True, **reducao} if por_componentes else reducao
+            chaves[ETAPA_GREIBACH] = cache.chave(h, ETAPA_GREIBACH, ordem=ordem, fatoracao=fatoracao,
+                                                 algoritmo=algoritmo_fng, **opcoes)
+        for nome in reversed(list(chaves)):
+            carregada = cache.obter(chaves[nome])
+            if carregada is not None:
+                GC, alcancada = carregada, nome
+                rastrear(f"-> {nome}: carregada do cache", RESUMO)
+                break
+
+    def guardar(nome):
+        if cache is not None:
+            cache.guardar(chaves[nome], GC)
+
+    with PoolComponentes(processos_componentes) as pool:
+        if alcancada is None:
+            if ordem == ORDEM_BINARIZADA:
+                binarizar_corpos_compacta(GC)
+                etapa("Após binarização")
+
+            remover_epsilon_compacta(GC)
+            etapa("Após remoção de ε-produções")
+            if processos_componentes:
+                remover_unitarias_por_componentes(GC, pool)
+            else:
+                remover_unitarias_compacta(GC)
+            etapa("Após remoção de produções unitárias")
+            remover_inuteis_compacta(GC)
+            guardar(ETAPA_SIMPLIFICADA)
+        if alcancada in (None, ETAPA_SIMPLIFICADA):
+            etapa("Gramática Simplificada Final")
+
+        if forma is None:
+            return GC
+
+        rastrear("\n=== CONVERSÃO PARA FORMA NORMAL DE " + ("CHOMSKY ===" if forma == FORMA_CHOMSKY else "GREIBACH ==="), RESUMO)
+
+        if alcancada in (None, ETAPA_SIMPLIFICADA):
+            if processos_componentes:
+                forma_normal_chomsky_por_componentes(GC, fatoracao, pool)
+            else:
+                forma_normal_chomsky_compacta(GC, fatoracao)
+            if minimizar:
+                minimizar_variaveis_compacta(GC)
+            guardar(ETAPA_CHOMSKY)
+        if alcancada != ETAPA_GREIBACH:
+            etapa("Forma Normal de Chomsky Final", listas=True)
+
+        if forma == FORMA_GREIBACH:
+            if alcancada != ETAPA_GREIBACH:
+                if por_componentes:
+                    greibach_por_componentes(GC, pool)
+                else:
+                    converter_fnc_para_greibach(GC, algoritmo_fng)
+                if minimizar:
+                    minimizar_variaveis_compacta(GC)
+                guardar(ETAPA_GREIBACH)
+            etapa("Forma Normal de Greibach Final", listas=True)
+
+        return GC
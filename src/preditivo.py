@@ -0,0 +1,246 @@
+# Reconhecedor preditivo sobre a saída de forma_normal_greibach
+#
+# Na FNG todo corpo começa com terminal (A -> a X1 ... Xk), então o próximo
+# símbolo da entrada já escolhe as regras candidatas. A gramática é compilada
+# numa tabela por variável:
+#   tabela[A][a] -> [(X1, ..., Xk)]   restos das regras A -> a X1 ... Xk
+# PRIMEIROS(A) são as chaves de tabela[A]; SEGUINTES(A) saem do ponto fixo
+# usual. Uma célula com mais de um resto é um conflito LL(1).
+#
+# pertence() roda a análise LL(1) com pilha, em tempo linear. Se a palavra
+# cair numa célula com conflito, as alternativas são seguidas em paralelo
+# (retrocesso em largura): cada passo consome um terminal em todas as pilhas,
+# e as pilhas são nós compartilhados (topo, resto), então duas alternativas
+# que chegam à mesma pilha na mesma posição viram uma só. Em gramáticas quase
+# determinísticas o conflito se resolve em poucos símbolos e o número de
+# pilhas fica pequeno: o tempo continua linear.
+# Se as pilhas passarem de LIMITE_PILHAS (gramática muito ambígua), a palavra
+# vai para a tabela de fins, de custo polinomial garantido:
+#   fins[A][i]  bit j ligado se A =>* w[i:j]
+# preenchida da direita para a esquerda (A só depende de posições depois de
+# i, porque toda regra consome um terminal antes), e só para as variáveis com
+# w[i] em PRIMEIROS(A). Os fins de cada resto são bitsets, como no CYK.
+#
+# S -> ε vale só para a palavra vazia, como no ReconhecedorCYK: a remoção de ε
+# já gerou as variantes sem S nos corpos.
+
+from formato_binario import GramaticaBinaria
+from gramatica_compacta import EPSILON, GramaticaCompacta
+
+# marcador de fim de cadeia nos SEGUINTES
+FIM = "$"
+
+# pilhas simultâneas antes de desistir do retrocesso em largura
+LIMITE_PILHAS = 512
+
+
+class ReconhecedorPreditivo:
+    def __init__(self, G):
+        GC = G if isinstance(G, (GramaticaCompacta, GramaticaBinaria)) else GramaticaCompacta.de_dict(G)
+
+        variaveis = sorted(set(GC.producoes) | set(GC.variaveis()))
+        self.indice = {A: n for n, A in enumerate(variaveis)}
+        self.nomes = [GC.nome(A) for A in variaveis]
+        self.inicial = self.indice.get(GC.inicial, -1)
+        self.aceita_vazia = () in GC.corpos(GC.inicial)
+
+        # restos: variáveis viram índices, terminais ficam como nome (str)
+        self.tabela = [{} for _ in variaveis]
+        for A, regras in GC.producoes.items():
+            a = self.indice[A]
+            for r in regras:
+                if not r:
+                    if A != GC.inicial:
+                        raise ValueError(f"Regra fora da FNG: {GC.nome(A)} -> {EPSILON}")
+                    continue
+                if GC.eh_variavel(r[0]):
+                    corpo = " ".join(GC.nome(s) for s in r)
+                    raise ValueError(f"Regra fora da FNG: {GC.nome(A)} -> {corpo}")
+                resto = tuple(self.indice[s] if GC.eh_variavel(s) else GC.nome(s) for s in r[1:])
+                self.tabela[a].setdefault(GC.nome(r[0]), []).append(resto)
+
+        # variáveis que começam com cada terminal (para a análise com memorização)
+        self.por_terminal = {}
+        for a, celulas in enumerate(self.tabela):
+            for terminal, restos in celulas.items():
+                self.por_terminal.setdefault(terminal, []).append((a, restos))
+
+        self.primeiros = [set(celulas) for celulas in self.tabela]
+        self.seguintes = self._seguintes()
+        self.conflitos = [
+            (self.nomes[a], terminal, [self._formatar(terminal, resto) for resto in restos])
+            for a, celulas in enumerate(self.tabela)
+            for terminal, restos in celulas.items()
+            if len(restos) > 1
+        ]
+
+    @property
+    def eh_ll1(self):
+        return not self.conflitos
+
+    # Func auxiliares
+
+    def _seguintes(self):
+        # sem variáveis anuláveis: SEGUINTES(Xi) recebe PRIMEIROS(Xi+1), e o
+        # último símbolo do resto herda SEGUINTES(A)
+        seguintes = [set() for _ in self.nomes]
+        if self.inicial >= 0:
+            seguintes[self.inicial].add(FIM)
+        herdam = [set() for _ in self.nomes]  # B -> variáveis cujos SEGUINTES vão para B
+        for a, celulas in enumerate(self.tabela):
+            for restos in celulas.values():
+                for resto in restos:
+                    for k, X in enumerate(resto):
+                        if isinstance(X, str):
+                            continue
+                        if k + 1 < len(resto):
+                            proximo = resto[k + 1]
+                            seguintes[X] |= {proximo} if isinstance(proximo, str) else self.primeiros[proximo]
+                        elif X != a:
+                            herdam[a].add(X)
+
+        # propaga pela lista de trabalho até estabilizar
+        pendentes = list(range(len(self.nomes)))
+        while pendentes:
+            a = pendentes.pop()
+            for X in herdam[a]:
+                if not seguintes[a] <= seguintes[X]:
+                    seguintes[X] |= seguintes[a]
+                    pendentes.append(X)
+        return seguintes
+
+    def _formatar(self, terminal, resto):
+        return " ".join([terminal] + [X if isinstance(X, str) else self.nomes[X] for X in resto])
+
+    def _simbolos(self, palavra):
+        # string: um terminal por caractere; lista/tupla: já tokenizada
+        return list(palavra) if isinstance(palavra, str) else palavra
+
+    def _ll1(self, simbolos):
+        # True/False, ou None se a palavra passou por uma célula com conflito
+        n = len(simbolos)
+        tabela = self.tabela
+        pilha = [self.inicial]
+        i = 0
+        while pilha:
+            if i == n:
+                return False
+            X = pilha.pop()
+            s = simbolos[i]
+            if isinstance(X, str):
+                if X != s:
+                    return False
+            else:
+                restos = tabela[X].get(s)
+                if not restos:
+                    return False
+                if len(restos) > 1:
+                    return None
+                pilha.extend(reversed(restos[0]))
+            i += 1
+        return i == n
+
+    def _pilhas(self, simbolos):
+        # True/False, ou None se as pilhas passaram do limite
+        # pilha = índice de nó; nó 0 é a pilha vazia
+        tabela = self.tabela
+        topo = [None]
+        abaixo = [0]
+        nos = {}  # (símbolo, nó de baixo) -> nó
+
+        def empilhar(resto, p):
+            for X in reversed(resto):
+                chave = (X, p)
+                q = nos.get(chave)
+                if q is None:
+                    q = nos[chave] = len(topo)
+                    topo.append(X)
+                    abaixo.append(p)
+                p = q
+            return p
+
+        atuais = {empilhar((self.inicial,), 0)}
+        for s in simbolos:
+            proximas = set()
+            for p in atuais:
+                if p == 0:
+                    continue
+                X = topo[p]
+                if isinstance(X, str):
+                    if X == s:
+                        proximas.add(abaixo[p])
+                else:
+                    for resto in tabela[X].get(s, ()):
+                        proximas.add(empilhar(resto, abaixo[p]))
+            if not proximas:
+                return False
+            if len(proximas) > LIMITE_PILHAS:
+                return None
+            atuais = proximas
+        return 0 in atuais
+
+    def _fins(self, simbolos):
+        # fins[A] = {i: bitset dos j com A =>* w[i:j]}, só onde não é vazio
+        n = len(simbolos)
+        fins = [{} for _ in self.nomes]
+        posicoes = {}  # terminal -> bitset das posições onde ele aparece
+        for i, s in enumerate(simbolos):
+            posicoes[s] = posicoes.get(s, 0) | (1 << i)
+
+        for i in range(n - 1, -1, -1):
+            for a, restos in self.por_terminal.get(simbolos[i], ()):
+                total = 0
+                for resto in restos:
+                    atuais = 1 << (i + 1)
+                    for X in resto:
+                        if isinstance(X, str):
+                            atuais = (atuais & posicoes.get(X, 0)) << 1
+                        else:
+                            proximos = 0
+                            fins_X = fins[X]
+                            while atuais:
+                                baixo = atuais & -atuais
+                                proximos |= fins_X.get(baixo.bit_length() - 1, 0)
+                                atuais ^= baixo
+                            atuais = proximos
+                        if not atuais:
+                            break
+                    total |= atuais
+                if total:
+                    fins[a][i] = total
+        return fins
+
+    # API
+
+    def pertence(self, palavra):
+        simbolos = self._simbolos(palavra)
+        if not simbolos:
+            return self.aceita_vazia
+        if self.inicial < 0:
+            return False
+        resultado = self._ll1(simbolos)
+        if resultado is None:
+            resultado = self._pilhas(simbolos)
+        if resultado is not None:
+            return resultado
+        fins = self._fins(simbolos)
+        return bool((fins[self.inicial].get(0, 0) >> len(simbolos)) & 1)
+
+    def pertence_lote(self, palavras):
+        return [self.pertence(p) for p in palavras]
+
+    def relatorio(self):
+        # linhas legíveis com PRIMEIROS, SEGUINTES e conflitos
+        linhas = []
+        for a, nome in enumerate(self.nomes):
+            if not self.tabela[a] and a != self.inicial:
+                continue
+            linhas.append(f"PRIMEIROS({nome}) = {{{', '.join(sorted(self.primeiros[a]))}}}")
+            linhas.append(f"SEGUINTES({nome}) = {{{', '.join(sorted(self.seguintes[a]))}}}")
+        if self.conflitos:
+            linhas.append(f"Conflitos LL(1): {len(self.conflitos)}")
+            for nome, terminal, corpos in self.conflitos:
+                linhas.append(f"  {nome}, '{terminal}': {' | '.join(corpos)}")
+        else:
+            linhas.append("Gramática LL(1): sem conflitos")
+        return linhas
@@ -0,0 +1,142 @@
+# Rastreamento das etapas com níveis de verbosidade
+#
+# SILENCIOSO: nada é impresso
+# RESUMO:     uma linha por etapa (contagem de variáveis e produções)
+# COMPLETO:   dump completo de cada gramática e das mensagens das etapas
+#
+# Nada é formatado se o nível ativo não precisar: mensagens podem ser
+# passadas como função (só chamada quando vai imprimir) e o dump da gramática
+# é gerado linha a linha, direto da gramática compacta, sem converter para
+# dicionário.
+
+import sys
+from contextlib import contextmanager
+
+from gramatica_compacta import EPSILON, GramaticaCompacta, formatar_corpo
+
+SILENCIOSO = 0
+RESUMO = 1
+COMPLETO = 2
+
+NIVEIS = {"silencioso": SILENCIOSO, "resumo": RESUMO, "completo": COMPLETO}
+
+_nivel = COMPLETO
+
+
+def definir_nivel(nivel):
+    global _nivel
+    _nivel = NIVEIS[nivel] if isinstance(nivel, str) else nivel
+
+
+def nivel_atual():
+    return _nivel
+
+
+def ativo(nivel):
+    return _nivel >= nivel
+
+
+@contextmanager
+def nivel_rastreamento(nivel):
+    anterior = _nivel
+    definir_nivel(nivel)
+    try:
+        yield
+    finally:
+        definir_nivel(anterior)
+
+
+def rastrear(mensagem, nivel=COMPLETO):
+    if _nivel < nivel:
+        return
+    if callable(mensagem):
+        mensagem = mensagem()
+    sys.stdout.write(str(mensagem) + "\n")
+
+
+def rastrear_gramatica(G, titulo="", listas=False):
+    if _nivel >= COMPLETO:
+        sys.stdout.writelines(linhas_gramatica(G, titulo, listas))
+    elif _nivel >= RESUMO:
+        num_variaveis, num_producoes = contar(G)
+        sys.stdout.write(f"[{titulo}] variáveis: {num_variaveis}, produções: {num_producoes}\n")
+
+
+# Func auxiliares
+
+def contar(G):
+    if isinstance(G, GramaticaCompacta):
+        return len(G.variaveis()), G.num_producoes()
+    return len(G["variaveis"]), sum(len(regras) for regras in G["producoes"].values())
+
+
+def linhas_gramatica(G, titulo="", listas=False):
+    # gera o dump no mesmo formato de imprimir_gramatica, uma linha por vez
+    if isinstance(G, GramaticaCompacta):
+        nomes = G.simbolos.nomes
+        variaveis = [nomes[i] for i in G.variaveis()]
+        alfabeto = [nomes[i] for i in G.terminais()]
+        inicial = nomes[G.inicial] if G.inicial >= 0 else ""
+        cabecas = {nomes[A]: A for A in G.producoes}
+
+        def regras_de(v):
+            return (formatar_corpo(r, nomes, listas) for r in G.producoes[cabecas[v]])
+    else:
+        variaveis = G["variaveis"]
+        alfabeto = G["alfabeto"]
+        inicial = G["inicial"]
+        cabecas = G["producoes"]
+
+        def regras_de(v):
+            return G["producoes"][v]
+
+    yield from _cabecalho(titulo, variaveis, alfabeto, inicial)
+
+    for v in _ordem_variaveis(cabecas, inicial):
+        # lista ['A', 'B'] vira "A B"; string "AB" fica "AB"
+        regras_formatadas = (" ".join(r) if isinstance(r, list) else r for r in regras_de(v))
+        yield f"{v} -> {' | '.join(regras_formatadas)}\n"
+
+    yield "="*40 + "\n\n"
+
+
+def escrever_gramatica_fluxo(arquivo, GC, variaveis, corpos, titulo=""):
+    # mesmo formato de linhas_gramatica(listas=True), mas com os corpos de cada
+    # variável vindos de corpos(A) e escritos um a um (a linha nunca é montada)
+    nomes = GC.simbolos.nomes
+    inicial = nomes[GC.inicial] if GC.inicial >= 0 else ""
+    cabecas = {nomes[A]: A for A in variaveis}
+    alfabeto = [nomes[i] for i in GC.terminais()]
+    arquivo.writelines(_cabecalho(titulo, [v for v, A in cabecas.items() if GC.eh_variavel(A)], alfabeto, inicial))
+
+    total = 0
+    for v in _ordem_variaveis(cabecas, inicial):
+        arquivo.write(f"{v} -> ")
+        separador = ""
+        for r in corpos(cabecas[v]):
+            arquivo.write(separador + (" ".join(nomes[s] for s in r) if r else EPSILON))
+            separador = " | "
+            total += 1
+        arquivo.write("\n")
+    arquivo.write("="*40 + "\n\n")
+    return total
+
+
+def _cabecalho(titulo, variaveis, alfabeto, inicial):
+    yield "\n" + "="*40 + "\n"
+    yield titulo + "\n"
+    yield "="*40 + "\n"
+    # Converte sets para lista ordenada para visualização limpa
+    yield f"Variáveis: {sorted(variaveis)}\n"
+    yield f"Alfabeto: {sorted(alfabeto)}\n"
+    yield f"Inicial: {inicial}\n"
+    yield "Produções:\n"
+
+
+def _ordem_variaveis(cabecas, inicial):
+    # ordena alfabeticamente, com o símbolo inicial no topo
+    ordem_variaveis = sorted(cabecas)
+    if inicial in cabecas:
+        ordem_variaveis.remove(inicial)
+        ordem_variaveis.insert(0, inicial)
+    return ordem_variaveis
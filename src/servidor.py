@@ -0,0 +1,285 @@
+# Servidor de normalização (processo de longa duração)
+#
+# Escuta num socket Unix e mantém em memória as gramáticas já lidas e
+# normalizadas: chamadas repetidas não pagam a inicialização do interpretador,
+# a leitura do arquivo nem a normalização. Protocolo: uma linha JSON por
+# pedido e uma por resposta, quantas o cliente quiser na mesma conexão.
+#   {"op": "normalizar", "arquivo": "g.txt", "forma": "fng"}
+#       -> {"ok": true, "variaveis": 5, "producoes": 12, "gramatica": {...}}
+#   {"op": "pertence", "arquivo": "g.txt", "cadeias": ["aab", ["id", "+", "id"]]}
+#       -> {"ok": true, "pertence": [true, false]}   (CYK sobre a FNC)
+#   {"op": "estado"}    -> gramáticas em memória, acertos e faltas
+#   {"op": "encerrar"}
+# Opções de normalizar / pertence: ordem, algoritmo_fng, fatoracao, minimizar; "texto":
+# true devolve o dump de imprimir_gramatica em vez do dicionário.
+# Caminhos relativos são resolvidos a partir do diretório do servidor.
+# Erros voltam como {"ok": false, "erro": "..."} sem fechar a conexão.
+#
+# A normalização roda num pool de processos, então clientes simultâneos não
+# se bloqueiam, e pedidos iguais em andamento esperam o mesmo resultado. Uma
+# gramática em memória vale enquanto o arquivo não mudar (mtime e tamanho);
+# passando de `limite` gramáticas, as usadas há mais tempo saem primeiro.
+#
+# Uso (dentro de src/):
+#   python servidor.py --socket /tmp/glc.sock --processos 4 --cache ../cache
+#   python servidor.py --socket /tmp/glc.sock --pedido '{"op": "estado"}'
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import CacheGramaticas
+from chomsky import FATORACAO_ESQUERDA
+from cyk import ReconhecedorCYK
+from greibach import ALGORITMO_CLASSICO
+from pipeline import FORMA_CHOMSKY, FORMA_GREIBACH, normalizar
+from rastreamento import SILENCIOSO, definir_nivel, linhas_gramatica
+from simplificacao import ORDEM_CLASSICA
+from utils import ler_gramatica_compacta
+
+SOCKET_PADRAO = "/tmp/glc.sock"
+
+TITULOS = {
+    FORMA_CHOMSKY: "Forma Normal de Chomsky Final",
+    FORMA_GREIBACH: "Forma Normal de Greibach Final",
+}
+
+
+class ServidorNormalizacao:
+    def __init__(self, caminho_socket=SOCKET_PADRAO, processos=None, limite=128, cache=None):
+        self.caminho_socket = caminho_socket
+        self.processos = processos
+        self.limite = limite
+        self.cache = cache  # CacheGramaticas opcional, compartilhado com os processos
+
+        # chave -> {"gramatica": GramaticaCompacta, "cyk": ..., "respostas": {...}}
+        self._memoria = OrderedDict()
+        self._andamento = {}  # chave -> Future da normalização em curso
+        self._conexoes = {}   # tarefa de cada cliente conectado -> escritor
+        self._pool = None
+        self._parar = None
+        self.acertos = 0
+        self.faltas = 0
+
+    async def servir(self):
+        self._parar = asyncio.Event()
+        self._remover_socket_antigo()
+        self._pool = ProcessPoolExecutor(self.processos)
+        loop = asyncio.get_running_loop()
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sinal, self._parar.set)
+
+        servidor = await asyncio.start_unix_server(self._atender, path=self.caminho_socket)
+        os.chmod(self.caminho_socket, 0o600)
+        try:
+            async with servidor:
+                await self._parar.wait()
+                # fecha as conexões abertas: cada cliente termina o pedido em curso
+                for escritor in self._conexoes.values():
+                    escritor.close()
+                if self._conexoes:
+                    await asyncio.wait(list(self._conexoes))
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+            if os.path.exists(self.caminho_socket):
+                os.remove(self.caminho_socket)
+
+    # pedidos
+
+    async def normalizar(self, pedido):
+        forma = pedido.get("forma", FORMA_CHOMSKY)
+        if forma not in TITULOS:
+            raise ValueError(f"Forma normal inválida: {forma}")
+        entrada = await self._entrada(pedido, forma)
+
+        # respostas prontas: a mesma gramática costuma ser pedida várias vezes
+        texto = bool(pedido.get("texto"))
+        resposta = entrada["respostas"].get(texto)
+        if resposta is None:
+            GC = entrada["gramatica"]
+            resposta = {"ok": True, "variaveis": len(GC.variaveis()), "producoes": GC.num_producoes()}
+            if texto:
+                resposta["texto"] = "".join(linhas_gramatica(GC, TITULOS[forma], listas=True))
+            else:
+                G = GC.para_dict(listas=True)
+                G["variaveis"] = sorted(G["variaveis"])
+                G["alfabeto"] = sorted(G["alfabeto"])
+                resposta["gramatica"] = G
+            resposta = entrada["respostas"][texto] = _codificar(resposta)
+        return resposta
+
+    async def pertence(self, pedido):
+        cadeias = pedido.get("cadeias")
+        if not isinstance(cadeias, list):
+            raise ValueError("'cadeias' deve ser uma lista de cadeias")
+        entrada = await self._entrada(pedido, FORMA_CHOMSKY)
+        if entrada["cyk"] is None:
+            entrada["cyk"] = ReconhecedorCYK(entrada["gramatica"])
+        # CYK numa thread: o laço continua atendendo os outros clientes
+        loop = asyncio.get_running_loop()
+        resultado = await loop.run_in_executor(None, entrada["cyk"].pertence_lote, cadeias)
+        return _codificar({"ok": True, "pertence": resultado})
+
+    def estado(self):
+        return _codificar({
+            "ok": True,
+            "gramaticas": len(self._memoria),
+            "em_andamento": len(self._andamento),
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+        })
+
+    # Func auxiliares
+
+    async def _atender(self, leitor, escritor):
+        tarefa = asyncio.current_task()
+        self._conexoes[tarefa] = escritor
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                escritor.write(await self._responder(linha))
+                await escritor.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._conexoes[tarefa]
+            escritor.close()
+
+    async def _responder(self, linha):
+        try:
+            pedido = json.loads(linha)
+            if not isinstance(pedido, dict):
+                raise ValueError("o pedido deve ser um objeto JSON")
+            op = pedido.get("op")
+            if op == "normalizar":
+                return await self.normalizar(pedido)
+            if op == "pertence":
+                return await self.pertence(pedido)
+            if op == "estado":
+                return self.estado()
+            if op == "encerrar":
+                self._parar.set()
+                return _codificar({"ok": True})
+            raise ValueError(f"Operação desconhecida: {op}")
+        except Exception as erro:
+            return _codificar({"ok": False, "erro": f"{type(erro).__name__}: {erro}"})
+
+    async def _entrada(self, pedido, forma):
+        caminho = pedido.get("arquivo")
+        if not isinstance(caminho, str):
+            raise ValueError("'arquivo' é obrigatório")
+        caminho = os.path.abspath(caminho)
+        info = os.stat(caminho)
+        opcoes = (pedido.get("ordem", ORDEM_CLASSICA), pedido.get("algoritmo_fng", ALGORITMO_CLASSICO),
+                  pedido.get("fatoracao", FATORACAO_ESQUERDA), bool(pedido.get("minimizar", False)))
+        # a FNC não depende do algoritmo da FNG
+        if forma == FORMA_CHOMSKY:
+            opcoes = (opcoes[0], None) + opcoes[2:]
+        chave = (caminho, info.st_mtime_ns, info.st_size, forma) + opcoes
+
+        entrada = self._memoria.get(chave)
+        if entrada is not None:
+            self._memoria.move_to_end(chave)
+            self.acertos += 1
+            return entrada
+
+        # outro cliente já pediu a mesma gramática: espera o mesmo resultado
+        andamento = self._andamento.get(chave)
+        if andamento is not None:
+            self.acertos += 1
+            return await asyncio.shield(andamento)
+
+        self.faltas += 1
+        loop = asyncio.get_running_loop()
+        andamento = self._andamento[chave] = loop.create_future()
+        try:
+            GC = await loop.run_in_executor(self._pool, _normalizar_arquivo, caminho, forma, *opcoes, self.cache)
+        except Exception as erro:
+            andamento.set_exception(erro)
+            andamento.exception()  # ninguém mais esperando não gera aviso
+            raise
+        finally:
+            del self._andamento[chave]
+
+        entrada = {"gramatica": GC, "cyk": None, "respostas": {}}
+        self._memoria[chave] = entrada
+        while len(self._memoria) > self.limite:
+            self._memoria.popitem(last=False)
+        andamento.set_result(entrada)
+        return entrada
+
+    def _remover_socket_antigo(self):
+        # socket de uma execução anterior que não encerrou direito
+        try:
+            modo = os.stat(self.caminho_socket).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(modo):
+            raise FileExistsError(f"{self.caminho_socket} existe e não é um socket")
+        try:
+            consultar({"op": "estado"}, self.caminho_socket)
+        except OSError:
+            os.remove(self.caminho_socket)
+        else:
+            raise RuntimeError(f"Já existe um servidor ouvindo em {self.caminho_socket}")
+
+
+def consultar(pedido, caminho_socket=SOCKET_PADRAO):
+    # cliente síncrono: um pedido, uma resposta
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexao:
+        conexao.connect(caminho_socket)
+        conexao.sendall(_codificar(pedido))
+        with conexao.makefile("rb") as leitor:
+            linha = leitor.readline()
+    if not linha:
+        raise ConnectionError("o servidor fechou a conexão sem responder")
+    return json.loads(linha)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de normalização num socket Unix")
+    parser.add_argument("--socket", default=SOCKET_PADRAO, help="caminho do socket Unix")
+    parser.add_argument("--processos", type=int, default=None, help="processos de normalização (padrão: CPUs)")
+    parser.add_argument("--limite", type=int, default=128, help="gramáticas mantidas em memória")
+    parser.add_argument("--cache", help="diretório do cache em disco (ver cache.py)")
+    parser.add_argument("--cache-limite", type=int, default=256, help="tamanho máximo do cache em MiB")
+    parser.add_argument("--pedido", help="em vez de servir, envia este pedido JSON e imprime a resposta")
+    args = parser.parse_args(argv)
+
+    if args.pedido:
+        resposta = consultar(json.loads(args.pedido), args.socket)
+        print(json.dumps(resposta, ensure_ascii=False, indent=2))
+        return 0 if resposta.get("ok") else 1
+
+    cache = CacheGramaticas(args.cache, args.cache_limite << 20) if args.cache else None
+    servidor = ServidorNormalizacao(args.socket, args.processos, args.limite, cache)
+    print(f"Servindo em {args.socket}")
+    asyncio.run(servidor.servir())
+    return 0
+
+
+# Func auxiliares
+
+def _codificar(resposta):
+    return (json.dumps(resposta, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _normalizar_arquivo(caminho, forma, ordem, algoritmo_fng, fatoracao, minimizar, cache):
+    # roda no processo do pool
+    definir_nivel(SILENCIOSO)
+    gramatica = ler_gramatica_compacta(caminho)
+    return normalizar(gramatica, forma, ordem, None, algoritmo_fng or ALGORITMO_CLASSICO, cache, fatoracao,
+                      minimizar=minimizar)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
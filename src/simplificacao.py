@@ -1,79 +1,100 @@
-from copy import deepcopy
-
-
-# impressão da gramática
-
-def imprimir_gramatica(G, titulo=""):
-    print("\n" + "="*40)
-    print(titulo)
-    print("="*40)
-    # Converte sets para lista ordenada para visualização limpa
-    print("Variáveis:", sorted(list(G["variaveis"])))
-    print("Alfabeto:", sorted(list(G["alfabeto"])))
-    print("Inicial:", G["inicial"])
-    print("Produções:")
-
-    
-    # ordena alfabeticamente
-    ordem_variaveis = sorted(list(G["producoes"].keys()))
-
-    # se o símbolo inicial estiver na lista, move para o topo
-    inicial = G["inicial"]
-    if inicial in ordem_variaveis:
-        ordem_variaveis.remove(inicial) # Tira de onde estava (ex: posição 3)
-        ordem_variaveis.insert(0, inicial) # Coloca na posição 0
-
-    # itera sobre lista ordenada personalizada
-    for v in ordem_variaveis:
-        regras_formatadas = []
-        
-        for r in G["producoes"][v]:
-            # verifica tipo:
-            if isinstance(r, list):
-                # Se for lista ['A', 'B'], junta com espaço -> "A B"
-                regras_formatadas.append(" ".join(r))
+import sys
+
+from analise import calcular_alcancaveis, calcular_anulaveis, calcular_geradores
+from gramatica_compacta import GramaticaCompacta
+from grafos import componentes_fortemente_conexas
+from instrumentacao import instrumentada
+from rastreamento import (
+    RESUMO,
+    SILENCIOSO,
+    linhas_gramatica,
+    nivel_rastreamento,
+    rastrear,
+    rastrear_gramatica,
+)
+
+
+# impressão da gramática (dump completo, sem depender do nível de rastreamento)
+
+def imprimir_gramatica(G, titulo="", listas=False):
+    sys.stdout.writelines(linhas_gramatica(G, titulo, listas))
+
+
+
+# Binariza corpos longos (antes da remoção de ε)
+# A -> X1 X2 ... Xk vira A -> X1 Y_1, Y_1 -> X2 Y_2, ..., Y_k-2 -> Xk-1 Xk
+# Com corpos de tamanho <= 2, a remoção de ε gera no máximo 3 variantes por
+# regra, então a gramática cresce linearmente em vez de 2^k.
+
+def binarizar_corpos(G):
+    GC = GramaticaCompacta.de_dict(G)
+    binarizar_corpos_compacta(GC)
+    return GC.para_dict()
+
+
+@instrumentada("binarizar_corpos")
+def binarizar_corpos_compacta(GC):
+    rastrear("\n### BINARIZAÇÃO DE CORPOS LONGOS ###")
+
+    # sufixos iguais reaproveitam a mesma variável
+    # chave: tupla do sufixo, Valor: variável
+    cache_sufixos = {}
+    contador_var = 1
+
+    def variavel_sufixo(sufixo):
+        nonlocal contador_var
+        Y = cache_sufixos.get(sufixo)
+        if Y is None:
+            Y = None
+            while Y is None:
+                Y = GC.nova_variavel(f"Y_{contador_var}")
+                contador_var += 1
+            cache_sufixos[sufixo] = Y
+            if len(sufixo) > 2:
+                GC.producoes[Y] = {(sufixo[0], variavel_sufixo(sufixo[1:])): None}
             else:
-                # Se for string "AB", mantém "AB"
-                regras_formatadas.append(r)
-        
-        # Junta todas as regras com " | "
-        linha = " | ".join(regras_formatadas)
-        print(f"{v} -> {linha}")
-        
-    print("="*40 + "\n")
+                GC.producoes[Y] = {sufixo: None}
+        return Y
+
+    for var in list(GC.producoes.keys()):
+        novas_regras = {}
+        for r in GC.producoes[var]:
+            if len(r) <= 2:
+                novas_regras[r] = None
+            else:
+                novas_regras[(r[0], variavel_sufixo(r[1:]))] = None
+        GC.producoes[var] = novas_regras
+
+    rastrear(lambda: f"Variáveis criadas: {len(cache_sufixos)}")
+    return GC
 
 
 
 # Remove epsilon-produções
 
 def remover_epsilon(G):
-    G = deepcopy(G)
-    
-    print("\n### REMOÇÃO DE ε-PRODUÇÕES ###")
+    GC = GramaticaCompacta.de_dict(G)
+    remover_epsilon_compacta(GC)
+    return GC.para_dict()
+
 
-    anulaveis = set()
+@instrumentada("remover_epsilon")
+def remover_epsilon_compacta(GC):
+    rastrear("\n### REMOÇÃO DE ε-PRODUÇÕES ###")
 
     # Encontrar variáveis anuláveis
-    mudou = True
-    while mudou:
-        mudou = False
-        for var, regras in G["producoes"].items():
-            for r in regras:
-                if r == "ε" or all(simbolo in anulaveis for simbolo in r):
-                    if var not in anulaveis:
-                        anulaveis.add(var)
-                        mudou = True
-
-    print("Variáveis anuláveis:", anulaveis)
+    anulaveis = calcular_anulaveis(GC)
+
+    rastrear(lambda: "Variáveis anuláveis: " + str({GC.nome(v) for v in anulaveis}))
 
     # Gerar novas produções
     novas_producoes = {}
 
-    for var, regras in G["producoes"].items():
-        novas = set()
+    for var, regras in GC.producoes.items():
+        novas = {}
 
         for r in regras:
-            if r == "ε":
+            if not r:
                 continue
 
             posicoes = [i for i, s in enumerate(r) if s in anulaveis]
@@ -84,162 +105,217 @@ def remover_epsilon(G):
                 nova = list(r)
                 for j in range(total):
                     if (i >> j) & 1:
-                        nova[posicoes[j]] = ""
-                resultado = "".join(nova)
-                if resultado != "":
-                    novas.add(resultado)
+                        nova[posicoes[j]] = None
+                resultado = tuple(s for s in nova if s is not None)
+                if resultado:
+                    novas[resultado] = None
 
-        novas_producoes[var] = list(novas)
+        novas_producoes[var] = novas
 
     # Caso variável inicial seja anulável
-    if G["inicial"] in anulaveis:
-        novas_producoes[G["inicial"]].append("ε")
+    if GC.inicial in anulaveis:
+        novas_producoes.setdefault(GC.inicial, {})[()] = None
 
-    G["producoes"] = novas_producoes
+    GC.producoes = novas_producoes
 
-    return G
+    return GC
 
 
 
 # Remove produções unitárias
 
 def remover_unitarias(G):
-    G = deepcopy(G)
-
-    print("\n### REMOÇÃO DE PRODUÇÕES UNITÁRIAS ###")
+    GC = GramaticaCompacta.de_dict(G)
+    remover_unitarias_compacta(GC)
+    return GC.para_dict()
 
-    unitarios = {}
 
-    # Monta grafo de unitários
-    for A in G["variaveis"]:
-        unitarios[A] = set()
+@instrumentada("remover_unitarias")
+def remover_unitarias_compacta(GC):
+    rastrear("\n### REMOÇÃO DE PRODUÇÕES UNITÁRIAS ###")
 
-    for A, regras in G["producoes"].items():
-        for r in regras:
-            if len(r) == 1 and r in G["variaveis"]:
-                unitarios[A].add(r)
-
-    # Fechamento transitivo
-    mudou = True
-    while mudou:
-        mudou = False
-        for A in unitarios:
-            for B in list(unitarios[A]):
-                for C in unitarios[B]:
-                    if C not in unitarios[A]:
-                        unitarios[A].add(C)
-                        mudou = True
+    variaveis = GC.variaveis()
+    eh_variavel = GC.eh_variavel
 
-    novas = {}
+    def unitaria(r):
+        return len(r) == 1 and eh_variavel(r[0])
 
-    # Copia produções não unitárias
-    for A in G["variaveis"]:
-        novas[A] = []
+    unitarios = {}
 
-        for r in G["producoes"].get(A, []):
-            if not (len(r) == 1 and r in G["variaveis"]):
-                novas[A].append(r)
+    # Monta grafo de unitários
+    for A in variaveis:
+        unitarios[A] = {r[0] for r in GC.corpos(A) if unitaria(r)}
+
+    # Colapsa ciclos unitários: variáveis na mesma componente fortemente
+    # conexa derivam umas às outras, então têm exatamente os mesmos corpos.
+    # As componentes saem em ordem topológica reversa, então as sucessoras
+    # já estão prontas quando a componente é processada.
+    componentes = componentes_fortemente_conexas(variaveis, unitarios)
+
+    # Fecho do grafo unitário em linhas de bits: alcance[k] tem um bit por
+    # componente alcançável a partir da componente k (inteiro do Python, o OU
+    # roda em C). Uma sucessora cujo alcance já está todo coberto não é
+    # copiada de novo: num grafo unitário denso, a maioria das arestas chega
+    # por outro caminho a corpos que já foram puxados.
+    posicao = {}
+    alcance = []
+    compartilhado = []  # componente -> conjunto de corpos (sem ε)
+    novas = {}
 
-        # Puxa produções dos alcançáveis
-        for B in unitarios[A]:
-            for r in G["producoes"].get(B, []):
-                if not (len(r) == 1 and r in G["variaveis"]):
-                    if r not in novas[A]:
-                        novas[A].append(r)
+    for k, componente in enumerate(componentes):
+        for A in componente:
+            posicao[A] = k
+        corpos = {}
+
+        # Copia produções não unitárias
+        # (ε-produções não são propagadas: cada variável fica só com a sua)
+        for A in componente:
+            for r in GC.corpos(A):
+                if r and not unitaria(r):
+                    corpos[r] = None
+
+        # Puxa produções das componentes alcançáveis
+        bits = 1 << k
+        for A in componente:
+            for B in unitarios[A]:
+                j = posicao[B]
+                if j != k and alcance[j] & ~bits:
+                    bits |= alcance[j]
+                    corpos.update(compartilhado[j])
+        alcance.append(bits)
+        compartilhado.append(corpos)
+
+        # um único conjunto compartilhado por toda a componente
+        for A in componente:
+            if () in GC.corpos(A):
+                novas[A] = dict(corpos)
+                novas[A][()] = None
+            else:
+                novas[A] = corpos
 
-    G["producoes"] = novas
+    GC.producoes = novas
 
-    return G
+    return GC
 
 
 # Remove simbolos inúteis
 
 def remover_inuteis(G):
-    G = deepcopy(G)
+    GC = GramaticaCompacta.de_dict(G)
+    remover_inuteis_compacta(GC)
+    return GC.para_dict()
 
-    print("\n### REMOÇÃO DE SÍMBOLOS INÚTEIS ###")
 
-    variaveis = G["variaveis"]
-    terminais = G["alfabeto"]
+@instrumentada("remover_inuteis")
+def remover_inuteis_compacta(GC):
+    rastrear("\n### REMOÇÃO DE SÍMBOLOS INÚTEIS ###")
 
     # Encontra variáveis geradores
-    geradores = set()
-    mudou = True
-
-    while mudou:
-        mudou = False
-        for A, regras in G["producoes"].items():
-            for r in regras:
-                valida = True
-                for s in r:
-                    # símbolo inválido
-                    if s not in variaveis and s not in terminais:
-                        valida = False
-                        break
-
-                    # variável que ainda não gera
-                    if s in variaveis and s not in geradores:
-                        valida = False
-                        break
-
-                if valida:
-                    if A not in geradores:
-                        geradores.add(A)
-                        mudou = True
-
-    print("Variáveis geradoras:", geradores)
+    geradores = calcular_geradores(GC)
+
+    rastrear(lambda: "Variáveis geradoras: " + str({GC.nome(v) for v in geradores}))
 
     # Proteção contra destruição total
     if not geradores:
-        print("⚠ Nenhuma variável geradora encontrada Abortando remoção para evitar perda da gramática.")
-        return G
-
-    # Remove não geradores
-    G["variaveis"] = G["variaveis"] & geradores
-    G["producoes"] = {A: G["producoes"][A] for A in G["variaveis"]}
+        rastrear("⚠ Nenhuma variável geradora encontrada Abortando remoção para evitar perda da gramática.", RESUMO)
+        return GC
+
+    # Remove não geradores (e as produções que dependem deles)
+    flags = GC.flags
+    for A in GC.variaveis():
+        if A not in geradores:
+            GC.remover_variavel(A)
+    GC.producoes = {
+        A: {r: None for r in GC.corpos(A) if all(flags[s] for s in r)}
+        for A in GC.variaveis()
+    }
 
     # Encontra variáveis alcançáveis
-    alcan = set()
-    fila = [G["inicial"]]
+    alcan = calcular_alcancaveis(GC)
 
-    while fila:
-        A = fila.pop(0)
-        if A not in alcan:
-            alcan.add(A)
-
-            for r in G["producoes"].get(A, []):
-                for s in r:
-                    if s in G["variaveis"] and s not in alcan:
-                        fila.append(s)
-
-    print("Variáveis alcançáveis:", alcan)
+    rastrear(lambda: "Variáveis alcançáveis: " + str({GC.nome(v) for v in alcan}))
 
     # Protege símbolo inicial
-    if G["inicial"] not in alcan:
-        print("⚠ Símbolo inicial não alcançável. Abortando remoção.")
-        return G
+    if GC.inicial not in alcan:
+        rastrear("⚠ Símbolo inicial não alcançável. Abortando remoção.", RESUMO)
+        return GC
 
    
     # remove não alcançáveis
     
-    G["variaveis"] = G["variaveis"] & alcan
-    G["producoes"] = {A: G["producoes"][A] for A in G["variaveis"]}
+    for A in GC.variaveis():
+        if A not in alcan:
+            GC.remover_variavel(A)
+    GC.producoes = {A: GC.corpos(A) for A in GC.variaveis()}
 
-    return G
+    return GC
 
 
 
 # Função simplificação principal
+# ordem "classica": ε -> unitárias -> inúteis
+# ordem "binarizada": binarização -> ε -> unitárias -> inúteis (sem explosão 2^k)
+
+ORDEM_CLASSICA = "classica"
+ORDEM_BINARIZADA = "binarizada"
 
-def simplificar_gramatica(G):
-    imprimir_gramatica(G, "Gramática Original")
+def simplificar_gramatica(G, ordem=ORDEM_CLASSICA):
+    rastrear_gramatica(G, "Gramática Original")
 
-    G = remover_epsilon(G)
-    imprimir_gramatica(G, "Após remoção de ε-produções")
-    G = remover_unitarias(G)
-    imprimir_gramatica(G, "Após remoção de produções unitárias")
-    G = remover_inuteis(G)
-    imprimir_gramatica(G, "Após remoção de símbolos inúteis")
+    GC = GramaticaCompacta.de_dict(G)
 
-    imprimir_gramatica(G, "Gramática Simplificada Final")
-    return G
+    if ordem == ORDEM_BINARIZADA:
+        binarizar_corpos_compacta(GC)
+        rastrear_gramatica(GC, "Após binarização")
+    elif ordem != ORDEM_CLASSICA:
+        raise ValueError(f"Ordem de simplificação inválida: {ordem}")
+
+    remover_epsilon_compacta(GC)
+    rastrear_gramatica(GC, "Após remoção de ε-produções")
+    remover_unitarias_compacta(GC)
+    rastrear_gramatica(GC, "Após remoção de produções unitárias")
+    remover_inuteis_compacta(GC)
+    rastrear_gramatica(GC, "Após remoção de símbolos inúteis")
+
+    rastrear_gramatica(GC, "Gramática Simplificada Final")
+    return GC.para_dict()
+
+
+# Quantas produções cada ordem produziria
+# A ordem binarizada é linear, então é executada de fato. Na clássica, a
+# remoção de ε é estimada sem materializar (soma de 2^k por regra, antes da
+# deduplicação); só roda a simplificação completa se a estimativa couber no limite.
+
+def estimar_remocao_epsilon(GC):
+    anulaveis = calcular_anulaveis(GC)
+    total = 0
+    for regras in GC.producoes.values():
+        for r in regras:
+            if not r:
+                continue
+            k = sum(1 for s in r if s in anulaveis)
+            total += (1 << k) - (1 if k == len(r) else 0)
+    if GC.inicial in anulaveis:
+        total += 1
+    return total
+
+
+def contar_producoes_por_ordem(G, limite=100000):
+    GC = G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+
+    relatorio = {}
+    with nivel_rastreamento(SILENCIOSO):
+        for ordem in (ORDEM_CLASSICA, ORDEM_BINARIZADA):
+            copia = GC.instantaneo()
+            if ordem == ORDEM_CLASSICA:
+                estimativa = estimar_remocao_epsilon(copia)
+                if estimativa > limite:
+                    relatorio[ordem] = {"producoes": estimativa, "exato": False}
+                    continue
+            else:
+                binarizar_corpos_compacta(copia)
+            remover_epsilon_compacta(copia)
+            remover_unitarias_compacta(copia)
+            remover_inuteis_compacta(copia)
+            relatorio[ordem] = {"producoes": copia.num_producoes(), "exato": True}
+    return relatorio
@@ -1,47 +1,104 @@
 import re
 
-def ler_gramatica(caminho_arquivo):
-    with open(caminho_arquivo, "r", encoding="utf-8") as file:
-        linhas = [linha.strip() for linha in file if linha.strip()]
-
-    gramatica = {
-        "variaveis": set(),
-        "alfabeto": set(),
-        "inicial": "",
-        "producoes": {}
-    }
-
-    lendo_regras = False
-
-    for linha in linhas:
-        # Variáveis
-        if linha.startswith("Variaveis"):
-            conteudo = extrair_conteudo_chaves(linha)
-            gramatica["variaveis"] = set(conteudo)
-
-        # Alfabeto
-        elif linha.startswith("Alfabeto"):
-            conteudo = extrair_conteudo_chaves(linha)
-            gramatica["alfabeto"] = set(conteudo)
+from gramatica_compacta import EPSILON, TERMINAL, VARIAVEL, GramaticaCompacta
 
-        # Inicial
-        elif linha.startswith("Inicial"):
-            gramatica["inicial"] = linha.split("=")[1].strip()
 
-        # Início das regras
-        elif linha.startswith("Regras"):
-            lendo_regras = True
+class ErroGramatica(ValueError):
+    # erros de leitura: lista de (número da linha, mensagem)
+    def __init__(self, caminho, erros):
+        self.caminho = caminho
+        self.erros = erros
+        detalhes = "\n".join(f"  linha {n}: {msg}" for n, msg in erros)
+        super().__init__(f"Gramática inválida em {caminho}:\n{detalhes}")
 
-        # Produções
-        elif lendo_regras:
-            variavel, producao = parse_producao(linha)
 
-            if variavel not in gramatica["producoes"]:
-                gramatica["producoes"][variavel] = []
-
-            gramatica["producoes"][variavel].append(producao)
+def ler_gramatica(caminho_arquivo):
+    return ler_gramatica_compacta(caminho_arquivo).para_dict()
+
+
+# Leitor em fluxo
+# Lê o arquivo linha a linha direto para a gramática compacta (a memória
+# usada é a da própria gramática, não a do texto). Formato das regras:
+#   A -> aAd            um símbolo por caractere (formato antigo), ou o maior
+#                       símbolo declarado que casar, ex: X_ab
+#   A -> id + E | ( E ) símbolos separados por espaço (vários caracteres)
+#   A -> &              ε (também aceita "ε")
+# Sem linha "Variaveis", as variáveis são as cabeças das regras; sem
+# "Alfabeto", os terminais são os demais símbolos dos corpos.
+
+def ler_gramatica_compacta(caminho_arquivo, max_erros=20):
+    GC = GramaticaCompacta()
+    declarou_variaveis = declarou_alfabeto = False
+    nome_inicial = None
+    erros = []
+    cabecas = {}
+    tamanho_maximo = 1  # maior símbolo declarado (para o casamento guloso)
 
-    return gramatica
+    with open(caminho_arquivo, "r", encoding="utf-8") as file:
+        for numero, linha in enumerate(file, 1):
+            linha = linha.strip()
+            if not linha:
+                continue
+
+            if "->" in linha:
+                try:
+                    variavel, alternativas = parse_producao(linha, GC.simbolos.ids, tamanho_maximo)
+                except ValueError as erro:
+                    erros.append((numero, str(erro)))
+                else:
+                    A = GC.simbolo(variavel)
+                    cabecas[A] = None
+                    regras = GC.producoes.setdefault(A, {})
+                    for corpo in alternativas:
+                        regras[tuple(GC.simbolo(s) for s in corpo)] = None
+
+            # Variáveis
+            elif linha.startswith("Variaveis"):
+                declarou_variaveis = True
+                for v in extrair_conteudo_chaves(linha):
+                    GC.simbolo(v, VARIAVEL)
+                    tamanho_maximo = max(tamanho_maximo, len(v))
+
+            # Alfabeto
+            elif linha.startswith("Alfabeto"):
+                declarou_alfabeto = True
+                for a in extrair_conteudo_chaves(linha):
+                    GC.simbolo(a, TERMINAL)
+                    tamanho_maximo = max(tamanho_maximo, len(a))
+
+            # Inicial
+            elif linha.startswith("Inicial"):
+                if "=" not in linha:
+                    erros.append((numero, "esperado 'Inicial = <variável>'"))
+                else:
+                    nome_inicial = linha.split("=", 1)[1].strip()
+
+            # Início das regras
+            elif linha.startswith("Regras"):
+                continue
+
+            else:
+                erros.append((numero, f"linha não reconhecida: {linha!r}"))
+
+            if len(erros) >= max_erros:
+                break
+
+    if erros:
+        raise ErroGramatica(caminho_arquivo, erros)
+
+    if not declarou_variaveis:
+        for A in cabecas:
+            GC.flags[A] |= VARIAVEL
+    if not declarou_alfabeto:
+        flags = GC.flags
+        for i in range(len(flags)):
+            if not flags[i] & VARIAVEL:
+                flags[i] |= TERMINAL
+
+    if nome_inicial is None:
+        nome_inicial = GC.nome(next(iter(cabecas))) if cabecas else ""
+    GC.inicial = GC.simbolo(nome_inicial)
+    return GC
 
 
 def extrair_conteudo_chaves(linha):
@@ -53,13 +110,43 @@ def extrair_conteudo_chaves(linha):
     return [item.strip() for item in conteudo.split(",")]
 
 
-def parse_producao(linha):
-    esquerda, direita = linha.split("->")
+def parse_producao(linha, simbolos=(), tamanho_maximo=1):
+    # devolve a variável e a lista de corpos (tuplas de nomes; () é ε)
+    esquerda, _, direita = linha.partition("->")
     esquerda = esquerda.strip()
-    direita = direita.strip()
+    if not esquerda or len(esquerda.split()) != 1:
+        raise ValueError(f"lado esquerdo inválido: {esquerda!r}")
+    if "->" in direita:
+        raise ValueError("mais de um '->' na mesma linha")
+
+    alternativas = []
+    for alternativa in direita.split("|"):
+        alternativa = alternativa.strip()
+        if not alternativa:
+            raise ValueError("alternativa vazia (use & para ε)")
+        alternativas.append(tokenizar_corpo(alternativa, simbolos, tamanho_maximo))
+    return esquerda, alternativas
 
-    # Trata epsilon (&)
-    if direita == "&":
-        direita = "ε"
 
-    return esquerda, direita
+def tokenizar_corpo(corpo, simbolos=(), tamanho_maximo=1):
+    # Trata epsilon (&)
+    if corpo in ("&", EPSILON):
+        return ()
+
+    # com espaços: cada palavra é um símbolo
+    if any(c.isspace() for c in corpo):
+        tokens = corpo.split()
+        if any(t in ("&", EPSILON) for t in tokens):
+            raise ValueError(f"ε no meio de um corpo: {corpo!r}")
+        return tuple(tokens)
+
+    # sem espaços: maior símbolo já conhecido que casar, senão um caractere
+    tokens = []
+    i = 0
+    while i < len(corpo):
+        for tamanho in range(min(tamanho_maximo, len(corpo) - i), 0, -1):
+            if tamanho == 1 or corpo[i:i + tamanho] in simbolos:
+                tokens.append(corpo[i:i + tamanho])
+                i += tamanho
+                break
+    return tuple(tokens)
@@ -0,0 +1,258 @@
+# Verificação limitada de equivalência entre a gramática original e a normalizada
+#
+# Enumera todas as palavras sobre o alfabeto da original até um comprimento N e
+# compara a pertinência nas duas gramáticas. As palavras são percorridas como
+# uma árvore de prefixos, com um reconhecedor de Earley para cada gramática
+# (earley.py): o conjunto k de Earley só depende dos anteriores, então a pilha
+# de conjuntos é a tabela de derivações indexada pelo comprimento, e cada
+# prefixo custa um conjunto novo em vez de reconhecer a palavra inteira de novo.
+# Um prefixo em que nenhuma das duas gramáticas tem itens não é prefixo de
+# nenhuma palavra das linguagens: a subárvore inteira é descartada.
+#
+# Em paralelo, o processo principal percorre os prefixos curtos e reparte os
+# prefixos vivos de comprimento `profundidade` pelo pool; cada processo monta
+# os reconhecedores uma vez só. O contraexemplo devolvido é o menor (primeiro
+# pelo comprimento, depois pela ordem do alfabeto).
+#
+# Uso em lote (dentro de src/):
+#   python verificacao.py ../files --forma fnc fng --comprimento 12 --processos 4
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from earley import ReconhecedorEarley
+from formato_binario import GramaticaBinaria
+from gramatica_compacta import GramaticaCompacta
+from greibach import ALGORITMO_CANTO_ESQUERDO, ALGORITMO_CLASSICO
+from lote import expandir_entradas
+from pipeline import FORMA_CHOMSKY, FORMA_GREIBACH, normalizar
+from rastreamento import SILENCIOSO, definir_nivel
+from simplificacao import ORDEM_BINARIZADA, ORDEM_CLASSICA
+from utils import ler_gramatica_compacta
+
+FORMA_SIMPLIFICADA = "simplificada"
+
+# prefixos repartidos por processo (balanceia subárvores de tamanhos diferentes)
+PREFIXOS_POR_PROCESSO = 8
+
+
+def verificar_equivalencia(original, normalizada, comprimento_maximo, processos=None, profundidade=None):
+    # original / normalizada: dicionário, GramaticaCompacta ou GramaticaBinaria
+    # processos: None ou 1 roda no próprio processo
+    # profundidade: comprimento dos prefixos repartidos (padrão: o menor que dá
+    # PREFIXOS_POR_PROCESSO prefixos por processo)
+    inicio = time.perf_counter()
+    original = _compacta(original)
+    normalizada = _compacta(normalizada)
+    alfabeto = [original.nome(a) for a in sorted(original.terminais(), key=original.nome)]
+
+    processos = processos or 1
+    if profundidade is None:
+        profundidade = comprimento_maximo
+        if processos > 1 and len(alfabeto) > 1:
+            profundidade = 0
+            while len(alfabeto) ** profundidade < processos * PREFIXOS_POR_PROCESSO:
+                profundidade += 1
+    profundidade = min(profundidade, comprimento_maximo)
+
+    # prefixos curtos aqui; os vivos de comprimento `profundidade` vão para o pool
+    busca = BuscaContraexemplo(original, normalizada, alfabeto)
+    prefixos = [] if profundidade < comprimento_maximo else None
+    busca.explorar(profundidade, prefixos)
+    if busca.contraexemplo is None and prefixos:
+        if processos > 1 and len(prefixos) > 1:
+            with ProcessPoolExecutor(processos, initializer=_iniciar_processo,
+                                     initargs=(original, normalizada, alfabeto)) as pool:
+                tamanho_bloco = max(1, len(prefixos) // (processos * PREFIXOS_POR_PROCESSO))
+                parciais = list(pool.map(_explorar_prefixo, prefixos, [comprimento_maximo] * len(prefixos),
+                                         chunksize=tamanho_bloco))
+        else:
+            parciais = [busca.explorar_a_partir(prefixo, comprimento_maximo) for prefixo in prefixos]
+        for contraexemplo, visitadas in parciais:
+            busca.visitadas += visitadas
+            if contraexemplo is not None and (
+                    busca.contraexemplo is None or _ordem(contraexemplo, alfabeto) < _ordem(busca.contraexemplo, alfabeto)):
+                busca.contraexemplo = contraexemplo
+
+    relatorio = {
+        "equivalentes": busca.contraexemplo is None,
+        "contraexemplo": None,
+        "comprimento_maximo": comprimento_maximo,
+        "palavras": sum(len(alfabeto) ** n for n in range(comprimento_maximo + 1)),
+        "visitadas": busca.visitadas,
+        "segundos": round(time.perf_counter() - inicio, 6),
+    }
+    if busca.contraexemplo is not None:
+        palavra, na_original, na_normalizada = busca.contraexemplo
+        relatorio["contraexemplo"] = {
+            "palavra": "".join(palavra) if all(len(s) == 1 for s in palavra) else list(palavra),
+            "original": na_original,
+            "normalizada": na_normalizada,
+        }
+    return relatorio
+
+
+def verificar_normalizacao(G, forma, comprimento_maximo, processos=None, ordem=ORDEM_CLASSICA,
+                           algoritmo_fng=ALGORITMO_CLASSICO, **opcoes):
+    # normaliza uma cópia de G (normalizar altera a entrada) e compara com G
+    original = _compacta(G)
+    definir_nivel(SILENCIOSO)
+    normalizada = normalizar(original.copiar(), None if forma == FORMA_SIMPLIFICADA else forma, ordem,
+                             algoritmo_fng=algoritmo_fng, **opcoes)
+    return verificar_equivalencia(original, normalizada, comprimento_maximo, processos)
+
+
+class BuscaContraexemplo:
+    # percorre a árvore de prefixos em profundidade com uma pilha de conjuntos
+    # de Earley por gramática
+    def __init__(self, original, normalizada, alfabeto):
+        self.reconhecedores = (ReconhecedorEarley(original), ReconhecedorEarley(normalizada))
+        self.alfabeto = alfabeto
+        self.pilhas = [([], []) for _ in self.reconhecedores]  # (esperando, leo)
+        self.aceitas = []   # por comprimento: (aceita na original, aceita na normalizada)
+        self.vivas = []     # por comprimento: quais gramáticas ainda têm itens
+        self.prefixo = []
+        self.contraexemplo = None
+        self.visitadas = 0
+
+        aceitas, vivas = [], []
+        for r, (esperando, leo) in zip(self.reconhecedores, self.pilhas):
+            viva = r.inicial >= 0
+            aceitas.append(viva and r._conjunto(esperando, leo, [(0, 0)]))
+            vivas.append(viva)
+        self.aceitas.append(tuple(aceitas))
+        self.vivas.append(tuple(vivas))
+
+    def explorar(self, limite, prefixos=None):
+        # testa as palavras a partir do prefixo atual, até `limite` símbolos;
+        # com `prefixos`, os vivos de comprimento `limite` são guardados nela
+        # em vez de estendidos
+        self.visitadas += 1
+        aceitas = self.aceitas[-1]
+        if aceitas[0] != aceitas[1]:
+            registrar = self.contraexemplo is None or len(self.prefixo) < len(self.contraexemplo[0])
+            if registrar:
+                self.contraexemplo = (tuple(self.prefixo), aceitas[0], aceitas[1])
+            return
+        if len(self.prefixo) >= limite:
+            if prefixos is not None and self.contraexemplo is None:
+                prefixos.append(tuple(self.prefixo))
+            return
+        # depois de um contraexemplo, só interessam palavras mais curtas
+        if self.contraexemplo is not None and len(self.prefixo) + 1 >= len(self.contraexemplo[0]):
+            return
+        for simbolo in self.alfabeto:
+            if self._empilhar(simbolo):
+                self.explorar(limite, prefixos)
+            self._desempilhar()
+
+    def explorar_a_partir(self, prefixo, limite):
+        # devolve (contraexemplo, visitadas) das extensões de `prefixo`
+        visitadas = self.visitadas
+        self.contraexemplo = None
+        for simbolo in prefixo:
+            self._empilhar(simbolo)
+        # o próprio prefixo já foi testado por quem o repartiu
+        self.visitadas -= 1
+        self.explorar(limite)
+        for _ in prefixo:
+            self._desempilhar()
+        return self.contraexemplo, self.visitadas - visitadas
+
+    # Func auxiliares
+
+    def _empilhar(self, simbolo):
+        # avança as duas gramáticas; False se nenhuma tem itens depois do símbolo
+        aceitas, vivas = [], []
+        for r, (esperando, leo), viva in zip(self.reconhecedores, self.pilhas, self.vivas[-1]):
+            itens = r._varredura(esperando, simbolo) if viva else None
+            if itens:
+                aceitas.append(r._conjunto(esperando, leo, itens))
+                vivas.append(True)
+            else:
+                aceitas.append(False)
+                vivas.append(False)
+        self.prefixo.append(simbolo)
+        self.aceitas.append(tuple(aceitas))
+        self.vivas.append(tuple(vivas))
+        return any(vivas)
+
+    def _desempilhar(self):
+        for (esperando, leo), viva in zip(self.pilhas, self.vivas.pop()):
+            if viva:
+                esperando.pop()
+                leo.pop()
+        self.aceitas.pop()
+        self.prefixo.pop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificação limitada de equivalência das normalizações")
+    parser.add_argument("entradas", nargs="+", help="arquivos, diretórios ou padrões glob")
+    parser.add_argument("--forma", nargs="+", choices=[FORMA_SIMPLIFICADA, FORMA_CHOMSKY, FORMA_GREIBACH],
+                        default=[FORMA_CHOMSKY, FORMA_GREIBACH])
+    parser.add_argument("--comprimento", type=int, default=10, help="comprimento máximo das palavras")
+    parser.add_argument("--processos", type=int, default=None, help="número de processos (padrão: CPUs)")
+    parser.add_argument("--ordem", choices=[ORDEM_CLASSICA, ORDEM_BINARIZADA], default=ORDEM_CLASSICA)
+    parser.add_argument("--algoritmo-fng", choices=[ALGORITMO_CLASSICO, ALGORITMO_CANTO_ESQUERDO],
+                        default=ALGORITMO_CLASSICO)
+    args = parser.parse_args(argv)
+
+    arquivos = expandir_entradas(args.entradas)
+    if not arquivos:
+        print("Nenhum arquivo de gramática encontrado.")
+        return 1
+
+    processos = args.processos or os.cpu_count() or 1
+    falhas = 0
+    for caminho in arquivos:
+        for forma in args.forma:
+            try:
+                relatorio = verificar_normalizacao(ler_gramatica_compacta(caminho), forma, args.comprimento,
+                                                   processos, args.ordem, args.algoritmo_fng)
+            except Exception as erro:
+                falhas += 1
+                print(f"[erro] {caminho} ({forma}): {type(erro).__name__}: {erro}")
+                continue
+            if relatorio["equivalentes"]:
+                print(f"[ok] {caminho} ({forma}): {relatorio['palavras']} palavras até {args.comprimento} "
+                      f"({relatorio['visitadas']} prefixos visitados, {relatorio['segundos']:.2f}s)")
+            else:
+                falhas += 1
+                contraexemplo = relatorio["contraexemplo"]
+                print(f"[diferente] {caminho} ({forma}): '{contraexemplo['palavra']}' "
+                      f"original={contraexemplo['original']} normalizada={contraexemplo['normalizada']}")
+    return 1 if falhas else 0
+
+
+# Func auxiliares
+
+def _compacta(G):
+    if isinstance(G, GramaticaBinaria):
+        return G.para_compacta()
+    return G if isinstance(G, GramaticaCompacta) else GramaticaCompacta.de_dict(G)
+
+
+def _ordem(contraexemplo, alfabeto):
+    posicao = {a: i for i, a in enumerate(alfabeto)}
+    palavra = contraexemplo[0]
+    return len(palavra), [posicao[s] for s in palavra]
+
+
+_busca = None  # BuscaContraexemplo de cada processo do pool
+
+
+def _iniciar_processo(original, normalizada, alfabeto):
+    global _busca
+    _busca = BuscaContraexemplo(original, normalizada, alfabeto)
+
+
+def _explorar_prefixo(prefixo, limite):
+    return _busca.explorar_a_partir(prefixo, limite)
+
+
+if __name__ == "__main__":
+    sys.exit(main())